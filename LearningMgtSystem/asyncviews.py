@@ -0,0 +1,143 @@
+import math
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import JsonResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from accounts.authentication import CachedJWTAuthentication
+
+from .replicas import ais_pinned, read_from_replica
+
+
+class AsyncAPIView(View):
+    """
+    Read-only API view for the ASGI deployment. Authentication, permission
+    checks and queries run on the event loop instead of borrowing a thread
+    from the sync_to_async pool for the whole request.
+
+    Permission classes are DRF ones. Checks that only read the request run
+    as is; a class that needs I/O provides `async def ahas_permission()`.
+    """
+    http_method_names = ['get', 'head', 'options']
+
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = []
+
+    queryset = None
+    serializer_class = None
+
+    # read from the replicas unless the user recently wrote to this group (see replicas.py)
+    replica_group = None
+
+    def get_queryset(self):
+        return self.queryset.all()
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs['context'] = {'request': self.request, 'view': self}
+        return self.serializer_class(*args, **kwargs)
+
+    async def authenticate(self, request):
+        request.user, request.auth = AnonymousUser(), None
+        for authenticator in self.authenticators:
+            result = await authenticator.aauthenticate(request)
+            if result is not None:
+                request.user, request.auth = result
+                return
+
+    async def check_permissions(self, request):
+        for permission in [permission() for permission in self.permission_classes]:
+            if hasattr(permission, 'ahas_permission'):
+                allowed = await permission.ahas_permission(request, self)
+            else:
+                allowed = permission.has_permission(request, self)
+
+            if not allowed:
+                if request.auth is None:
+                    raise exceptions.NotAuthenticated()
+                raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+    def handle_exception(self, exc):
+        # same status codes and bodies as DRF's exception handler
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.render(data, status=exc.status_code)
+
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)) and self.authenticators:
+            response['WWW-Authenticate'] = self.authenticators[0].authenticate_header(self.request)
+        return response
+
+    def render(self, data, status=200):
+        return JsonResponse(data, status=status, safe=False, json_dumps_params={'ensure_ascii': False})
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.authenticators = [authenticator() for authenticator in self.authentication_classes]
+        try:
+            await self.authenticate(request)
+            await self.check_permissions(request)
+            if self.replica_group is None or await ais_pinned(request.user, self.replica_group):
+                return await super().dispatch(request, *args, **kwargs)
+            with read_from_replica():
+                return await super().dispatch(request, *args, **kwargs)
+        except exceptions.APIException as exc:
+            return self.handle_exception(exc)
+
+
+class AsyncListAPIView(AsyncAPIView):
+    """
+    Page-number list with the same envelope as the sync list views
+    (count/next/previous/results). Filtering, search, ?ordering= and
+    keyset pages stay on the sync endpoints.
+    """
+    ordering = ('id',)
+    page_query_param = 'page'
+
+    def get_queryset(self):
+        return super().get_queryset().order_by(*self.ordering)
+
+    def get_page_link(self, number):
+        url = self.request.build_absolute_uri()
+        if number == 1:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, number)
+
+    async def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        page_size = api_settings.PAGE_SIZE
+
+        if not page_size:
+            rows = [row async for row in queryset]
+            return self.render(self.get_serializer(rows, many=True).data)
+
+        count = await queryset.acount()
+        num_pages = max(math.ceil(count / page_size), 1)
+        try:
+            number = int(request.GET.get(self.page_query_param, 1))
+        except ValueError:
+            number = 0
+        if not 1 <= number <= num_pages:
+            raise exceptions.NotFound('Invalid page.')
+
+        offset = (number - 1) * page_size
+        rows = [row async for row in queryset[offset:offset + page_size]]
+
+        return self.render({
+            'count': count,
+            'next': self.get_page_link(number + 1) if number < num_pages else None,
+            'previous': self.get_page_link(number - 1) if number > 1 else None,
+            'results': self.get_serializer(rows, many=True).data,
+        })
+
+
+class AsyncRetrieveAPIView(AsyncAPIView):
+    lookup_field = 'pk'
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            instance = await self.get_queryset().aget(**{self.lookup_field: kwargs[self.lookup_field]})
+        except ObjectDoesNotExist:
+            raise exceptions.NotFound(f'No {self.queryset.model._meta.object_name} matches the given query.')
+
+        return self.render(self.get_serializer(instance).data)
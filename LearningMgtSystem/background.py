@@ -0,0 +1,47 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+                thread_name_prefix='background'
+            )
+    return _executor
+
+def _run(func, args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+    finally:
+        # worker threads keep their own connections, don't leave them open
+        close_old_connections()
+
+def run_in_background(func, *args):
+    """
+    Run func(*args) on a worker thread once the current transaction commits,
+    so the task sees the rows the request just wrote. With
+    BACKGROUND_TASKS_EAGER it runs inline on commit instead (tests).
+    """
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        transaction.on_commit(lambda: func(*args))
+    else:
+        transaction.on_commit(lambda: get_executor().submit(_run, func, args))
+
+def wants_background(request):
+    # ?async=1 asks a slow write endpoint to answer 202 and finish in the background
+    return request.query_params.get('async', '').lower() in ('1', 'true', 'yes')
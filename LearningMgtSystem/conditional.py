@@ -0,0 +1,88 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def get_row_version(instance, fields):
+    # read version fields, following relations such as 'student__updated_at'
+    if isinstance(instance, dict):
+        # a values() row is keyed by the lookup paths themselves
+        return [instance.get(field) for field in fields]
+    version = []
+    for field in fields:
+        value = instance
+        for attr in field.split('__'):
+            value = getattr(value, attr, None)
+        version.append(value)
+    return version
+
+def get_row_pk(instance):
+    return instance['pk'] if isinstance(instance, dict) else instance.pk
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for retrieve and list views.
+
+    Validators are computed from the rows' version fields (and, for lists,
+    the page state), so a matching If-None-Match or If-Modified-Since is
+    answered with 304 before anything is serialized.
+    """
+    # fields that change whenever the serialized representation changes
+    version_fields = ('updated_at',)
+
+    def get_etag(self, request, rows, state=()):
+        parts = [
+            type(self).__name__,
+            request.META.get('QUERY_STRING', ''),
+            request.accepted_renderer.format,
+            list(state),
+            [(get_row_pk(row), get_row_version(row, self.version_fields)) for row in rows],
+        ]
+        return quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+    def get_last_modified(self, instance):
+        versions = [value for value in get_row_version(instance, self.version_fields) if value is not None]
+        return max(versions) if versions else None
+
+    def conditional_response(self, request, etag, last_modified=None):
+        # a 304/412 response when the client's copy is current, otherwise None
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+    def set_validators(self, response, etag, last_modified=None):
+        response['ETag'] = etag
+        if last_modified:
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag = self.get_etag(request, [instance])
+        last_modified = self.get_last_modified(instance)
+
+        response = self.conditional_response(request, etag, last_modified)
+        if response is None:
+            serializer = self.get_serializer(instance)
+            response = Response(serializer.data)
+        return self.set_validators(response, etag, last_modified)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else list(queryset)
+        state = self.paginator.get_page_state() if page is not None and hasattr(self.paginator, 'get_page_state') else ()
+
+        # no Last-Modified on collections: a deleted row wouldn't move it
+        etag = self.get_etag(request, rows, state)
+        response = self.conditional_response(request, etag)
+        if response is None:
+            serializer = self.get_serializer(rows, many=True)
+            if page is not None:
+                response = self.get_paginated_response(serializer.data)
+            else:
+                response = Response(serializer.data)
+        return self.set_validators(response, etag)
@@ -0,0 +1,213 @@
+"""
+A bounded, thread-safe pool of DB-API connections, one per process and
+database alias. Used by the LearningMgtSystem.mysql_pool backend, but knows
+nothing about MySQL: it is given callables to open, check and close
+connections.
+
+Connections are handed out most recently used first, so when traffic drops
+the least used ones sit idle and are closed after max_idle seconds. A
+connection idle for more than check_after seconds is checked (pinged)
+before it is handed out again, and one older than max_lifetime is closed
+instead of being reused, so server-side timeouts never reach a request.
+"""
+import logging
+import os
+import threading
+from time import monotonic
+
+
+logger = logging.getLogger(__name__)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+def _close_quietly(close, connection):
+    try:
+        close(connection)
+    except Exception:
+        logger.debug('Error closing pooled connection', exc_info=True)
+
+
+class ConnectionPool:
+    def __init__(self, connect, max_size=10, timeout=10, max_idle=300, max_lifetime=3600, check_after=30,
+                 check=None, close=None, params=None):
+        self.connect = connect
+        # what connect() connects with, see get_pool()
+        self.params = params
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+        self.check_after = check_after
+        self.check = check
+        self.close_connection = close or (lambda connection: connection.close())
+        # sockets aren't shared with forked children, see get_pool()
+        self.pid = os.getpid()
+        self.closed = False
+
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+        # (connection, last released), most recently used last
+        self.idle = []
+        # id(connection) -> opened at, for every open connection
+        self.opened_at = {}
+        # open connections plus the ones being opened
+        self.size = 0
+        self.waiting = 0
+        self.counters = {
+            'connects': 0, 'closes': 0, 'checkouts': 0, 'timeouts': 0, 'failed_checks': 0, 'wait_seconds': 0.0,
+        }
+
+    def is_expired(self, connection, now):
+        return self.max_lifetime is not None and now - self.opened_at[id(connection)] > self.max_lifetime
+
+    def forget(self, connection):
+        # called with the lock held, for a connection that is about to be closed
+        self.opened_at.pop(id(connection), None)
+        self.size -= 1
+        self.counters['closes'] += 1
+        self.available.notify()
+
+    def reap(self, now):
+        """Take the idle connections that are past max_idle or max_lifetime out of the pool."""
+        expired = [
+            (connection, released) for connection, released in self.idle
+            if now - released > self.max_idle or self.is_expired(connection, now)
+        ]
+        for entry in expired:
+            self.idle.remove(entry)
+            self.forget(entry[0])
+        return [connection for connection, _ in expired]
+
+    def acquire(self):
+        """Hand out a connection, opening one if the pool isn't full. Raises PoolTimeout."""
+        started = monotonic()
+        deadline = started + self.timeout
+        while True:
+            connection, released, timed_out = None, None, False
+            with self.lock:
+                while True:
+                    now = monotonic()
+                    reaped = self.reap(now)
+                    if self.idle:
+                        connection, released = self.idle.pop()
+                        break
+                    if self.size < self.max_size:
+                        self.size += 1
+                        break
+                    if now >= deadline:
+                        self.counters['timeouts'] += 1
+                        timed_out = True
+                        break
+                    self.waiting += 1
+                    self.available.wait(deadline - now)
+                    self.waiting -= 1
+
+            for stale in reaped:
+                _close_quietly(self.close_connection, stale)
+            if timed_out:
+                raise PoolTimeout(f'No connection available within {self.timeout} seconds.')
+
+            if connection is None:
+                try:
+                    connection = self.connect()
+                except Exception:
+                    with self.lock:
+                        self.size -= 1
+                        self.available.notify()
+                    raise
+                with self.lock:
+                    self.opened_at[id(connection)] = monotonic()
+                    self.counters['connects'] += 1
+                    self.checked_out(started)
+                return connection
+
+            if self.check is not None and monotonic() - released > self.check_after and not self.is_healthy(connection):
+                with self.lock:
+                    self.counters['failed_checks'] += 1
+                    self.forget(connection)
+                _close_quietly(self.close_connection, connection)
+                continue
+
+            with self.lock:
+                self.checked_out(started)
+            return connection
+
+    def checked_out(self, started):
+        self.counters['checkouts'] += 1
+        self.counters['wait_seconds'] += monotonic() - started
+
+    def is_healthy(self, connection):
+        try:
+            self.check(connection)
+        except Exception:
+            return False
+        return True
+
+    def release(self, connection):
+        """Take a connection back, ready for reuse."""
+        with self.lock:
+            if not self.closed and not self.is_expired(connection, monotonic()):
+                self.idle.append((connection, monotonic()))
+                self.available.notify()
+                return
+            self.forget(connection)
+        _close_quietly(self.close_connection, connection)
+
+    def discard(self, connection):
+        """Close a checked out connection that must not be reused."""
+        with self.lock:
+            self.forget(connection)
+        _close_quietly(self.close_connection, connection)
+
+    def close(self):
+        """Close the idle connections, and the checked out ones as they come back."""
+        with self.lock:
+            self.closed = True
+            idle, self.idle = self.idle, []
+            for connection, _ in idle:
+                self.forget(connection)
+        for connection, _ in idle:
+            _close_quietly(self.close_connection, connection)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'max_size': self.max_size,
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'waiting': self.waiting,
+                **self.counters,
+            }
+
+
+def get_pool(alias, connect, params=None, **options):
+    """
+    The process's pool for a database alias, created on first use with
+    connect and options. A forked child gets a new pool: the parent's
+    sockets are left alone rather than used or closed from two processes.
+    params are what connect() connects with; when a caller comes with
+    different ones (the alias's settings changed) the pool is closed and
+    replaced, rather than handing out connections made with the old ones.
+    """
+    stale = None
+    with _pools_lock:
+        pool = _pools.get(alias)
+        if pool is not None and pool.pid == os.getpid() and pool.params != params:
+            stale, pool = pool, None
+        if pool is None or pool.pid != os.getpid():
+            pool = _pools[alias] = ConnectionPool(connect, params=params, **options)
+    if stale is not None:
+        stale.close()
+    return pool
+
+def get_pool_stats():
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.stats() for alias, pool in pools.items() if pool.pid == os.getpid()}
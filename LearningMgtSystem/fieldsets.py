@@ -0,0 +1,167 @@
+"""
+Sparse fieldsets: ?fields= and ?expand= on read requests.
+
+?fields=course,completed,student.user.email keeps only the named fields;
+dotted names reach into nested serializers, and a nested serializer named
+on its own keeps all of its fields. Without ?fields= everything is rendered.
+
+?expand=student.user renders the listed relations (a serializer's
+expandable_fields) nested and every other one as its primary key. Without
+?expand= all relations are nested, as they always were.
+
+SparseFieldsMixin trims the serializers; SparseQuerysetMixin narrows the
+view's queryset to the columns and joins the trimmed serializer reads.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+def parse_paths(value):
+    # 'a,b.c,b.d' -> {'a': {}, 'b': {'c': {}, 'd': {}}}
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+def get_selection(request):
+    """(fields tree, expand tree) of a read request, None for a parameter not given."""
+    if request is None or request.method not in READ_METHODS:
+        return None, None
+    params = request.GET
+    fields = parse_paths(params['fields']) if params.get('fields') else None
+    expand = parse_paths(params['expand']) if 'expand' in params else None
+    return fields, expand
+
+
+class SparseFieldsMixin:
+    """Serializer side of ?fields= / ?expand=, see the module docstring."""
+    # nested relations ?expand= may collapse to their primary key
+    # (forward relations only: a reverse one would cost a query per row)
+    expandable_fields = []
+
+    def get_field_path(self):
+        # names from the root serializer down to this one, list serializers skipped
+        path = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                path.insert(0, node.field_name)
+            node = node.parent
+        return path
+
+    def get_fields(self):
+        fields = super().get_fields()
+        selected, expanded = get_selection(self.context.get('request'))
+        path = self.get_field_path()
+
+        for name in path:
+            # an ancestor named on its own keeps everything below it
+            selected = selected.get(name) if selected else None
+        if selected:
+            fields = {name: field for name, field in fields.items() if name in selected}
+
+        if expanded is not None:
+            for name in path:
+                expanded = expanded.get(name, {})
+            for name in self.expandable_fields:
+                if name in fields and name not in expanded:
+                    fields[name] = serializers.PrimaryKeyRelatedField(read_only=True)
+        return fields
+
+
+def is_model_path(model, path):
+    # whether a lookup path like 'student__user__email' names fields or relations
+    for name in path.split('__'):
+        if model is None:
+            return False
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        model = field.related_model
+    return True
+
+def get_read_paths(serializer, prefix='', select_related=()):
+    """
+    (columns, joins, whole): the model paths a serializer reads, for only();
+    the relations it follows, for select_related(); and the relations
+    rendered through __str__, whose rows are loaded whole. select_related
+    holds the root serializer's declared joins, which say what __str__ needs.
+    """
+    columns, joins, whole = set(), set(), set()
+    declared = getattr(serializer, 'projected_fields', {})
+    for name, field in serializer.fields.items():
+        if field.write_only or field.source == '*':
+            continue
+        path = prefix + field.source.replace('.', '__')
+
+        if isinstance(field, (serializers.ListSerializer, serializers.ManyRelatedField)):
+            # to-many relations are prefetched, not joined
+            continue
+        if isinstance(field, serializers.BaseSerializer):
+            joins.add(path)
+            columns.add(path)
+            nested = get_read_paths(field, path + '__', select_related)
+            columns |= nested[0]
+            joins |= nested[1]
+            whole |= nested[2]
+        elif isinstance(field, serializers.RelatedField) and not isinstance(field, serializers.PrimaryKeyRelatedField):
+            related = {path} | {join for join in select_related if join.startswith(path + '__')}
+            joins |= related
+            whole |= related
+            columns.add(path)
+        elif name in declared:
+            # a model property, reading the columns declared for its projection
+            for read in declared[name][0]:
+                parts = (prefix + read).split('__')
+                columns.add('__'.join(parts))
+                joins.update('__'.join(parts[:end]) for end in range(1, len(parts)))
+        else:
+            columns.add(path)
+    return columns, joins, whole
+
+class SparseQuerysetMixin:
+    """
+    View side of ?fields= / ?expand=: load only the columns and joins the
+    trimmed serializer reads, plus what the view itself needs (version
+    fields for ETags, ordering fields for pages).
+    """
+    def get_required_paths(self):
+        paths = list(getattr(self, 'version_fields', ()))
+        for attr in ('ordering', 'keyset_ordering'):
+            ordering = getattr(self, attr, None) or ()
+            paths += [ordering] if isinstance(ordering, str) else list(ordering)
+        return [path.lstrip('-') for path in paths]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        selected, expanded = get_selection(self.request)
+        if selected is None and expanded is None:
+            return queryset
+
+        columns, joins, whole = get_read_paths(
+            self.get_serializer(), select_related=getattr(self.serializer_class, 'select_related_fields', ())
+        )
+        for path in self.get_required_paths():
+            columns.add(path)
+            # a version field such as student__updated_at needs its relation joined
+            parts = path.split('__')
+            joins.update('__'.join(parts[:end]) for end in range(1, len(parts)))
+
+        # relations are followed through their foreign key column
+        columns |= joins
+        # naming no column of a joined model loads all of its columns
+        columns = {path for path in columns if not any(path.startswith(relation + '__') for relation in whole)}
+
+        if not all(is_model_path(queryset.model, path) for path in columns):
+            # something is read through a property: keep the full rows
+            return queryset
+        queryset = queryset.select_related(None)
+        if joins:
+            queryset = queryset.select_related(*joins)
+        return queryset.only(*columns)
@@ -0,0 +1,40 @@
+from functools import partial
+
+from django.db.backends.mysql import base
+
+from LearningMgtSystem.dbpool import get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Django's MySQL backend with connections checked out of a per-process
+    pool (LearningMgtSystem.dbpool) instead of opened for every request.
+
+    With CONN_MAX_AGE = 0 Django closes the connection at the end of each
+    request, which here hands it back to the pool. Connections are never tied
+    to a thread, so ASGI's sync_to_async threads share them too. Session
+    state set with SET lives on with the connection; none is used here.
+
+    Pool options come from the database's POOL dict: MAX_SIZE, TIMEOUT,
+    MAX_IDLE, MAX_LIFETIME and CHECK_AFTER (see ConnectionPool).
+    """
+    def get_new_connection(self, conn_params):
+        options = {key.lower(): value for key, value in self.settings_dict.get('POOL', {}).items()}
+        self.pool = get_pool(
+            self.alias,
+            partial(super().get_new_connection, conn_params),
+            params=conn_params,
+            check=lambda connection: connection.ping(),
+            **options
+        )
+        return self.pool.acquire()
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            if self.in_atomic_block or not self.autocommit or (self.errors_occurred and not self.is_usable()):
+                # maybe mid-transaction or broken: don't hand it to another request
+                self.pool.discard(self.connection)
+            else:
+                self.pool.release(self.connection)
@@ -0,0 +1,66 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class KeysetPagination(CursorPagination):
+    # fallback ordering for views that don't declare `keyset_ordering`
+    ordering = 'id'
+
+    def get_ordering(self, request, queryset, view):
+        # keyset pages must follow a stable ordering on an indexed column,
+        # so the view's keyset ordering wins over ?ordering=
+        ordering = getattr(view, 'keyset_ordering', None) or self.ordering
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+
+class PageNumberOrKeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination by default. Clients opt in to keyset pagination
+    with `?pagination=keyset`; the `next`/`previous` links then carry a
+    `cursor` and every page costs the same as the first one (no COUNT or
+    OFFSET).
+    """
+    mode_query_param = 'pagination'
+    keyset_mode = 'keyset'
+    keyset_class = KeysetPagination
+
+    def __init__(self):
+        self.keyset = None
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == self.keyset_mode
+            or self.keyset_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_keyset(request):
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_page_state(self):
+        # what the pagination envelope depends on besides the rows themselves
+        if self.keyset is not None:
+            return (self.keyset.has_next, self.keyset.has_previous)
+        return (self.page.paginator.count, self.page.number)
+
+    def get_schema_operation_parameters(self, view):
+        keyset_parameters = self.keyset_class().get_schema_operation_parameters(view)
+        return super().get_schema_operation_parameters(view) + [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "keyset" to page with cursors instead of page numbers.',
+                'schema': {'type': 'string', 'enum': [self.keyset_mode]},
+            },
+            # only the cursor, page size is shared with page-number mode
+            keyset_parameters[0],
+        ]
@@ -0,0 +1,145 @@
+"""
+A values() read path for list views.
+
+Building a model instance per row and running every value through the
+serializer's field machinery is most of the cost of a list page. A
+Projection reads a serializer's fields off values() rows instead, with one
+converter per column, and renders the same JSON as the serializer.
+
+Fields are projected as:
+- primary key related fields: the foreign key column;
+- plain fields: the column, through the field's to_representation()
+  unless that is the identity for what the database returns;
+- fields named in the serializer's projected_fields: the columns listed
+  there, formatted like the related model's __str__ or the model property
+  the field reads.
+
+A serializer with any other field (nested serializers, method fields,
+__str__ relations and properties not declared in projected_fields) has no
+projection and the view serializes model instances as before.
+"""
+from django.db.models import Field
+from django.db.models.query import BaseIterable
+from django.utils.encoding import is_protected_type
+from rest_framework import serializers
+
+from .fieldsets import SparseQuerysetMixin, is_model_path
+
+
+# fields whose to_representation() returns what the database already gives
+IDENTITY_FIELDS = (
+    serializers.CharField, serializers.EmailField, serializers.URLField, serializers.SlugField,
+    serializers.IntegerField, serializers.BooleanField,
+)
+
+
+class Projection:
+    def __init__(self, columns):
+        # (field name, values() key, extra keys, convert), in the serializer's field order
+        self.columns = columns
+        self.paths = list(dict.fromkeys(
+            path for _, key, extra, _ in columns for path in (key, *extra)
+        ))
+
+    def render(self, row):
+        data = {}
+        for name, key, extra, convert in self.columns:
+            value = row[key]
+            # like the serializer: None is rendered as is, a missing relation too
+            if value is not None and convert is not None:
+                value = convert(*[row[path] for path in extra]) if extra else convert(value)
+            data[name] = value
+        return data
+
+
+class ProjectedRows:
+    """Stands in for a many=True serializer over values() rows."""
+    def __init__(self, rows, projection):
+        self.rows = rows
+        self.projection = projection
+
+    @property
+    def data(self):
+        render = self.projection.render
+        return [render(row) for row in self.rows]
+
+
+class ProjectionIterable(BaseIterable):
+    """
+    Yields a queryset's rows as values() dicts of `paths`. Set as the
+    queryset's iterable class, so COUNT(*) and slicing still run on the
+    model query: the joins the columns need are left out of the count.
+    """
+    paths = ()
+
+    def __iter__(self):
+        yield from self.queryset._chain().values(*self.paths)
+
+
+def model_field_to_string(value):
+    # Field.value_to_string(), given the value instead of the instance
+    return value if is_protected_type(value) else str(value)
+
+def get_projection(serializer):
+    """The Projection of a serializer's readable fields, None if one of them can't be projected."""
+    declared = getattr(serializer, 'projected_fields', {})
+    columns = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            return None
+        key = field.source.replace('.', '__')
+
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            columns.append((name, key, (), None))
+        elif name in declared and isinstance(field, serializers.StringRelatedField):
+            paths, convert = declared[name]
+            columns.append((name, key, tuple(paths), convert))
+        elif name in declared and not isinstance(field, (serializers.BaseSerializer, serializers.RelatedField)):
+            # a property has no column of its own, its first declared one stands in for None
+            paths, convert = declared[name]
+            columns.append((name, paths[0], tuple(paths), convert))
+        elif isinstance(field, (serializers.BaseSerializer, serializers.RelatedField,
+                                serializers.ManyRelatedField, serializers.SerializerMethodField)):
+            return None
+        elif isinstance(field, serializers.ModelField):
+            # model fields DRF has no mapping for, rendered with value_to_string()
+            if type(field.model_field).value_to_string is not Field.value_to_string:
+                return None
+            columns.append((name, key, (), model_field_to_string))
+        elif type(field) in IDENTITY_FIELDS:
+            columns.append((name, key, (), None))
+        else:
+            columns.append((name, key, (), field.to_representation))
+    return Projection(columns)
+
+
+class ProjectionListMixin(SparseQuerysetMixin):
+    """
+    List view side of the values() read path, see the module docstring.
+    Replaces SparseQuerysetMixin on list views (sync and async): ?fields=
+    and ?expand= decide the serializer's fields, and so the projection.
+    Rows are dicts keyed by lookup path, with the primary key under 'pk'.
+    """
+    projection = None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        projection = get_projection(self.get_serializer())
+        if projection is None:
+            return queryset
+
+        # version and ordering fields feed the ETag and keyset cursors
+        paths = list(dict.fromkeys(['pk', *projection.paths, *self.get_required_paths()]))
+        if not all(is_model_path(queryset.model, path) for path in paths if path != 'pk'):
+            return queryset
+        self.projection = projection
+        queryset = queryset._chain()
+        queryset._iterable_class = type('ProjectionIterable', (ProjectionIterable,), {'paths': paths})
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        if self.projection is not None and kwargs.get('many'):
+            return ProjectedRows(args[0], self.projection)
+        return super().get_serializer(*args, **kwargs)
@@ -0,0 +1,60 @@
+"""
+EXPLAIN helpers for checking that queries are served by indexes.
+
+find_full_scans() reads a query's plan and reports the tables it reads in
+full. Walking a table in primary key order under a LIMIT (a page ordered by
+id) is not reported, it stops after the page.
+"""
+import re
+
+from django.db import connections
+
+
+# SQLite: "SCAN enrolments_course" or "SCAN enrolments_course AS T", with no index
+SQLITE_FULL_SCAN = re.compile(r'^SCAN (?P<table>\w+)(?: AS \w+)?$')
+
+
+def explain(sql, using='default'):
+    """Plan of an executed (already interpolated) SQL statement."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[3] for row in cursor.fetchall()]
+        if connection.vendor == 'mysql':
+            cursor.execute(f'EXPLAIN {sql}')
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    raise NotImplementedError(f'No EXPLAIN support for {connection.vendor}')
+
+def resolve_order_positions(sql):
+    # values() queries order by select list position ("ORDER BY 7 ASC"), put the columns back
+    select = re.match(r'SELECT (.*?) FROM ', sql)
+    if select is None:
+        return sql
+    columns = [re.sub(r' AS "?\w+"?$', '', column) for column in select[1].split(', ')]
+    return re.sub(
+        r'\b(\d+) (ASC|DESC)\b',
+        lambda match: f'{columns[int(match[1]) - 1]} {match[2]}' if int(match[1]) <= len(columns) else match[0],
+        sql,
+    )
+
+def is_pk_walk(sql, table):
+    # ORDER BY the table's id under a LIMIT: the scan ends with the page
+    sql = resolve_order_positions(sql)
+    return bool(re.search(rf'ORDER BY "?{table}"?\."?id"? (?:ASC|DESC).* LIMIT', sql))
+
+def find_full_scans(sql, using='default'):
+    """Tables the statement scans in full, as (table, plan step) pairs."""
+    scans = []
+    for step in explain(sql, using):
+        if isinstance(step, dict):
+            # MySQL: access type ALL is a full table scan
+            if step.get('type') == 'ALL':
+                scans.append((step['table'], f"type=ALL rows={step.get('rows')} {step.get('Extra') or ''}".strip()))
+            continue
+
+        match = SQLITE_FULL_SCAN.match(step)
+        if match and not is_pk_walk(sql, match['table']):
+            scans.append((match['table'], step))
+    return scans
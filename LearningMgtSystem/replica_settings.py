@@ -0,0 +1,23 @@
+"""
+Replica routing on two local SQLite databases, the second one standing in
+for a replica that never catches up. The rest of the suite expects no
+replicas, so run the replica tests on their own:
+
+    python manage.py test enrolments.tests.ReplicaReadTest --settings=LearningMgtSystem.replica_settings
+"""
+from .settings import *  # noqa
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'primary.sqlite3',
+    },
+    'replica1': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'replica.sqlite3',
+    },
+}
+DATABASE_REPLICAS = ['replica1']
+
+SECURE_SSL_REDIRECT = False
@@ -0,0 +1,110 @@
+"""
+Read replica routing.
+
+Views opt in with ReplicaReadMixin. A GET/HEAD/OPTIONS request to such a
+view reads from one replica, picked per request so a page and its count
+come from the same copy of the data. Everything else (writes, other
+requests, management commands) goes to the primary.
+
+Replicas lag behind the primary, so a successful write through a view pins
+the user's reads of the view's replica group to the primary for
+REPLICA_PIN_SECONDS. Groups keep unrelated traffic apart: enrolling in a
+course doesn't move the user's catalog reads off the replicas.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.permissions import SAFE_METHODS
+
+
+# replica alias the current request reads from, None for the primary
+_read_alias = ContextVar('replica_read_alias', default=None)
+
+
+def get_replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+def get_pin_seconds():
+    # how long replicas are assumed to take to catch up with a write
+    return getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+
+def reading_from_replica():
+    # whether the current request's reads go to a replica
+    return _read_alias.get() is not None
+
+def get_pin_key(user, group):
+    return f'replica_pin:{group}:{user.pk}'
+
+def pin_to_primary(user, group):
+    # the user has just written: their reads of the group stay on the primary for a while
+    if user.is_authenticated:
+        cache.set(get_pin_key(user, group), True, get_pin_seconds())
+
+def is_pinned(user, group):
+    return user.is_authenticated and cache.get(get_pin_key(user, group)) is not None
+
+async def ais_pinned(user, group):
+    return user.is_authenticated and await cache.aget(get_pin_key(user, group)) is not None
+
+def choose_replica():
+    replicas = get_replicas()
+    return random.choice(replicas) if replicas else None
+
+@contextmanager
+def read_from_replica():
+    """Send the reads made inside the block to one of the replicas, if any."""
+    token = _read_alias.set(choose_replica())
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Database router for DATABASE_REPLICAS, see the module docstring. The
+    replicas hold the same rows as the primary (replication), so relations
+    across aliases are allowed.
+    """
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # also for instances that were read from a replica
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe requests from the replicas, unless the user wrote to the
+    view's replica_group in the last REPLICA_PIN_SECONDS; pin the group to
+    the primary after a successful unsafe request.
+    """
+    # views whose reads must see each other's writes share a group
+    replica_group = 'default'
+
+    def dispatch(self, request, *args, **kwargs):
+        self.replica_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.replica_token is not None:
+                _read_alias.reset(self.replica_token)
+
+    def initial(self, request, *args, **kwargs):
+        # authenticates, so the user is known from here on
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_pinned(request.user, self.replica_group):
+            self.replica_token = _read_alias.set(choose_replica())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request.user, self.replica_group)
+        return super().finalize_response(request, response, *args, **kwargs)
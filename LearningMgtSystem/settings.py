@@ -56,6 +56,7 @@ INSTALLED_APPS = [
     'students',
     'instructors',
     'enrolments',
+    'reports',
 ]
 
 MIDDLEWARE = [
@@ -101,7 +102,8 @@ WSGI_APPLICATION = 'LearningMgtSystem.wsgi.application'
 
 DATABASES = {
     'default': {
-        "ENGINE": "django.db.backends.mysql",
+        # django.db.backends.mysql with a per-process connection pool
+        "ENGINE": "LearningMgtSystem.mysql_pool",
         "NAME": os.getenv('DB_NAME'),
         "USER": os.getenv('DB_USER'),
         "PASSWORD": os.getenv('DB_PASSWORD'),
@@ -111,12 +113,71 @@ DATABASES = {
             # Ensures safer, stricter data validation
             'init_command': "SET sql_mode='STRICT_TRANS_TABLES'"
         },
+        # closed after each request, which returns the connection to the pool
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            # connections per process: at least the worker's thread count
+            'MAX_SIZE': int(os.getenv('DB_POOL_SIZE', '10')),
+            # seconds a request waits for a free connection before failing
+            'TIMEOUT': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+            # idle connections are closed after MAX_IDLE seconds, any after MAX_LIFETIME
+            'MAX_IDLE': int(os.getenv('DB_POOL_MAX_IDLE', '300')),
+            'MAX_LIFETIME': int(os.getenv('DB_POOL_MAX_LIFETIME', '3600')),
+            # ping a connection that sat idle longer than this before reusing it
+            'CHECK_AFTER': int(os.getenv('DB_POOL_CHECK_AFTER', '30')),
+        },
+    }
+}
+
+# read replicas: comma separated hosts sharing the primary's name and credentials;
+# in tests they mirror the primary's test database
+DATABASE_REPLICAS = []
+for number, host in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), start=1):
+    DATABASES[f'replica{number}'] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['LearningMgtSystem.replicas.ReplicaRouter']
+
+# seconds a user's reads stay on the primary after they write (replication lag)
+REPLICA_PIN_SECONDS = int(os.getenv('REPLICA_PIN_SECONDS', '5'))
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# per-process memory by default; point every worker at a shared backend
+# (e.g. Redis or Memcached) so invalidations reach all of them
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
+# how long a rendered course catalog page is cached (invalidated on course/instructor writes)
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '300'))
+
 # Using Custom User
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
+AUTHENTICATION_BACKENDS = ['accounts.backends.CachedCredentialsBackend']
+
+# Password hashing
+# the first hasher hashes new passwords; the others only verify older hashes,
+# which are rehashed with the first one on the user's next successful login
+PASSWORD_HASHERS = os.getenv('PASSWORD_HASHERS', ','.join([
+    'accounts.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+])).split(',')
+
+# PBKDF2 work factor, Django's default when unset; stored hashes follow changes on login
+PASSWORD_HASH_ITERATIONS = int(os.getenv('PASSWORD_HASH_ITERATIONS', '0')) or None
+
+# how long a successful password check is remembered (0 disables)
+CREDENTIAL_CACHE_TIMEOUT = int(os.getenv('CREDENTIAL_CACHE_TIMEOUT', '300'))
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -157,6 +218,24 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static/')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media/')
 
+# generated report files, kept out of MEDIA_ROOT and served by the download view
+REPORTS_ROOT = os.getenv('REPORTS_ROOT', os.path.join(BASE_DIR, 'reports_files/'))
+
+# days finished report jobs and their files are kept (purge_reports)
+REPORTS_RETENTION_DAYS = int(os.getenv('REPORTS_RETENTION_DAYS', '7'))
+
+# rows fetched per query while writing a report
+REPORT_CHUNK_SIZE = int(os.getenv('REPORT_CHUNK_SIZE', '2000'))
+
+# rows removed per transaction when deleting courses, students and instructors
+DELETE_CHUNK_SIZE = int(os.getenv('DELETE_CHUNK_SIZE', '2000'))
+
+# worker threads for background jobs such as reports
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', '2'))
+
+# password hashing processes for user imports uploaded through the admin
+USER_IMPORT_WORKERS = int(os.getenv('USER_IMPORT_WORKERS', os.cpu_count() or 1))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -166,11 +245,11 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
      # Authentication Setup
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
-     # Pagination Setup
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+     # Pagination Setup (page numbers by default, ?pagination=keyset for cursors)
+    'DEFAULT_PAGINATION_CLASS': 'LearningMgtSystem.pagination.PageNumberOrKeysetPagination',
     'PAGE_SIZE': 10,  # Customize page size
     # Search Filter Setup
     'DEFAULT_FILTER_BACKENDS': [
@@ -186,8 +265,21 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': False,
     'BLACKLIST_AFTER_ROTATION': True,
+    # embed role and status claims in issued tokens
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.serializers.RoleTokenObtainPairSerializer',
 }
 
+# how long an authenticated user (with profile and role objects) stays cached
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', '60'))
+
+# how long role/status claims in an access token are trusted without a lookup
+ROLE_CLAIMS_FRESHNESS = timedelta(seconds=int(os.getenv('ROLE_CLAIMS_FRESHNESS', '300')))
+
+# claims are only trusted when revocations reach every worker, i.e. with a shared
+# cache backend; set to true with the per-process default cache only if the app
+# runs in a single process
+ROLE_CLAIMS_SINGLE_PROCESS = os.getenv('ROLE_CLAIMS_SINGLE_PROCESS', 'False').lower() == 'true'
+
 # setup for auto documentation
 REST_FRAMEWORK['DEFAULT_SCHEMA_CLASS'] = 'drf_spectacular.openapi.AutoSchema'
 
@@ -0,0 +1,36 @@
+from django.db import models
+from django.db.models.signals import ModelSignal
+
+
+# sent after queryset-level writes (update, bulk_create, bulk_update), which
+# skip post_save; receivers get the model as sender, the action and the pks
+bulk_changed = ModelSignal(use_caching=True)
+
+
+class BulkSignalQuerySet(models.QuerySet):
+    def _send_bulk_changed(self, action, pks):
+        bulk_changed.send(sender=self.model, action=action, pks=pks)
+
+    def update(self, **kwargs):
+        if not bulk_changed.has_listeners(self.model):
+            return super().update(**kwargs)
+
+        # the filter may not match once updated, collect the rows first
+        pks = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        if rows:
+            self._send_bulk_changed('update', pks)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        if objs:
+            # pks are None on backends that can't return them (MySQL)
+            self._send_bulk_changed('create', [obj.pk for obj in objs])
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if rows:
+            self._send_bulk_changed('update', [obj.pk for obj in objs])
+        return rows
@@ -0,0 +1,243 @@
+import importlib.util
+import threading
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+
+from . import dbpool
+from .dbpool import ConnectionPool, PoolTimeout, get_pool
+
+
+User = get_user_model()
+
+
+class FakeConnection:
+    def __init__(self):
+        self.alive = True
+        self.closed = False
+
+    def ping(self):
+        if not self.alive:
+            raise OSError('MySQL server has gone away')
+
+    def close(self):
+        self.closed = True
+
+
+class FakeMySQLConnection(FakeConnection):
+    """Just enough of a MySQLdb connection for Django's MySQL backend to connect."""
+    def __init__(self, **params):
+        super().__init__()
+        self.encoders = {}
+
+    def autocommit(self, on):
+        pass
+
+    def get_autocommit(self):
+        return True
+
+    def rollback(self):
+        pass
+
+    def cursor(self):
+        return FakeMySQLCursor()
+
+
+class FakeMySQLCursor:
+    description = None
+
+    def execute(self, sql, params=None):
+        self.sql = sql
+
+    def fetchone(self):
+        if 'VERSION()' in self.sql:
+            # version, sql_mode, storage engine, sql_auto_is_null, lower_case_table_names, zoneinfo
+            return ('8.0.36', 'STRICT_TRANS_TABLES', 'InnoDB', 0, 0, 1)
+        return (1,)
+
+    def close(self):
+        pass
+
+
+class ConnectionPoolTest(SimpleTestCase):
+    def setUp(self):
+        # stands in for MySQL: counts the handshakes
+        self.connections = []
+        self.now = 1000.0
+        clock = patch('LearningMgtSystem.dbpool.monotonic', lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def connect(self):
+        connection = FakeConnection()
+        self.connections.append(connection)
+        return connection
+
+    def make_pool(self, **options):
+        return ConnectionPool(self.connect, check=lambda connection: connection.ping(), **options)
+
+    def test_connections_are_reused(self):
+        pool = self.make_pool()
+        for _ in range(5):
+            connection = pool.acquire()
+            pool.release(connection)
+
+        self.assertEqual(len(self.connections), 1)
+        stats = pool.stats()
+        self.assertEqual((stats['connects'], stats['checkouts'], stats['size'], stats['idle']), (1, 5, 1, 1))
+
+    def test_pool_is_bounded(self):
+        pool = self.make_pool(max_size=2, timeout=0)
+        first, second = pool.acquire(), pool.acquire()
+        with self.assertRaises(PoolTimeout):
+            pool.acquire()
+        self.assertEqual(pool.stats()['timeouts'], 1)
+
+        pool.release(first)
+        self.assertIs(pool.acquire(), first)
+        self.assertEqual(len(self.connections), 2)
+
+    def test_waiter_gets_released_connection(self):
+        pool = ConnectionPool(self.connect, max_size=1, timeout=5)
+        connection = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiter.start()
+        while not pool.stats()['waiting']:
+            pass
+
+        pool.release(connection)
+        waiter.join(5)
+        self.assertEqual(acquired, [connection])
+
+    def test_failed_connect_frees_the_slot(self):
+        pool = ConnectionPool(lambda: 1 / 0, max_size=1, timeout=0)
+        with self.assertRaises(ZeroDivisionError):
+            pool.acquire()
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_idle_connection_is_checked(self):
+        pool = self.make_pool(check_after=30)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        # recently used connections are handed out without a ping
+        connection.alive = False
+        self.now += 10
+        self.assertIs(pool.acquire(), connection)
+        pool.release(connection)
+
+        self.now += 31
+        fresh = pool.acquire()
+        self.assertIsNot(fresh, connection)
+        self.assertTrue(connection.closed)
+        stats = pool.stats()
+        self.assertEqual((stats['failed_checks'], stats['closes'], stats['size']), (1, 1, 1))
+
+    def test_idle_and_old_connections_are_reaped(self):
+        pool = self.make_pool(max_idle=60, max_lifetime=600)
+        busy, quiet = pool.acquire(), pool.acquire()
+        pool.release(quiet)
+        pool.release(busy)
+
+        # the most recently used connection is handed out first, the other one idles
+        for _ in range(3):
+            self.now += 40
+            self.assertIs(pool.acquire(), busy)
+            pool.release(busy)
+        self.assertTrue(quiet.closed)
+        self.assertEqual(pool.stats()['size'], 1)
+
+        # however busy, a connection is closed once it is max_lifetime old
+        self.assertIs(pool.acquire(), busy)
+        self.now = 1000 + 601
+        pool.release(busy)
+        self.assertTrue(busy.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_discard(self):
+        pool = self.make_pool()
+        connection = pool.acquire()
+        pool.discard(connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+        self.assertIsNot(pool.acquire(), connection)
+
+    @patch.dict(dbpool._pools)
+    def test_one_pool_per_alias(self):
+        pool = get_pool('pool_test', self.connect)
+        self.assertIs(get_pool('pool_test', self.connect), pool)
+
+        # a forked worker starts a pool of its own
+        with patch('LearningMgtSystem.dbpool.os.getpid', return_value=pool.pid + 1):
+            self.assertIsNot(get_pool('pool_test', self.connect), pool)
+
+    @patch.dict(dbpool._pools)
+    def test_new_params_replace_the_pool(self):
+        pool = get_pool('pool_test', self.connect, params={'host': 'db1'})
+        self.assertIs(get_pool('pool_test', self.connect, params={'host': 'db1'}), pool)
+        idle, busy = pool.acquire(), pool.acquire()
+        pool.release(idle)
+
+        # connections made with the old params are closed, not handed out
+        replaced = get_pool('pool_test', self.connect, params={'host': 'db2'})
+        self.assertIsNot(replaced, pool)
+        self.assertTrue(idle.closed)
+        pool.release(busy)
+        self.assertTrue(busy.closed)
+        self.assertEqual(pool.stats()['size'], 0)
+        self.assertNotIn(replaced.acquire(), (idle, busy))
+
+
+@skipUnless(importlib.util.find_spec('MySQLdb'), 'needs mysqlclient')
+class PooledMySQLBackendTest(SimpleTestCase):
+    @patch.dict(dbpool._pools)
+    def test_requests_share_connections(self):
+        from django.db.backends.mysql import base as mysql_base
+        from .mysql_pool.base import DatabaseWrapper
+
+        settings_dict = {
+            **connections['default'].settings_dict,
+            'ENGINE': 'LearningMgtSystem.mysql_pool', 'NAME': 'lms', 'OPTIONS': {}, 'POOL': {'MAX_SIZE': 2},
+        }
+        with patch.object(mysql_base.Database, 'connect', side_effect=FakeMySQLConnection) as connect:
+            wrapper = DatabaseWrapper(settings_dict, alias='pooled')
+            # one "request" after another: Django connects, queries and closes
+            for _ in range(5):
+                with wrapper.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                wrapper.close()
+            self.assertEqual(connect.call_count, 1)
+            self.assertEqual(dbpool.get_pool_stats()['pooled']['checkouts'], 5)
+
+            # a connection closed mid-transaction isn't handed to anyone else
+            wrapper.ensure_connection()
+            connection = wrapper.connection
+            wrapper.in_atomic_block = True
+            wrapper.close()
+            self.assertTrue(connection.closed)
+            self.assertEqual(dbpool.get_pool_stats()['pooled']['size'], 0)
+
+
+class DatabasePoolStatsTest(APITestCase):
+    @patch.dict(dbpool._pools)
+    def test_admin_only(self):
+        get_pool('pool_test', FakeConnection).acquire()
+
+        client = APIClient()
+        user = User.objects.create_user(first_name='sample', last_name='user', email='user@mail.com', password='user_Password')
+        client.force_authenticate(user=user)
+        self.assertEqual(client.get(reverse('db_pool_stats')).status_code, 403)
+
+        admin = User.objects.create_superuser(
+            first_name='Sample', last_name='Superuser', email='superuser@mail.com', password='superuser_Password'
+        )
+        client.force_authenticate(user=admin)
+        response = client.get(reverse('db_pool_stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['pool_test']['in_use'], 1)
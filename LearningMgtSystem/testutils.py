@@ -0,0 +1,64 @@
+"""
+Seed helpers shared by the apps' tests: a user with the profile of its role,
+and the Instructor or Student row on top of it. Emails default to
+<last_name>@mail.com and passwords to <role>_Password. make_many seeds
+numbered users in bulk for tests that need volume.
+"""
+import os
+
+from django.contrib.auth import get_user_model
+
+from accounts.models import UserProfile
+from instructors.models import Instructor
+from students.models import Student
+
+
+ROLE_MODELS = {'instructor': Instructor, 'student': Student}
+
+# LARGE_TESTS=1 runs the tests that seed 100,000 rows (about a minute)
+LARGE_TESTS = os.getenv('LARGE_TESTS', 'False').lower() in ('1', 'true', 'yes')
+
+
+def make_user(last_name, role=None, email=None, password=None, first_name='sample', date_joined=None):
+    User = get_user_model()
+    user = User.objects.create_user(
+        first_name=first_name,
+        last_name=last_name,
+        email=email or f'{last_name}@mail.com',
+        password=password or f'{role or "user"}_Password'
+    )
+    if date_joined is not None:
+        # create_user takes no other fields
+        User.objects.filter(pk=user.pk).update(date_joined=date_joined)
+        user.date_joined = date_joined
+    if role is not None:
+        UserProfile.objects.create(user=user, role=role)
+    return user
+
+def make_instructor(last_name='instructor', status='activated', **user_fields):
+    return Instructor.objects.create(user=make_user(last_name, 'instructor', **user_fields), status=status)
+
+def make_student(last_name='student', status='activated', **user_fields):
+    return Student.objects.create(user=make_user(last_name, 'student', **user_fields), status=status)
+
+def make_many(role, start, stop):
+    """
+    Users seed_<role>_<start>@mail.com .. seed_<role>_<stop - 1>@mail.com with
+    their profiles and role rows, in bulk and without usable passwords.
+    Returns the role rows in creation order.
+    """
+    User = get_user_model()
+    prefix = f'seed_{role}_'
+    User.objects.bulk_create([
+        User(first_name='seed', last_name=f'{role}{i}', email=f'{prefix}{i}@mail.com', password='!')
+        for i in range(start, stop)
+    ], batch_size=1000)
+
+    # MySQL's bulk_create doesn't return pks, read them back in insert order
+    user_ids = list(
+        User.objects.filter(email__startswith=prefix).order_by('id').values_list('id', flat=True)[start:stop]
+    )
+    UserProfile.objects.bulk_create([UserProfile(user_id=user_id, role=role) for user_id in user_ids], batch_size=1000)
+    model = ROLE_MODELS[role]
+    model.objects.bulk_create([model(user_id=user_id, status='activated') for user_id in user_ids], batch_size=1000)
+    return list(model.objects.filter(user_id__in=user_ids).order_by('pk'))
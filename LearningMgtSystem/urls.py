@@ -29,6 +29,12 @@ from drf_spectacular.views import (
 from django.conf import settings
 from django.conf.urls.static import static
 
+from enrolments.urls import async_urlpatterns as enrolment_async_urls
+from students.urls import async_urlpatterns as student_async_urls
+from instructors.urls import async_urlpatterns as instructor_async_urls
+
+from .views import DatabasePoolStatsAPIView
+
 
 BASE_URL = 'api'
 
@@ -37,8 +43,17 @@ urlpatterns = [
     path(f'{BASE_URL}/', include('enrolments.urls')),
     path(f'{BASE_URL}/students/', include('students.urls')),
     path(f'{BASE_URL}/instructors/', include('instructors.urls')),
+    path(f'{BASE_URL}/reports/', include('reports.urls')),
     path(f'{BASE_URL}/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path(f'{BASE_URL}/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path(f'{BASE_URL}/db-pool/', DatabasePoolStatsAPIView.as_view(), name='db_pool_stats'),
+]
+
+# native async read endpoints, served without a thread per request under ASGI
+urlpatterns += [
+    path(f'{BASE_URL}/async/', include(enrolment_async_urls)),
+    path(f'{BASE_URL}/async/students/', include(student_async_urls)),
+    path(f'{BASE_URL}/async/instructors/', include(instructor_async_urls)),
 ]
 
 # route for CKEditor
@@ -0,0 +1,16 @@
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from accounts.authentication import CachedJWTAuthentication
+
+from .dbpool import get_pool_stats
+
+
+class DatabasePoolStatsAPIView(APIView):
+    """Connection pool metrics of the worker process that answers the request."""
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_pool_stats())
@@ -1,20 +1,72 @@
-from django.contrib import admin
+import os
+import re
+import shutil
+import uuid
+
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth import get_user_model
+from django.http import FileResponse, Http404
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+from LearningMgtSystem.background import run_in_background
 
+from .importers import import_users
 from .models import UserProfile
 
 
 User = get_user_model()
 
+# users-<timestamp>-<random hex>, as import_view names uploads
+IMPORT_NAME = re.compile(r'users-\d{8}-\d{6}-[0-9a-f]{32}')
+
 class ProfileInline(admin.StackedInline):
         model = UserProfile
         can_delete = False  # Prevents deletion of the Profile when deleting the User
         verbose_name_plural = 'profile'
         fk_name = 'user' # Specifies the foreign key field in Profile that links to User
 
+class UserImportForm(forms.Form):
+    file = forms.FileField(help_text='CSV with a header row, or JSON Lines (.jsonl)')
+    role = forms.ChoiceField(
+        choices=[('', 'From the file'), ('student', 'Student'), ('instructor', 'Instructor')],
+        required=False,
+        help_text='Role for rows without one'
+    )
+
+def get_import_directory():
+    return os.path.join(settings.REPORTS_ROOT, 'imports')
+
+def get_import_reports(limit=10):
+    # names of the latest error reports, newest first
+    try:
+        files = os.listdir(get_import_directory())
+    except FileNotFoundError:
+        return []
+    names = [name[:-len('-errors.csv')] for name in files if name.endswith('-errors.csv')]
+    return sorted((name for name in names if IMPORT_NAME.fullmatch(name)), reverse=True)[:limit]
+
+def run_upload_import(path, fmt, role, report_path):
+    try:
+        with open(path, encoding='utf-8-sig', newline='') as f, open(report_path, 'w', newline='') as report:
+            import_users(
+                f, fmt,
+                default_role=role or None,
+                workers=getattr(settings, 'USER_IMPORT_WORKERS', os.cpu_count() or 1),
+                report=report,
+            )
+    finally:
+        # the upload holds plaintext passwords, never leave it behind
+        os.remove(path)
+
 class CustomUserAdmin(UserAdmin):
     inlines = (ProfileInline,)
+    change_list_template = 'admin/accounts/customuser/change_list.html'
 
     list_display = ['first_name', 'last_name', 'email', 'get_role', 'is_staff']
     ordering = ("last_name",)
@@ -36,5 +88,67 @@ class CustomUserAdmin(UserAdmin):
         return obj.profile.role if hasattr(obj, 'profile') else "-"
     get_role.short_description = 'Role'
 
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='accounts_user_import'),
+            path(
+                'import/<str:name>/report/',
+                self.admin_site.admin_view(self.import_report_view),
+                name='accounts_user_import_report'
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:accounts_customuser_changelist')
+
+        form = UserImportForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            upload = form.cleaned_data['file']
+            fmt = 'jsonl' if upload.name.endswith(('.jsonl', '.ndjson')) else 'csv'
+
+            # the upload is gone once the request ends, keep a copy for the job
+            # random suffix: imports started in the same second get their own files
+            directory = get_import_directory()
+            os.makedirs(directory, exist_ok=True)
+            name = f"users-{timezone.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex}"
+            path = os.path.join(directory, f'{name}.{fmt}')
+            with open(path, 'wb') as f:
+                shutil.copyfileobj(upload, f)
+            report_path = os.path.join(directory, f'{name}-errors.csv')
+
+            run_in_background(run_upload_import, path, fmt, form.cleaned_data['role'], report_path)
+            self.message_user(
+                request,
+                format_html(
+                    'Import started. Rows that fail are listed in <a href="{}">its error report</a>.',
+                    reverse('admin:accounts_user_import_report', args=[name])
+                ),
+                messages.SUCCESS
+            )
+            return redirect('admin:accounts_customuser_changelist')
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'form': form,
+            'reports': get_import_reports(),
+            'title': 'Import users',
+        }
+        return TemplateResponse(request, 'admin/accounts/customuser/import_users.html', context)
+
+    def import_report_view(self, request, name):
+        # the same people who can import can read what failed
+        if not self.has_add_permission(request):
+            return redirect('admin:accounts_customuser_changelist')
+        if not IMPORT_NAME.fullmatch(name):
+            raise Http404
+        try:
+            report = open(os.path.join(get_import_directory(), f'{name}-errors.csv'), 'rb')
+        except FileNotFoundError:
+            raise Http404
+        return FileResponse(report, as_attachment=True, filename=f'{name}-errors.csv', content_type='text/csv')
+
 
 admin.site.register(User, CustomUserAdmin)
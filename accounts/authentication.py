@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+User = get_user_model()
+
+USER_CACHE_KEY = 'auth-user:{user_id}'
+
+# relations used by permissions and serializers on most requests
+PRINCIPAL_RELATED = ['profile', 'student', 'instructor', 'instructor__course']
+
+
+def get_user_cache_timeout():
+    return getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+
+def load_principal(user_id):
+    # user, profile, role object and instructor's course in one joined query
+    return User.objects.select_related(*PRINCIPAL_RELATED).get(**{api_settings.USER_ID_FIELD: user_id})
+
+async def aload_principal(user_id):
+    return await User.objects.select_related(*PRINCIPAL_RELATED).aget(**{api_settings.USER_ID_FIELD: user_id})
+
+def invalidate_cached_user(user_id):
+    cache.delete(USER_CACHE_KEY.format(user_id=user_id))
+
+def invalidate_cached_users(user_ids):
+    cache.delete_many([USER_CACHE_KEY.format(user_id=user_id) for user_id in user_ids])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the whole principal graph with one joined
+    query and caches it per user id, so a cache hit costs no queries at all.
+    """
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+
+        key = USER_CACHE_KEY.format(user_id=user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = load_principal(user_id)
+            except User.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            cache.set(key, user, timeout=get_user_cache_timeout())
+
+        return self.check_user(user, validated_token)
+
+    async def aauthenticate(self, request):
+        # authenticate() for async views, on a plain HttpRequest
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+
+        key = USER_CACHE_KEY.format(user_id=user_id)
+        user = await cache.aget(key)
+        if user is None:
+            try:
+                user = await aload_principal(user_id)
+            except User.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            await cache.aset(key, user, timeout=get_user_cache_timeout())
+
+        return self.check_user(user, validated_token)
+
+    def check_user(self, user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import get_hasher, identify_hasher
+from django.core.cache import cache
+from django.utils.crypto import salted_hmac
+
+
+User = get_user_model()
+
+CREDENTIAL_CACHE_KEY = 'auth-credential:{digest}'
+
+
+def get_credential_cache_timeout():
+    return getattr(settings, 'CREDENTIAL_CACHE_TIMEOUT', 300)
+
+def get_credential_key(user, password):
+    """
+    Cache key for a verified (user, password) pair. The stored hash is part
+    of the HMAC, so changing the password orphans every key made for it, and
+    the key reveals nothing about the password without SECRET_KEY.
+    """
+    digest = salted_hmac(
+        'accounts.backends.credential', f'{user.pk}:{user.password}:{password}', algorithm='sha256'
+    ).hexdigest()
+    return CREDENTIAL_CACHE_KEY.format(digest=digest)
+
+def must_upgrade(encoded):
+    # the same test check_password uses before it rehashes on login
+    preferred = get_hasher('default')
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return True
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+class CachedCredentialsBackend(ModelBackend):
+    """
+    ModelBackend that remembers successful password checks for
+    CREDENTIAL_CACHE_TIMEOUT seconds, so repeated logins from the same
+    client skip the key derivation. Failed checks are never cached, and
+    hashes that need an upgrade always go through check_password, which
+    rehashes them with the preferred hasher.
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # hash anyway, so unknown users take as long as wrong passwords
+            User().set_password(password)
+            return None
+
+        if not self.user_can_authenticate(user):
+            return None
+
+        timeout = get_credential_cache_timeout()
+        if timeout and cache.get(get_credential_key(user, password)) and not must_upgrade(user.password):
+            return user
+
+        if user.check_password(password):
+            if timeout:
+                # keyed by the hash as stored after a possible upgrade
+                cache.set(get_credential_key(user, password), True, timeout)
+            return user
+        return None
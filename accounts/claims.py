@@ -0,0 +1,81 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+# claim holding the time the role claims were read from the database
+CLAIMS_ISSUED_AT = 'role_claims_at'
+
+REVOKED_KEY = 'role-claims-revoked:{user_id}'
+
+
+def get_claims_freshness():
+    # how long role claims in a token can be trusted without a lookup
+    return getattr(settings, 'ROLE_CLAIMS_FRESHNESS', timedelta(minutes=5))
+
+def claims_can_be_trusted():
+    """
+    Revocation markers have to reach every worker. With a per-process cache
+    a deactivation seen by one worker is invisible to the others, so claims
+    are only trusted with a shared cache, or when ROLE_CLAIMS_SINGLE_PROCESS
+    says the app runs in one process.
+    """
+    if getattr(settings, 'ROLE_CLAIMS_SINGLE_PROCESS', False):
+        return True
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+def build_role_claims(user):
+    # role, status and role-object ids embedded in the token at login
+    claims = {
+        'is_staff': user.is_staff,
+        'role': None,
+        'status': None,
+        'student_id': None,
+        'instructor_id': None,
+        CLAIMS_ISSUED_AT: time.time(),
+    }
+
+    if hasattr(user, 'profile'):
+        claims['role'] = user.profile.role
+        role_object = getattr(user, user.profile.role, None)
+        if role_object is not None:
+            claims['status'] = role_object.status
+            claims[f'{user.profile.role}_id'] = role_object.pk
+
+    return claims
+
+def revoke_role_claims(user_id):
+    # claims issued up to now must not be trusted until they go stale
+    timeout = int(get_claims_freshness().total_seconds()) + 1
+    cache.set(REVOKED_KEY.format(user_id=user_id), time.time(), timeout=timeout)
+
+def revoke_role_claims_many(user_ids):
+    timeout = int(get_claims_freshness().total_seconds()) + 1
+    now = time.time()
+    cache.set_many({REVOKED_KEY.format(user_id=user_id): now for user_id in user_ids}, timeout=timeout)
+
+def get_trusted_claims(request):
+    """
+    Return the role claims of the request's access token when they can be
+    trusted (fresh and not revoked), otherwise None so the caller falls
+    back to the database.
+    """
+    token = request.auth
+    if token is None or not hasattr(token, 'payload') or CLAIMS_ISSUED_AT not in token.payload:
+        return None
+    if not claims_can_be_trusted():
+        return None
+
+    issued_at = token[CLAIMS_ISSUED_AT]
+    if time.time() - issued_at > get_claims_freshness().total_seconds():
+        return None
+
+    revoked_at = cache.get(REVOKED_KEY.format(user_id=request.user.pk))
+    if revoked_at is not None and revoked_at >= issued_at:
+        return None
+
+    return token.payload
@@ -0,0 +1,9 @@
+import django_filters
+
+
+# selects students or instructors for bulk status changes
+class RoleStatusFilter(django_filters.FilterSet):
+    status = django_filters.ChoiceFilter(choices=[('activated', 'Activated'), ('deactivated', 'Deactivated')])
+    registered_before = django_filters.IsoDateTimeFilter(field_name='user__date_joined', lookup_expr='lt')
+    registered_after = django_filters.IsoDateTimeFilter(field_name='user__date_joined', lookup_expr='gte')
+    email_domain = django_filters.CharFilter(field_name='user__email', lookup_expr='iendswith')
@@ -0,0 +1,14 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2-SHA256 hasher with the work factor taken from the
+    PASSWORD_HASH_ITERATIONS setting. Hashes keep the pbkdf2_sha256 format,
+    so existing ones still verify, and a stored hash with a different
+    iteration count is rehashed on the user's next successful login.
+    """
+    @property
+    def iterations(self):
+        return getattr(settings, 'PASSWORD_HASH_ITERATIONS', None) or hashers.PBKDF2PasswordHasher.iterations
@@ -0,0 +1,209 @@
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+
+from .models import UserProfile
+from .services import ROLE_MODELS
+
+
+User = get_user_model()
+
+STATUS_CHOICES = ('activated', 'deactivated')
+
+REPORT_FIELDS = ['line', 'email', 'error']
+
+
+def read_rows(fileobj, fmt):
+    """Yield (line number, row dict) from a CSV or JSON Lines text stream."""
+    if fmt == 'csv':
+        reader = csv.DictReader(fileobj)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(fileobj, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = {'_error': 'Invalid JSON.'}
+        if not isinstance(row, dict):
+            row = {'_error': 'Each line must be a JSON object.'}
+        yield line_number, row
+
+def read_report_lines(fileobj):
+    # line numbers listed in an earlier error report
+    return {int(row['line']) for row in csv.DictReader(fileobj)}
+
+def clean_row(row, default_role):
+    # normalised row, or raises ValidationError with the reason
+    if '_error' in row:
+        raise ValidationError(row['_error'])
+
+    cleaned = {
+        'email': User.objects.normalize_email((row.get('email') or '').strip()),
+        'first_name': (row.get('first_name') or '').strip(),
+        'last_name': (row.get('last_name') or '').strip(),
+        'password': row.get('password') or None,
+        'role': (row.get('role') or default_role or '').strip().lower(),
+        'status': (row.get('status') or 'activated').strip().lower(),
+        'bio': row.get('bio') or None,
+    }
+
+    for field in ('email', 'first_name', 'last_name'):
+        if not cleaned[field]:
+            raise ValidationError(f'{field} is required.')
+    validate_email(cleaned['email'])
+    if cleaned['role'] not in ROLE_MODELS:
+        raise ValidationError(f"role must be one of {', '.join(ROLE_MODELS)}.")
+    if cleaned['status'] not in STATUS_CHOICES:
+        raise ValidationError(f"status must be one of {', '.join(STATUS_CHOICES)}.")
+    return cleaned
+
+def get_hasher_pool(workers):
+    """
+    Process pool for password hashing, or None to hash in this process.
+    Spawned rather than forked, as the caller may be a threaded web process;
+    each worker only needs settings loaded (from DJANGO_SETTINGS_MODULE).
+    """
+    if workers <= 1:
+        return None
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=django.setup
+    )
+
+
+class UserImporter:
+    """
+    Create users with their profile and student/instructor rows in chunks:
+    passwords of a chunk are hashed across the process pool, then the chunk
+    is written with bulk_create in one transaction.
+
+    Re-running the same file is safe: emails that already exist are skipped,
+    so an interrupted import resumes where it stopped.
+    """
+    def __init__(self, default_role=None, chunk_size=1000, workers=None, report=None, only_lines=None):
+        self.default_role = default_role
+        self.chunk_size = chunk_size
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.only_lines = only_lines
+        self.report = csv.DictWriter(report, fieldnames=REPORT_FIELDS) if report is not None else None
+        if self.report is not None:
+            self.report.writeheader()
+
+        self.result = {'created': 0, 'skipped': 0, 'errors': 0}
+
+    def add_error(self, line, email, error):
+        self.result['errors'] += 1
+        if self.report is not None:
+            self.report.writerow({'line': line, 'email': email, 'error': error})
+
+    def run(self, rows):
+        pool = get_hasher_pool(self.workers)
+        try:
+            chunk = []
+            seen = set()
+            for line, row in rows:
+                if self.only_lines is not None and line not in self.only_lines:
+                    continue
+                try:
+                    cleaned = clean_row(row, self.default_role)
+                except ValidationError as e:
+                    self.add_error(line, row.get('email', ''), ' '.join(e.messages))
+                    continue
+
+                if cleaned['email'] in seen:
+                    self.add_error(line, cleaned['email'], 'Duplicate email in file.')
+                    continue
+                seen.add(cleaned['email'])
+
+                chunk.append((line, cleaned))
+                if len(chunk) >= self.chunk_size:
+                    self.import_chunk(chunk, pool)
+                    chunk = []
+
+            if chunk:
+                self.import_chunk(chunk, pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        return self.result
+
+    def hash_passwords(self, passwords, pool):
+        # None gives an unusable password, as for users created without one
+        if pool is None:
+            return [make_password(password) for password in passwords]
+        chunksize = max(len(passwords) // (self.workers * 4), 1)
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+    def import_chunk(self, chunk, pool):
+        emails = [cleaned['email'] for _, cleaned in chunk]
+        existing = set(User.objects.filter(email__in=emails).values_list('email', flat=True))
+
+        new_rows = []
+        for line, cleaned in chunk:
+            if cleaned['email'] in existing:
+                self.result['skipped'] += 1
+            else:
+                new_rows.append((line, cleaned))
+        if not new_rows:
+            return
+
+        hashes = self.hash_passwords([cleaned['password'] for _, cleaned in new_rows], pool)
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create([
+                    User(
+                        email=cleaned['email'],
+                        first_name=cleaned['first_name'],
+                        last_name=cleaned['last_name'],
+                        password=password,
+                    )
+                    for (_, cleaned), password in zip(new_rows, hashes)
+                ], batch_size=self.chunk_size)
+
+                # MySQL doesn't return primary keys from bulk_create
+                user_ids = dict(
+                    User.objects.filter(email__in=[cleaned['email'] for _, cleaned in new_rows])
+                    .values_list('email', 'id')
+                )
+
+                UserProfile.objects.bulk_create([
+                    UserProfile(user_id=user_ids[cleaned['email']], role=cleaned['role'], bio=cleaned['bio'])
+                    for _, cleaned in new_rows
+                ], batch_size=self.chunk_size)
+
+                for role, model in ROLE_MODELS.items():
+                    model.objects.bulk_create([
+                        model(user_id=user_ids[cleaned['email']], status=cleaned['status'])
+                        for _, cleaned in new_rows if cleaned['role'] == role
+                    ], batch_size=self.chunk_size)
+        except IntegrityError as e:
+            # e.g. an email registered while the chunk was hashed; rerun to retry
+            for line, cleaned in new_rows:
+                self.add_error(line, cleaned['email'], f'Chunk not imported: {e}')
+            return
+
+        self.result['created'] += len(new_rows)
+
+
+def import_users(fileobj, fmt, **options):
+    """Import users from a CSV or JSON Lines stream, see UserImporter."""
+    if isinstance(fileobj, (io.RawIOBase, io.BufferedIOBase)):
+        fileobj = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    return UserImporter(**options).run(read_rows(fileobj, fmt))
@@ -0,0 +1,50 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.importers import import_users, read_report_lines
+
+
+class Command(BaseCommand):
+    help = 'Create users, profiles and student/instructor rows from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or JSON Lines file')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--role', choices=['student', 'instructor'], help='Role for rows without one')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Users per transaction')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Password hashing processes')
+        parser.add_argument('--report', help='Write failed rows (line, email, error) to this CSV file')
+        parser.add_argument('--lines-from', help='Only import the lines listed in an earlier report')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+
+        only_lines = None
+        if options['lines_from']:
+            with open(options['lines_from'], newline='') as f:
+                only_lines = read_report_lines(f)
+
+        report = open(options['report'], 'w', newline='') if options['report'] else None
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                result = import_users(
+                    f, fmt,
+                    default_role=options['role'],
+                    chunk_size=options['chunk_size'],
+                    workers=options['workers'],
+                    report=report,
+                    only_lines=only_lines,
+                )
+        except OSError as e:
+            raise CommandError(e)
+        finally:
+            if report is not None:
+                report.close()
+
+        self.stdout.write(
+            f"Created {result['created']} users, skipped {result['skipped']} existing, {result['errors']} errors."
+        )
+        if result['errors'] and options['report']:
+            self.stdout.write(f"Failed rows written to {options['report']}; rerun with --lines-from to retry them.")
@@ -1,12 +1,35 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from LearningMgtSystem.fieldsets import SparseFieldsMixin
+
+from .claims import build_role_claims
+from .filters import RoleStatusFilter
 from .models import UserProfile
 
 
 User = get_user_model()
 
+EMAIL_TAKEN_MESSAGE = 'A user with this email already exists.'
+
+# mixin to declare the relations a serializer needs loaded up front
+class EagerLoadingMixin:
+    # relations to join in the same query (select_related)
+    select_related_fields = []
+    # relations to load in one extra query each (prefetch_related)
+    prefetch_related_fields = []
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        # apply the declared plan so nested rows don't trigger a query per row
+        if cls.select_related_fields:
+            queryset = queryset.select_related(*cls.select_related_fields)
+        if cls.prefetch_related_fields:
+            queryset = queryset.prefetch_related(*cls.prefetch_related_fields)
+        return queryset
+
 # serializer for user profile
-class UserProfileSerializer(serializers.ModelSerializer):
+class UserProfileSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     # set role as read-only
     role = serializers.CharField(read_only=True)
 
@@ -15,17 +38,21 @@ class UserProfileSerializer(serializers.ModelSerializer):
         fields = ['bio', 'avatar', 'role']
 
 # serializer for user
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer):
     # include the serializer for user profile
     profile = UserProfileSerializer()
 
+    select_related_fields = ['profile']
+
     class Meta:
         model = User
         fields = ['id', 'first_name', 'last_name', 'email', 'password', 'profile']
 
-        # set password as write only
+        # set password as write only; email uniqueness is left to the
+        # database constraint (see accounts.services.register_user)
         extra_kwargs = {
             'password': {'write_only': True},
+            'email': {'validators': []},
         }
 
     def create(self, validated_data):
@@ -51,4 +78,41 @@ class UserSerializer(serializers.ModelSerializer):
         
         # create the profile for user
         UserProfile.objects.create(user=user, role=role, **profile_data)
-        return user
\ No newline at end of file
+        return user
+
+# token serializer that embeds the user's role and status
+class RoleTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+
+        # signed claims let permission checks skip the profile/role lookups
+        for claim, value in build_role_claims(user).items():
+            token[claim] = value
+
+        return token
+
+
+# students or instructors picked by id or by filters, for bulk status changes
+class BulkStatusSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False, max_length=10000)
+    filters = serializers.DictField(required=False, allow_empty=False)
+
+    def validate(self, attrs):
+        if ('ids' in attrs) == ('filters' in attrs):
+            raise serializers.ValidationError('Provide either ids or filters.')
+
+        if 'filters' in attrs:
+            unknown = set(attrs['filters']) - set(RoleStatusFilter.base_filters)
+            if unknown:
+                raise serializers.ValidationError({'filters': [f"Unknown filter: {', '.join(sorted(unknown))}."]})
+            filterset = RoleStatusFilter(data=attrs['filters'], queryset=self.context['queryset'])
+            if not filterset.is_valid():
+                raise serializers.ValidationError({'filters': filterset.errors})
+            # blank values filter nothing, they would select every row
+            if all(value in (None, '') for value in filterset.form.cleaned_data.values()):
+                raise serializers.ValidationError({'filters': ['Provide at least one non-empty filter.']})
+            attrs['queryset'] = filterset.qs
+        else:
+            attrs['queryset'] = self.context['queryset'].filter(pk__in=attrs['ids'])
+        return attrs
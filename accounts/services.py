@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from instructors.models import Instructor
+from students.models import Student
+
+from .authentication import invalidate_cached_users
+from .claims import revoke_role_claims_many
+from .models import UserProfile
+
+
+User = get_user_model()
+
+ROLE_MODELS = {
+    'student': Student,
+    'instructor': Instructor,
+}
+
+
+class EmailTakenError(Exception):
+    pass
+
+
+def register_user(role, status, email, password, first_name, last_name, profile=None):
+    """
+    Create a user with their profile and student/instructor row in one
+    transaction, one INSERT each, and return the role object.
+
+    There's no lookup for the email beforehand: the unique constraint decides,
+    which also holds for two registrations racing each other. A taken email
+    rolls the whole registration back and raises EmailTakenError.
+    """
+    user = User(email=User.objects.normalize_email(email), first_name=first_name, last_name=last_name)
+    # hashed before the transaction opens, it's the slow part
+    user.set_password(password)
+
+    try:
+        with transaction.atomic():
+            user.save()
+            user.profile = UserProfile.objects.create(user=user, role=role, **(profile or {}))
+            return ROLE_MODELS[role].objects.create(user=user, status=status)
+    except IntegrityError:
+        # only the email is unique among the rows written here
+        if User.objects.filter(email=user.email).exists():
+            raise EmailTakenError(user.email)
+        raise
+
+def bulk_set_status(queryset, status, chunk_size=500):
+    """
+    Move every student or instructor in queryset to status with one UPDATE
+    per chunk, and return how many rows changed. The users' role claims and
+    cached principals are dropped after each chunk commits, as the single
+    saves do through post_save.
+    """
+    queryset = queryset.exclude(status=status).order_by('pk')
+    model = queryset.model
+    updated = 0
+
+    while True:
+        # rows already moved drop out of the filter, so this always reads the next chunk
+        rows = list(queryset.values_list('pk', 'user_id')[:chunk_size])
+        if not rows:
+            return updated
+
+        with transaction.atomic():
+            # queryset updates skip auto_now, so updated_at is set here
+            updated += model.objects.filter(pk__in=[pk for pk, _ in rows]).exclude(status=status).update(
+                status=status, updated_at=timezone.now()
+            )
+
+        user_ids = [user_id for _, user_id in rows]
+        revoke_role_claims_many(user_ids)
+        invalidate_cached_users(user_ids)
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from instructors.models import Instructor
+from students.models import Student
+
+from .authentication import invalidate_cached_user
+from .claims import revoke_role_claims
+
+
+# role and status changes must not be hidden behind claims in issued tokens
+# or behind the cached principal used by authentication
+@receiver(post_save, sender='accounts.UserProfile')
+@receiver(post_delete, sender='accounts.UserProfile')
+@receiver(post_save, sender='students.Student')
+@receiver(post_delete, sender='students.Student')
+@receiver(post_save, sender='instructors.Instructor')
+@receiver(post_delete, sender='instructors.Instructor')
+def revoke_claims_on_role_change(sender, instance, **kwargs):
+    revoke_role_claims(instance.user_id)
+    invalidate_cached_user(instance.user_id)
+
+# user fields issued tokens carry as claims or that gate access
+CLAIMED_USER_FIELDS = {'is_staff', 'is_superuser', 'is_active'}
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_user_on_change(sender, instance, update_fields=None, **kwargs):
+    # saves of other fields only (e.g. last_login at login) leave the claims alone
+    if update_fields is None or CLAIMED_USER_FIELDS & set(update_fields):
+        revoke_role_claims(instance.pk)
+    invalidate_cached_user(instance.pk)
+
+@receiver(post_save, sender='enrolments.Course')
+@receiver(post_delete, sender='enrolments.Course')
+def invalidate_instructor_on_course_change(sender, instance, **kwargs):
+    # the instructor's course is cached with the instructor's user
+    user_id = Instructor.objects.filter(pk=instance.instructor_id).values_list('user_id', flat=True).first()
+    if user_id is not None:
+        invalidate_cached_user(user_id)
+
+# user and profile fields the student and instructor endpoints render
+RENDERED_USER_FIELDS = {'first_name', 'last_name', 'email', 'bio', 'avatar', 'role'}
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_save, sender='accounts.UserProfile')
+def touch_role_objects_on_user_change(sender, instance, created=False, update_fields=None, **kwargs):
+    # new users and profiles have no student or instructor row yet (the admin
+    # adding a profile inline saves the user as well, which touches them)
+    if created:
+        return
+    # saves of other fields only (e.g. last_login at login) render the same
+    if update_fields is not None and not RENDERED_USER_FIELDS & set(update_fields):
+        return
+
+    # students and instructors render their user and profile, bump their version;
+    # through the base manager, as the catalog doesn't render them (no bulk_changed)
+    user_id = instance.user_id if hasattr(instance, 'user_id') else instance.pk
+    now = timezone.now()
+    Student._base_manager.filter(user_id=user_id).update(updated_at=now)
+    Instructor._base_manager.filter(user_id=user_id).update(updated_at=now)
@@ -1,8 +1,31 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.db import IntegrityError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
 from django.urls import reverse
+from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from instructors.models import Instructor
+from students.models import Student
+from LearningMgtSystem.testutils import make_student
 
+from .admin import run_upload_import
+from .authentication import USER_CACHE_KEY
+from .importers import import_users
 from .models import UserProfile
+from .services import register_user
 
 
 User = get_user_model()
@@ -67,3 +90,393 @@ class UserTest(TestCase):
 
     #     print(u.is_superuser, u.is_staff, u.is_active)
 
+
+# the test run is one process, so its local-memory cache reaches every request
+@override_settings(ROLE_CLAIMS_SINGLE_PROCESS=True)
+class RoleClaimsTest(APITestCase):
+    def setUp(self):
+        # revocation markers live in the cache
+        cache.clear()
+
+        self.student = make_student(email='sample_student@mail.com')
+        self.user = self.student.user
+
+        self.admin_user = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='SuperAdmin',
+            email='superadmin@mail.com',
+            password='superadmin_Password'
+        )
+
+    def get_token(self, email, password):
+        url = reverse('token_obtain_pair')
+        response = self.client.post(url, data={'email': email, 'password': password}, format='json')
+        return response.data['access']
+
+    def test_token_contains_role_claims(self):
+        token = AccessToken(self.get_token('sample_student@mail.com', 'student_Password'))
+
+        self.assertEqual(token['role'], 'student')
+        self.assertEqual(token['status'], 'activated')
+        self.assertEqual(token['student_id'], self.student.id)
+        self.assertIsNone(token['instructor_id'])
+        self.assertFalse(token['is_staff'])
+
+    def test_permission_skips_role_lookups(self):
+        token = self.get_token('sample_student@mail.com', 'student_Password')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        # the joined principal lookup plus the enrolment lookup, no profile/student queries
+        with self.assertNumQueries(2):
+            response = client.delete(reverse('enrolement_delete', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_deactivation_revokes_claims(self):
+        token = self.get_token('sample_student@mail.com', 'student_Password')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        admin_client = APIClient()
+        admin_token = self.get_token('superadmin@mail.com', 'superadmin_Password')
+        admin_client.credentials(HTTP_AUTHORIZATION=f'Bearer {admin_token}')
+        response = admin_client.put(reverse('student_deactivate', kwargs={'pk': self.student.pk}))
+        self.assertEqual(response.status_code, 200)
+
+        # the token still says activated, but the revocation forces a fresh check
+        response = client.delete(reverse('enrolement_delete', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, 403)
+
+    def test_stale_claims_fall_back_to_database(self):
+        token = self.get_token('sample_student@mail.com', 'student_Password')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        # deactivate behind the signals' back, only a database check can see it
+        Student.objects.filter(pk=self.student.pk).update(status='deactivated')
+        cache.clear()
+
+        response = client.delete(reverse('enrolement_delete', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, 404)
+
+        with override_settings(ROLE_CLAIMS_FRESHNESS=timedelta(seconds=0)):
+            response = client.delete(reverse('enrolement_delete', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, 403)
+
+    def test_demoting_staff_revokes_claims(self):
+        token = self.get_token('superadmin@mail.com', 'superadmin_Password')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(client.delete(reverse('enrolement_delete', kwargs={'pk': 999})).status_code, 404)
+
+        self.admin_user.is_staff = False
+        self.admin_user.save()
+
+        # the token still says is_staff
+        self.assertEqual(client.delete(reverse('enrolement_delete', kwargs={'pk': 999})).status_code, 403)
+
+    def test_claims_are_not_trusted_with_a_per_process_cache(self):
+        token = self.get_token('sample_student@mail.com', 'student_Password')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        # another worker deactivated the student, this worker's cache never heard of it
+        Student.objects.filter(pk=self.student.pk).update(status='deactivated')
+        cache.clear()
+
+        with override_settings(ROLE_CLAIMS_SINGLE_PROCESS=False):
+            response = client.delete(reverse('enrolement_delete', kwargs={'pk': 999}))
+        self.assertEqual(response.status_code, 403)
+
+class CachedAuthenticationTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.student = make_student(email='sample_student@mail.com')
+        self.user = self.student.user
+
+        url = reverse('token_obtain_pair')
+        response = self.client.post(url, data={'email': 'sample_student@mail.com', 'password': 'student_Password'}, format='json')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.data["access"]}')
+        self.url = reverse('student_detail', kwargs={'pk': self.student.pk})
+
+    def test_cache_hit_skips_auth_queries(self):
+        # miss: one joined principal query, then the student detail query
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+        # hit: only the student detail query
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+
+    def test_cached_principal_has_related_objects(self):
+        self.client.get(self.url)
+        user = cache.get(USER_CACHE_KEY.format(user_id=self.user.pk))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(user.profile.role, 'student')
+            self.assertEqual(user.student.status, 'activated')
+            self.assertFalse(hasattr(user, 'instructor'))
+
+    def test_status_change_invalidates_cache(self):
+        self.client.get(self.url)
+
+        self.student.status = 'deactivated'
+        self.student.save()
+        self.assertIsNone(cache.get(USER_CACHE_KEY.format(user_id=self.user.pk)))
+
+        # the next request reloads the principal and sees the new status
+        response = self.client.get(self.url)
+        user = cache.get(USER_CACHE_KEY.format(user_id=self.user.pk))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(user.student.status, 'deactivated')
+
+    def test_deleted_user_is_rejected(self):
+        self.client.get(self.url)
+        self.user.delete()
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+
+
+class RegistrationTest(APITestCase):
+    def get_data(self, email='new_user@mail.com'):
+        return {
+            'user': {
+                'first_name': 'sample',
+                'last_name': 'user',
+                'email': email,
+                'password': 'user_Password',
+                'profile': {'bio': 'This is a test', 'avatar': None}
+            },
+        }
+
+    def register(self, url_name, data):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse(url_name), data=data, format='json')
+        writes = [
+            query['sql'].split()[2].strip('"') for query in ctx.captured_queries
+            if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        return response, writes
+
+    def test_registration_writes_each_row_once(self):
+        response, writes = self.register('student_register', self.get_data())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(writes, ['accounts_customuser', 'accounts_userprofile', 'students_student'])
+        self.assertEqual(response.data['status'], 'activated')
+        self.assertEqual(response.data['user']['profile']['role'], 'student')
+
+        response, writes = self.register('instructor_register', self.get_data('new_instructor@mail.com'))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(writes, ['accounts_customuser', 'accounts_userprofile', 'instructors_instructor'])
+        self.assertEqual(response.data['status'], 'deactivated')
+
+        user = User.objects.get(email='new_instructor@mail.com')
+        self.assertTrue(user.check_password('user_Password'))
+        self.assertEqual(user.profile.role, 'instructor')
+
+    def test_duplicate_email(self):
+        self.register('student_register', self.get_data())
+        with self.assertNumQueries(5):
+            # savepoint, failed insert, rollback, email lookup, release
+            response, writes = self.register('instructor_register', self.get_data())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['user']['email'], ['A user with this email already exists.'])
+        self.assertEqual(UserProfile.objects.count(), 1)
+        self.assertFalse(Instructor.objects.exists())
+
+    def test_failed_registration_is_rolled_back(self):
+        with mock.patch.object(Student.objects, 'create', side_effect=IntegrityError('student')):
+            with self.assertRaises(IntegrityError):
+                register_user(
+                    role='student', status='activated', email='new_user@mail.com',
+                    password='user_Password', first_name='sample', last_name='user'
+                )
+        self.assertFalse(User.objects.filter(email='new_user@mail.com').exists())
+        self.assertFalse(UserProfile.objects.exists())
+
+
+@override_settings(
+    PASSWORD_HASHERS=['accounts.hashers.PBKDF2PasswordHasher', 'django.contrib.auth.hashers.MD5PasswordHasher'],
+    PASSWORD_HASH_ITERATIONS=1000,
+    CREDENTIAL_CACHE_TIMEOUT=300
+)
+class CredentialCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            first_name='sample',
+            last_name='student',
+            email='sample_student@mail.com',
+            password='student_Password'
+        )
+        self.url = reverse('token_obtain_pair')
+
+    def login(self, password='student_Password'):
+        return self.client.post(self.url, data={'email': self.user.email, 'password': password}, format='json')
+
+    def test_repeated_login_skips_hashing(self):
+        with mock.patch.object(User, 'check_password', autospec=True, side_effect=User.check_password) as check:
+            self.assertEqual(self.login().status_code, 200)
+            self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(check.call_count, 1)
+
+    def test_failed_logins_are_not_cached(self):
+        self.login()
+        with mock.patch.object(User, 'check_password', autospec=True, side_effect=User.check_password) as check:
+            self.assertEqual(self.login('wrong_Password').status_code, 401)
+            self.assertEqual(self.login('wrong_Password').status_code, 401)
+        self.assertEqual(check.call_count, 2)
+
+    def test_password_change_invalidates(self):
+        self.assertEqual(self.login().status_code, 200)
+        self.user.set_password('new_Password')
+        self.user.save()
+
+        self.assertEqual(self.login().status_code, 401)
+        self.assertEqual(self.login('new_Password').status_code, 200)
+
+    def test_inactive_user_is_rejected(self):
+        self.login()
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.login().status_code, 401)
+
+    def test_hashes_are_upgraded_on_login(self):
+        User.objects.filter(pk=self.user.pk).update(password=make_password('student_Password', hasher='md5'))
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+
+        # a cached check doesn't hold back an iteration change
+        with override_settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+
+
+class UserImportTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+
+    def write_csv(self, rows, name='users.csv'):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=['email', 'first_name', 'last_name', 'password', 'role'])
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def run_import(self, *args):
+        out = io.StringIO()
+        call_command('import_users', *args, '--workers', '1', stdout=out)
+        return out.getvalue()
+
+    def test_import_csv(self):
+        path = self.write_csv([
+            {'email': 'ada@mail.com', 'first_name': 'Ada', 'last_name': 'Lovelace', 'password': 'ada_Password', 'role': 'student'},
+            {'email': 'alan@mail.com', 'first_name': 'Alan', 'last_name': 'Turing', 'password': 'alan_Password', 'role': 'instructor'},
+            {'email': 'grace@mail.com', 'first_name': 'Grace', 'last_name': 'Hopper', 'password': '', 'role': 'student'},
+        ])
+        output = self.run_import(path, '--chunk-size', '2')
+        self.assertIn('Created 3 users', output)
+
+        ada = User.objects.get(email='ada@mail.com')
+        self.assertTrue(ada.check_password('ada_Password'))
+        self.assertEqual(ada.profile.role, 'student')
+        self.assertEqual(Student.objects.get(user=ada).status, 'activated')
+        self.assertTrue(Instructor.objects.filter(user__email='alan@mail.com').exists())
+        self.assertFalse(User.objects.get(email='grace@mail.com').has_usable_password())
+
+        # rerunning the same file skips everyone
+        self.assertIn('Created 0 users, skipped 3 existing', self.run_import(path))
+        self.assertEqual(User.objects.count(), 3)
+
+    def test_error_report_and_retry(self):
+        rows = [
+            {'email': 'ada@mail.com', 'first_name': 'Ada', 'last_name': 'Lovelace', 'password': 'pw', 'role': 'student'},
+            {'email': 'not-an-email', 'first_name': 'Bad', 'last_name': 'Email', 'password': 'pw', 'role': 'student'},
+            {'email': 'alan@mail.com', 'first_name': 'Alan', 'last_name': 'Turing', 'password': 'pw', 'role': 'admin'},
+            {'email': 'ada@mail.com', 'first_name': 'Ada', 'last_name': 'Again', 'password': 'pw', 'role': 'student'},
+        ]
+        path = self.write_csv(rows)
+        report = os.path.join(self.directory, 'errors.csv')
+        output = self.run_import(path, '--report', report)
+        self.assertIn('Created 1 users, skipped 0 existing, 3 errors', output)
+
+        with open(report, newline='') as f:
+            failed = list(csv.DictReader(f))
+        self.assertEqual([row['line'] for row in failed], ['3', '4', '5'])
+        self.assertNotIn('password', failed[0])
+        self.assertIn('role must be one of', failed[1]['error'])
+        self.assertEqual(failed[2]['error'], 'Duplicate email in file.')
+
+        # fix the file and retry only the failed lines
+        rows[1]['email'] = 'bad@mail.com'
+        rows[2]['role'] = 'instructor'
+        self.write_csv(rows)
+        output = self.run_import(path, '--lines-from', report)
+        self.assertIn('Created 2 users, skipped 1 existing', output)
+        self.assertEqual(User.objects.count(), 3)
+
+    def test_import_jsonl_with_process_pool(self):
+        lines = [
+            json.dumps({'email': f'user{i}@mail.com', 'first_name': 'User', 'last_name': str(i), 'password': f'pw{i}'})
+            for i in range(5)
+        ]
+        lines.insert(2, '{not json')
+        stream = io.StringIO('\n'.join(lines) + '\n')
+
+        result = import_users(stream, 'jsonl', default_role='student', chunk_size=2, workers=2)
+        self.assertEqual(result, {'created': 5, 'skipped': 0, 'errors': 1})
+        self.assertTrue(User.objects.get(email='user4@mail.com').check_password('pw4'))
+        self.assertEqual(Student.objects.count(), 5)
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True, USER_IMPORT_WORKERS=1)
+    def test_admin_upload(self):
+        admin_user = User.objects.create_superuser(
+            first_name='Sample', last_name='Superuser', email='superuser@mail.com', password='superuser_Password'
+        )
+        self.client.force_login(admin_user)
+        self.assertContains(self.client.get(reverse('admin:accounts_customuser_changelist')), 'Import users')
+
+        path = self.write_csv([
+            {'email': 'ada@mail.com', 'first_name': 'Ada', 'last_name': 'Lovelace', 'password': 'pw', 'role': 'student'},
+            {'email': 'bad', 'first_name': 'Bad', 'last_name': 'Email', 'password': 'pw', 'role': 'student'},
+        ])
+        # two imports in the same second keep their own upload and report
+        with override_settings(REPORTS_ROOT=self.directory):
+            for _ in range(2):
+                with open(path, 'rb') as f, self.captureOnCommitCallbacks(execute=True):
+                    response = self.client.post(reverse('admin:accounts_user_import'), {'file': f})
+                self.assertRedirects(response, reverse('admin:accounts_customuser_changelist'))
+
+            self.assertTrue(Student.objects.filter(user__email='ada@mail.com').exists())
+            reports = sorted(os.listdir(os.path.join(self.directory, 'imports')))
+            self.assertEqual(len(reports), 2)
+            self.assertTrue(all(name.endswith('-errors.csv') for name in reports))
+
+            # the reports are linked from the import page and downloaded through the admin
+            name = reports[0][:-len('-errors.csv')]
+            url = reverse('admin:accounts_user_import_report', args=[name])
+            self.assertContains(self.client.get(reverse('admin:accounts_user_import')), url)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            rows = csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode()))
+            self.assertEqual([row['email'] for row in rows], ['bad'])
+            response.close()
+
+            self.assertEqual(self.client.get(reverse('admin:accounts_user_import_report', args=['..'])).status_code, 404)
+            self.client.logout()
+            self.assertEqual(self.client.get(url).status_code, 302)
+
+    def test_failed_upload_import_removes_the_file(self):
+        path = self.write_csv([
+            {'email': 'ada@mail.com', 'first_name': 'Ada', 'last_name': 'Lovelace', 'password': 'pw', 'role': 'student'},
+        ])
+        with mock.patch('accounts.admin.import_users', side_effect=RuntimeError), self.assertRaises(RuntimeError):
+            run_upload_import(path, 'csv', '', os.path.join(self.directory, 'errors.csv'))
+        self.assertFalse(os.path.exists(path))
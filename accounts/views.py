@@ -1,3 +1,20 @@
-from django.shortcuts import render
+from rest_framework.response import Response
 
-# Create your views here.
+from .serializers import BulkStatusSerializer
+from .services import bulk_set_status
+
+
+def bulk_status_response(request, queryset, status):
+    """
+    Shared body of the bulk activate/deactivate endpoints: select rows of
+    queryset by ids or filters and move them to status.
+    """
+    serializer = BulkStatusSerializer(data=request.data, context={'queryset': queryset})
+    serializer.is_valid(raise_exception=True)
+
+    selected = serializer.validated_data['queryset']
+    matched = selected.count()
+    updated = bulk_set_status(selected, status)
+
+    label = queryset.model._meta.verbose_name_plural
+    return Response({'detail': f'{updated} {label} {status}.', 'matched': matched, 'updated': updated}, status=200)
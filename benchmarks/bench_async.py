@@ -0,0 +1,156 @@
+"""
+Benchmark sync DRF list views under ASGI against the native async ones.
+
+Drives the project's ASGI application in-process (no server, no sockets)
+with 500 concurrent requests, so the numbers compare request handling
+only: the sync views each hold a sync_to_async thread, the async views
+don't. Runs against a throwaway test database created from the settings.
+
+    DJANGO_SETTINGS_MODULE=LearningMgtSystem.settings python benchmarks/bench_async.py
+    python benchmarks/bench_async.py --concurrency 500 --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LearningMgtSystem.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.asgi import get_asgi_application  # noqa: E402
+from django.db import connection  # noqa: E402
+from rest_framework_simplejwt.tokens import AccessToken  # noqa: E402
+
+from enrolments.models import Course, Lesson  # noqa: E402
+from instructors.models import Instructor  # noqa: E402
+
+
+ENDPOINTS = [
+    # lessons rather than courses: the sync course list is served from the catalog cache
+    ('sync', '/api/lessons/'),
+    ('async', '/api/async/lessons/'),
+    ('sync', '/api/instructors/'),
+    ('async', '/api/async/instructors/'),
+]
+
+
+def seed(rows):
+    User = get_user_model()
+    User.objects.bulk_create([
+        User(first_name='bench', last_name=f'instructor{i}', email=f'bench{i}@mail.com', password='!')
+        for i in range(rows)
+    ], batch_size=1000)
+    users = User.objects.filter(email__startswith='bench').order_by('id')
+    Instructor.objects.bulk_create([Instructor(user=user, status='activated') for user in users], batch_size=1000)
+    Course.objects.bulk_create([
+        Course(title=f'Course {instructor.pk}', instructor=instructor, status='active')
+        for instructor in Instructor.objects.all()
+    ], batch_size=1000)
+    Lesson.objects.bulk_create([
+        Lesson(course=course, title=f'Lesson {course.pk}', content='<p>Intro</p>', order=1)
+        for course in Course.objects.all()
+    ], batch_size=1000)
+
+    admin = User.objects.create_superuser(first_name='bench', last_name='admin', email='bench_admin@mail.com', password='!')
+    return str(AccessToken.for_user(admin))
+
+async def request(app, path, token):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'https',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [
+            (b'host', settings.ALLOWED_HOSTS[0].encode()),
+            (b'authorization', f'Bearer {token}'.encode()),
+        ],
+        'client': ('127.0.0.1', 50000),
+        'server': ('127.0.0.1', 443),
+    }
+    received = False
+    never = asyncio.Event()
+    status = None
+
+    async def receive():
+        nonlocal received
+        if received:
+            # the client stays connected until the response is sent
+            await never.wait()
+        received = True
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+async def run(app, path, token, concurrency, total):
+    latencies = []
+    statuses = set()
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            statuses.add(await request(app, path, token))
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'rps': total / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p99': latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        'statuses': sorted(statuses),
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, default=500)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        token = seed(args.rows)
+        app = get_asgi_application()
+
+        print(f'{args.requests} requests, {args.concurrency} concurrent, {args.rows} rows')
+        print(f'{"mode":>6} | {"endpoint":<24} | {"req/s":>8} | {"p50 ms":>8} | {"p99 ms":>8} | status')
+        for mode, path in ENDPOINTS:
+            # warm up the authenticated user cache before timing
+            asyncio.run(run(app, path, token, 10, 10))
+            result = asyncio.run(run(app, path, token, args.concurrency, args.requests))
+            print(
+                f'{mode:>6} | {path:<24} | {result["rps"]:8.1f} | {result["p50"]:8.1f} | '
+                f'{result["p99"]:8.1f} | {result["statuses"]}'
+            )
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
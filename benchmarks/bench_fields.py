@@ -0,0 +1,89 @@
+"""
+Response size and time of the enrolment list with every field against
+?fields= / ?expand= selections. Requests go through the test client (no
+server), against a throwaway test database created from the settings.
+
+    DJANGO_SETTINGS_MODULE=LearningMgtSystem.settings python benchmarks/bench_fields.py
+    python benchmarks/bench_fields.py --rows 1000 --requests 500
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LearningMgtSystem.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from accounts.models import UserProfile  # noqa: E402
+from enrolments.models import Course, Enrolment  # noqa: E402
+from instructors.models import Instructor  # noqa: E402
+from students.models import Student  # noqa: E402
+
+
+SELECTIONS = [
+    '',
+    'expand=',
+    'fields=course,completed',
+    'fields=course,completed,student.user.email',
+]
+
+
+def seed(rows):
+    User = get_user_model()
+    admin = User.objects.create_superuser(first_name='bench', last_name='admin', email='admin@mail.com', password='!')
+    instructor = Instructor.objects.create(user=admin, status='activated')
+    course = Course.objects.create(title='Bench course', instructor=instructor, status='active')
+
+    User.objects.bulk_create([
+        User(first_name='bench', last_name=f'student{i}', email=f'bench{i}@mail.com', password='!')
+        for i in range(rows)
+    ], batch_size=1000)
+    user_ids = User.objects.filter(email__startswith='bench').values_list('id', flat=True)
+    UserProfile.objects.bulk_create([UserProfile(user_id=pk, role='student') for pk in user_ids], batch_size=1000)
+    Student.objects.bulk_create([Student(user_id=pk, status='activated') for pk in user_ids], batch_size=1000)
+    Enrolment.objects.bulk_create([
+        Enrolment(student_id=pk, course=course) for pk in Student.objects.values_list('id', flat=True)
+    ], batch_size=1000)
+    return admin
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        client = APIClient(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        client.force_authenticate(user=seed(args.rows))
+
+        print(f'{args.requests} requests of /api/enrolments/, {args.rows} rows')
+        print(f'{"selection":<44} | {"bytes":>6} | {"ms/req":>7} | {"SELECT columns":>14}')
+        for selection in SELECTIONS:
+            # keyset pages: no COUNT(*) in the timings
+            path = f'/api/enrolments/?pagination=keyset&{selection}'
+            with CaptureQueriesContext(connection) as queries:
+                response = client.get(path, secure=True)
+            columns = queries.captured_queries[-1]['sql'].split(' FROM ')[0].count(',') + 1
+
+            started = time.perf_counter()
+            for _ in range(args.requests):
+                client.get(path, secure=True)
+            elapsed = (time.perf_counter() - started) / args.requests
+            print(f'{selection or "(all fields)":<44} | {len(response.content):>6} | {elapsed * 1000:7.2f} | {columns:>14}')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark the token endpoint (POST /api/token/) under different password
+hashing setups, with and without the credential cache.
+
+Each configuration logs the same set of users in repeatedly through the
+test client, in-process, against a throwaway test database. The first
+round per user always pays the full hash; later rounds hit the credential
+cache when it is enabled, which is the "same device logs in again" case.
+
+    python benchmarks/bench_login.py
+    python benchmarks/bench_login.py --users 20 --rounds 5 --iterations 1000000 600000 260000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LearningMgtSystem.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.contrib.auth.hashers import make_password  # noqa: E402
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client, override_settings  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+
+PASSWORD = 'bench_Password'
+
+HASHERS = ['accounts.hashers.PBKDF2PasswordHasher']
+
+
+def seed(users):
+    User = get_user_model()
+    User.objects.bulk_create([
+        User(first_name='bench', last_name=f'user{i}', email=f'bench{i}@mail.com', password=make_password(PASSWORD))
+        for i in range(users)
+    ])
+    return list(User.objects.values_list('email', flat=True))
+
+def run(emails, rounds):
+    client = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+    url = reverse('token_obtain_pair')
+    statuses = set()
+
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for email in emails:
+            response = client.post(
+                url, data={'email': email, 'password': PASSWORD}, content_type='application/json', secure=True
+            )
+            statuses.add(response.status_code)
+    elapsed = time.perf_counter() - started
+
+    total = rounds * len(emails)
+    return total / elapsed, elapsed / total * 1000, sorted(statuses)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--iterations', type=int, nargs='*', default=[1_000_000, 600_000, 260_000])
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        print(f'{args.users} users x {args.rounds} logins each')
+        print(f'{"iterations":>10} | {"cache":>5} | {"logins/s":>8} | {"ms/login":>8} | status')
+        for iterations in args.iterations:
+            for timeout in (0, 300):
+                with override_settings(
+                    PASSWORD_HASHERS=HASHERS, PASSWORD_HASH_ITERATIONS=iterations, CREDENTIAL_CACHE_TIMEOUT=timeout
+                ):
+                    get_user_model().objects.all().delete()
+                    cache.clear()
+                    emails = seed(args.users)
+                    rate, latency, statuses = run(emails, args.rounds)
+                print(f'{iterations:>10} | {"on" if timeout else "off":>5} | {rate:8.1f} | {latency:8.1f} | {statuses}')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""
+Time to read a page of enrolments with their progress percentage: counting
+each course's Lesson rows per page against the Course.lesson_count column
+the bitmaps come with (enrolments/progress.py), and the space the bitmaps
+take against a row per completed lesson. Runs against a throwaway test
+database created from the settings.
+
+    DJANGO_SETTINGS_MODULE=LearningMgtSystem.settings python benchmarks/bench_progress.py
+    python benchmarks/bench_progress.py --lessons 200 --enrolments 5000 --repeat 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LearningMgtSystem.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.db.models import Count  # noqa: E402
+
+from enrolments.bitsets import count_bits, set_bit  # noqa: E402
+from enrolments.models import Course, Enrolment, Lesson, get_progress  # noqa: E402
+from instructors.models import Instructor  # noqa: E402
+from students.models import Student  # noqa: E402
+
+
+COURSES = 10
+
+
+def seed(lessons, enrolments):
+    User = get_user_model()
+    User.objects.bulk_create([
+        User(first_name='bench', last_name=f'user{i}', email=f'bench{i}@mail.com', password='!')
+        for i in range(COURSES + enrolments)
+    ], batch_size=1000)
+    users = list(User.objects.filter(email__startswith='bench').order_by('id'))
+    Instructor.objects.bulk_create([Instructor(user=user, status='activated') for user in users[:COURSES]])
+    Student.objects.bulk_create([Student(user=user, status='activated') for user in users[COURSES:]], batch_size=1000)
+    Course.objects.bulk_create([
+        Course(title=f'Course {instructor.pk}', instructor=instructor, status='active')
+        for instructor in Instructor.objects.all()
+    ])
+    courses = list(Course.objects.all())
+    Lesson.objects.bulk_create([
+        Lesson(course=course, title=f'Lesson {order}', content='<p>Intro</p>', order=order)
+        for course in courses for order in range(lessons)
+    ], batch_size=1000)
+
+    rows = []
+    for i, student in enumerate(Student.objects.all()):
+        done = b''
+        for position in random.sample(range(lessons), random.randint(0, lessons)):
+            done = set_bit(done, position)
+        rows.append(Enrolment(student=student, course=courses[i % COURSES], lessons_done=done, completed=count_bits(done)))
+    Enrolment.objects.bulk_create(rows, batch_size=1000)
+
+def count_lessons(size):
+    rows = Enrolment.objects.annotate(lessons=Count('course__lesson')).values('completed', 'lessons').order_by('-id')[:size]
+    return [get_progress(row['completed'], row['lessons']) for row in rows]
+
+def read_column(size):
+    rows = Enrolment.objects.values('completed', 'course__lesson_count').order_by('-id')[:size]
+    return [get_progress(row['completed'], row['course__lesson_count']) for row in rows]
+
+def best_of(repeat, function, *args):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--lessons', type=int, default=100)
+    parser.add_argument('--enrolments', type=int, default=2000)
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        seed(args.lessons, args.enrolments)
+
+        print(f'{"rows":>5} | {"COUNT(lesson) ms":>16} | {"lesson_count ms":>15} | speed-up')
+        for size in args.pages:
+            if count_lessons(size) != read_column(size):
+                raise SystemExit('the two reads give different percentages')
+            slow = best_of(args.repeat, count_lessons, size)
+            fast = best_of(args.repeat, read_column, size)
+            print(f'{size:>5} | {slow * 1000:16.2f} | {fast * 1000:15.2f} | {slow / fast:7.1f}x')
+
+        completions = sum(Enrolment.objects.values_list('completed', flat=True))
+        bitmap_bytes = sum(len(done) for done in Enrolment.objects.values_list('lessons_done', flat=True))
+        print(f'\n{completions} completions: {bitmap_bytes} bitmap bytes, '
+              f'{bitmap_bytes / args.enrolments:.1f} per enrolment, instead of {completions} rows')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
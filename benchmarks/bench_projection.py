@@ -0,0 +1,106 @@
+"""
+Time to fetch and render a page of courses, lesson videos and sessions:
+serializers over model instances against the values() projection the
+list views use (LearningMgtSystem/projections.py). Both produce the same
+data, which is checked before timing. Runs against a throwaway test
+database created from the settings.
+
+    DJANGO_SETTINGS_MODULE=LearningMgtSystem.settings python benchmarks/bench_projection.py
+    python benchmarks/bench_projection.py --pages 10 100 1000 --repeat 50
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LearningMgtSystem.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.utils import timezone  # noqa: E402
+
+from enrolments.models import Course, Lesson, LessonVideo, VideoSession  # noqa: E402
+from enrolments.serializers import CourseSerializer, LessonVideoSerializer, VideoSessionSerializer  # noqa: E402
+from instructors.models import Instructor  # noqa: E402
+from LearningMgtSystem.projections import get_projection  # noqa: E402
+
+
+def seed(rows):
+    User = get_user_model()
+    User.objects.bulk_create([
+        User(first_name='bench', last_name=f'instructor{i}', email=f'bench{i}@mail.com', password='!')
+        for i in range(rows)
+    ], batch_size=1000)
+    users = User.objects.filter(email__startswith='bench').order_by('id')
+    Instructor.objects.bulk_create([Instructor(user=user, status='activated') for user in users], batch_size=1000)
+    Course.objects.bulk_create([
+        Course(title=f'Course {instructor.pk}', description='About the course', instructor=instructor, status='active')
+        for instructor in Instructor.objects.all()
+    ], batch_size=1000)
+    Lesson.objects.bulk_create([
+        Lesson(course=course, title=f'Lesson {course.pk}', content='<p>Intro</p>', order=1)
+        for course in Course.objects.all()
+    ], batch_size=1000)
+    LessonVideo.objects.bulk_create([
+        LessonVideo(lesson=lesson, url='https://example.com/video.mp4', title='Video', order=1)
+        for lesson in Lesson.objects.all()
+    ], batch_size=1000)
+    VideoSession.objects.bulk_create([
+        VideoSession(
+            course=course, instructor_id=course.instructor_id, session_title=f'Session {course.pk}',
+            scheduled_time=timezone.now() + timedelta(days=1), session_link='https://meet.jit.si/session'
+        )
+        for course in Course.objects.all()
+    ], batch_size=1000)
+
+def serialize(queryset, serializer_class, size):
+    return serializer_class(list(queryset[:size]), many=True).data
+
+def project(queryset, serializer_class, size):
+    projection = get_projection(serializer_class())
+    return [projection.render(row) for row in queryset.values('pk', *projection.paths)[:size]]
+
+def best_of(repeat, function, *args):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(*args)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        seed(max(args.pages))
+        lists = [
+            ('courses', Course.objects.order_by('title', 'id'), CourseSerializer),
+            ('lesson videos', LessonVideo.objects.order_by('lesson', 'order', 'id'), LessonVideoSerializer),
+            ('sessions', VideoSessionSerializer.setup_eager_loading(VideoSession.objects.order_by('-created_at', '-id')),
+             VideoSessionSerializer),
+        ]
+
+        print(f'{"list":<14} | {"rows":>5} | {"serializer ms":>13} | {"values() ms":>11} | speed-up')
+        for name, queryset, serializer_class in lists:
+            for size in args.pages:
+                if [dict(row) for row in serialize(queryset, serializer_class, size)] != project(queryset, serializer_class, size):
+                    raise SystemExit(f'{name}: the projection renders different data')
+                slow = best_of(args.repeat, serialize, queryset, serializer_class, size)
+                fast = best_of(args.repeat, project, queryset, serializer_class, size)
+                print(f'{name:<14} | {size:>5} | {slow * 1000:13.2f} | {fast * 1000:11.2f} | {slow / fast:7.1f}x')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Peak Python memory while writing the all-enrolments report at growing
+table sizes. It should stay flat: rows are read in primary key batches and
+written straight to the file.
+
+    DJANGO_SETTINGS_MODULE=LearningMgtSystem.settings python benchmarks/bench_reports.py
+    python benchmarks/bench_reports.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'LearningMgtSystem.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from enrolments.models import Course, Enrolment  # noqa: E402
+from instructors.models import Instructor  # noqa: E402
+from reports.generators import generate_report  # noqa: E402
+from reports.models import ReportJob  # noqa: E402
+from students.models import Student  # noqa: E402
+
+
+def seed(course, start, total):
+    User = get_user_model()
+    User.objects.bulk_create([
+        User(first_name='bench', last_name=f'student{i}', email=f'bench{i}@mail.com', password='!')
+        for i in range(start, total)
+    ], batch_size=1000)
+    user_ids = User.objects.filter(email__startswith='bench').order_by('id').values_list('id', flat=True)[start:total]
+    Student.objects.bulk_create([Student(user_id=user_id, status='activated') for user_id in user_ids], batch_size=1000)
+    student_ids = Student.objects.order_by('id').values_list('id', flat=True)[start:total]
+    Enrolment.objects.bulk_create([Enrolment(student_id=pk, course=course) for pk in student_ids], batch_size=1000)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        User = get_user_model()
+        admin = User.objects.create_superuser(first_name='bench', last_name='admin', email='admin@mail.com', password='!')
+        instructor = Instructor.objects.create(user=admin, status='activated')
+        course = Course.objects.create(title='Bench course', instructor=instructor, status='active')
+
+        print(f'{"rows":>8} | {"format":>6} | {"seconds":>8} | {"peak KB":>8}')
+        seeded = 0
+        with tempfile.TemporaryDirectory() as root, override_settings(REPORTS_ROOT=root):
+            for size in sorted(args.sizes):
+                seed(course, seeded, size)
+                seeded = size
+                for fmt in ('csv', 'xlsx'):
+                    job = ReportJob.objects.create(requested_by=admin, kind='all', format=fmt)
+                    tracemalloc.start()
+                    started = time.perf_counter()
+                    generate_report(job)
+                    elapsed = time.perf_counter() - started
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                    print(f'{size:>8} | {fmt:>6} | {elapsed:8.2f} | {peak // 1024:>8}')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark lesson HTML sanitization on 1 KB to 2 MB lesson bodies.
+
+Compares the old write path (bleach.clean in LessonSerializer.validate_content
+and again in Lesson.save) with the single-pass sanitizer, and the re-save of
+an unchanged lesson.
+
+    python benchmarks/bench_sanitize.py
+"""
+import os
+import sys
+import time
+
+import bleach
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from enrolments import sanitizers  # noqa: E402
+from enrolments.sanitizers import ALLOWED_ATTRIBUTES, ALLOWED_TAGS, sanitize_html  # noqa: E402
+
+
+SIZES = [1024, 16 * 1024, 256 * 1024, 2 * 1024 * 1024]
+
+# a CKEditor-like block with markup the policy keeps and markup it strips
+BLOCK = (
+    '<h2>Section</h2><p>Some <strong>bold</strong> and <em>italic</em> text with a '
+    '<a href="https://example.com">link</a> and <span style="color:red">colour</span>.</p>'
+    '<ul><li>first</li><li>second</li></ul><pre><code>print("hello")</code></pre>'
+    '<script>alert(1)</script>'
+)
+
+
+def make_body(size, seed):
+    repeats = size // len(BLOCK) + 1
+    return (f'<p>lesson {seed}</p>' + BLOCK * repeats)[:size]
+
+def old_clean(value):
+    return bleach.clean(value, tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True)
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def old_write(body):
+    # validate_content, then Lesson.save
+    old_clean(old_clean(body))
+
+def new_write(body):
+    # validate_content, then Lesson.save recognising the cleaned output
+    sanitize_html(sanitize_html(body))
+
+def main():
+    print(f'{"size":>8} | {"old write":>10} | {"new write":>10} | {"old re-save":>11} | {"new re-save":>11}')
+    for seed, size in enumerate(SIZES):
+        body = make_body(size, seed)
+        sanitizers._memo.clear()
+
+        old = timed(old_write, body)
+        new = timed(new_write, body)
+        # re-saving an unchanged lesson: old cleans again, new skips it entirely
+        old_resave = timed(old_clean, sanitize_html(body))
+        new_resave = timed(sanitize_html, sanitize_html(body))
+
+        print(f'{size // 1024:>6}KB | {old:>9.4f}s | {new:>9.4f}s | {old_resave:>10.4f}s | {new_resave:>10.4f}s')
+
+
+if __name__ == '__main__':
+    main()
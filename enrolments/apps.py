@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class EnrolmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'enrolments'
+
+    def ready(self):
+        # connect signal handlers
+        from . import signals  # noqa: F401
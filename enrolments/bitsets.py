@@ -0,0 +1,32 @@
+"""
+Bitmaps of lesson positions, stored as bytes: bit n is bit n % 8 of byte
+n // 8, and trailing bytes that would be zero are left out, so an enrolment
+that completed nothing stores b'' and a 200 lesson course fits in 25 bytes.
+"""
+
+
+def has_bit(data, position):
+    index = position >> 3
+    return index < len(data) and bool(data[index] >> (position & 7) & 1)
+
+def set_bit(data, position):
+    index = position >> 3
+    data = bytearray(data)
+    if index >= len(data):
+        data.extend(bytes(index + 1 - len(data)))
+    data[index] |= 1 << (position & 7)
+    return bytes(data)
+
+def clear_bit(data, position):
+    if not has_bit(data, position):
+        return bytes(data)
+    data = bytearray(data)
+    data[position >> 3] &= ~(1 << (position & 7)) & 0xff
+    return bytes(data.rstrip(b'\x00'))
+
+def count_bits(data):
+    return int.from_bytes(data, 'little').bit_count()
+
+def first_bits(count):
+    # positions 0 .. count - 1
+    return ((1 << count) - 1).to_bytes((count + 7) // 8, 'little')
@@ -0,0 +1,80 @@
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+from LearningMgtSystem.replicas import get_pin_seconds, reading_from_replica
+
+
+CATALOG_VERSION_KEY = 'catalog:version'
+CATALOG_PAGE_KEY = 'catalog:page:{version}:{params}'
+CATALOG_HITS_KEY = 'catalog:hits'
+CATALOG_MISSES_KEY = 'catalog:misses'
+# set while the replicas may still be catching up with the last catalog change
+CATALOG_SETTLING_KEY = 'catalog:settling'
+
+
+def get_catalog_timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+def _incr(key):
+    # counters never expire; add() creates the key if a cache flush dropped it
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+        return 1
+
+def get_catalog_version():
+    cache.add(CATALOG_VERSION_KEY, 1, timeout=None)
+    return cache.get(CATALOG_VERSION_KEY, 1)
+
+def invalidate_catalog():
+    # every cached page is keyed by the version, bumping it drops them all
+    _incr(CATALOG_VERSION_KEY)
+    cache.set(CATALOG_SETTLING_KEY, True, timeout=get_pin_seconds())
+
+def may_fill_catalog():
+    # a lagging replica could still serve the page from before the change,
+    # which would then be cached under the new version for everyone
+    return not reading_from_replica() or cache.get(CATALOG_SETTLING_KEY) is None
+
+def get_catalog_stats():
+    return {
+        'hits': cache.get(CATALOG_HITS_KEY, 0),
+        'misses': cache.get(CATALOG_MISSES_KEY, 0),
+    }
+
+def get_catalog_page_key(request):
+    # filter, search, ordering and page/cursor parameters, plus the output format
+    params = sorted(request.query_params.lists())
+    params.append(('format', request.accepted_renderer.format))
+    return CATALOG_PAGE_KEY.format(version=get_catalog_version(), params=urlencode(params, doseq=True))
+
+
+class CatalogCacheMixin:
+    """
+    Serve list pages from the cache until a course or instructor changes.
+    Use before ConditionalGetMixin, whose ETag is cached with the page.
+    """
+
+    def list(self, request, *args, **kwargs):
+        key = get_catalog_page_key(request)
+        cached = cache.get(key)
+
+        if cached is None:
+            _incr(CATALOG_MISSES_KEY)
+            response = super().list(request, *args, **kwargs)
+            if response.status_code == 200 and may_fill_catalog():
+                cache.set(key, (response.data, response['ETag']), timeout=get_catalog_timeout())
+            response['X-Catalog-Cache'] = 'miss'
+            return response
+
+        _incr(CATALOG_HITS_KEY)
+        data, etag = cached
+        response = self.conditional_response(request, etag)
+        if response is None:
+            response = Response(data)
+        response['X-Catalog-Cache'] = 'hit'
+        return self.set_validators(response, etag)
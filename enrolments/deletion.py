@@ -0,0 +1,82 @@
+"""
+Set-based deletes for large object graphs.
+
+Deleting a course, student or instructor through Model.delete() makes
+Django's Collector load every related enrolment, lesson, video and session
+into memory and delete them in one long transaction. Here the large child
+tables are emptied first, bottom-up, one primary key chunk per short
+transaction with _raw_delete (no instances, no signals), and the work the
+skipped signals would have done (stats, search index) is done per chunk.
+The parent rows are then deleted normally: with their big relations gone
+the Collector has little left to load, and the usual signals (catalog cache,
+cached users, role claims) still fire.
+
+A deletion interrupted half way leaves only whole chunks removed, and can
+simply be run again.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import router, transaction
+
+from .models import Course, Enrolment, Lesson, LessonVideo, ProgressEvent, VideoSession
+from .search import get_search_backend
+from .stats import record_unenrolled
+
+
+User = get_user_model()
+
+
+def get_chunk_size():
+    return getattr(settings, 'DELETE_CHUNK_SIZE', 2000)
+
+def delete_in_chunks(queryset, chunk_size=None, before_delete=None):
+    """
+    Delete the rows of queryset chunk by chunk and return how many went.
+    before_delete(pks) runs in each chunk's transaction, before its DELETE.
+    """
+    chunk_size = chunk_size or get_chunk_size()
+    model = queryset.model
+    using = router.db_for_write(model)
+    deleted = 0
+
+    while True:
+        pks = list(queryset.order_by('pk').values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return deleted
+
+        with transaction.atomic(using=using):
+            if before_delete is not None:
+                before_delete(pks)
+            deleted += model._base_manager.using(using).filter(pk__in=pks)._raw_delete(using)
+
+def unenrol(pks):
+    # enrolment signals are skipped, take the chunk out of the course stats here
+    record_unenrolled(Enrolment.objects.filter(pk__in=pks).only('course_id', 'completed'))
+
+def unindex_lessons(pks):
+    get_search_backend().remove('lesson', pks)
+
+def delete_course_children(course_ids, chunk_size=None):
+    delete_in_chunks(ProgressEvent.objects.filter(enrolment__course_id__in=course_ids), chunk_size)
+    # the course's stats go with the course, no need to count down first
+    delete_in_chunks(Enrolment.objects.filter(course_id__in=course_ids), chunk_size)
+    delete_in_chunks(LessonVideo.objects.filter(lesson__course_id__in=course_ids), chunk_size)
+    delete_in_chunks(Lesson.objects.filter(course_id__in=course_ids), chunk_size, unindex_lessons)
+    delete_in_chunks(VideoSession.objects.filter(course_id__in=course_ids), chunk_size)
+
+def delete_course(course_id, chunk_size=None):
+    delete_course_children([course_id], chunk_size)
+    Course.objects.filter(pk=course_id).delete()
+
+def delete_student(student_id, chunk_size=None):
+    delete_in_chunks(ProgressEvent.objects.filter(enrolment__student_id=student_id), chunk_size)
+    delete_in_chunks(Enrolment.objects.filter(student_id=student_id), chunk_size, unenrol)
+    # deleting the user takes the student and profile with it
+    User.objects.filter(student__pk=student_id).delete()
+
+def delete_instructor(instructor_id, chunk_size=None):
+    course_ids = list(Course.objects.filter(instructor_id=instructor_id).values_list('pk', flat=True))
+    delete_course_children(course_ids, chunk_size)
+    delete_in_chunks(VideoSession.objects.filter(instructor_id=instructor_id), chunk_size)
+    Course.objects.filter(pk__in=course_ids).delete()
+    User.objects.filter(instructor__pk=instructor_id).delete()
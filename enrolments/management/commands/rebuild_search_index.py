@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from enrolments.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for courses and lessons'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows fetched per query')
+
+    def handle(self, *args, **options):
+        count = rebuild_index(chunk_size=options['chunk_size'])
+        self.stdout.write(f"Indexed {count} courses and lessons.")
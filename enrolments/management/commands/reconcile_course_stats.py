@@ -0,0 +1,41 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from enrolments.models import Course
+from enrolments.stats import reconcile_courses
+
+
+def reconcile_chunk(course_ids):
+    try:
+        return reconcile_courses(course_ids)
+    finally:
+        # each worker thread opened its own connection
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Rebuild course stats and completion buckets from the enrolment table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=200, help='Courses per transaction')
+        parser.add_argument('--workers', type=int, default=4, help='Chunks reconciled in parallel')
+        parser.add_argument('--course', type=int, nargs='*', help='Only these course ids')
+
+    def handle(self, *args, **options):
+        courses = Course.objects.order_by('pk')
+        if options['course']:
+            courses = courses.filter(pk__in=options['course'])
+        course_ids = list(courses.values_list('pk', flat=True))
+
+        size = options['chunk_size']
+        chunks = [course_ids[i:i + size] for i in range(0, len(course_ids), size)]
+
+        if options['workers'] > 1:
+            with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+                drifted = sum(executor.map(reconcile_chunk, chunks))
+        else:
+            drifted = sum(reconcile_courses(chunk) for chunk in chunks)
+
+        self.stdout.write(f"Reconciled {len(course_ids)} courses, {drifted} had drifted.")
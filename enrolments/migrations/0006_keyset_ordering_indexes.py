@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrolments', '0005_alter_videosession_instructor'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='enrolment',
+            name='date_joined',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='videosession',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
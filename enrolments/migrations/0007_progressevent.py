@@ -0,0 +1,23 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrolments', '0006_keyset_ordering_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProgressEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.UUIDField(unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('enrolment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='progress_events', to='enrolments.enrolment')),
+            ],
+        ),
+    ]
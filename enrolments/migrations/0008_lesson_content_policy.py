@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 18:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrolments', '0007_progressevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='content_policy',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+    ]
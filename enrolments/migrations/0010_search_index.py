@@ -0,0 +1,53 @@
+from django.db import migrations
+from django.utils.html import strip_tags
+
+
+FTS_TABLE = 'enrolments_search_index'
+
+MYSQL_INDEXES = [
+    ('enrolments_course', 'enrolments_course_fulltext', 'title, description'),
+    ('enrolments_lesson', 'enrolments_lesson_fulltext', 'title, content'),
+]
+
+
+def create_search_index(apps, schema_editor):
+    # MySQL FULLTEXT in production, SQLite FTS5 locally
+    connection = schema_editor.connection
+    if connection.vendor == 'mysql':
+        for table, index, columns in MYSQL_INDEXES:
+            schema_editor.execute(f'CREATE FULLTEXT INDEX {index} ON {table} ({columns})')
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5('
+            f'kind UNINDEXED, object_id UNINDEXED, course_id UNINDEXED, title, body, '
+            f"tokenize = 'porter unicode61')"
+        )
+
+        # index the rows that already exist
+        Course = apps.get_model('enrolments', 'Course')
+        Lesson = apps.get_model('enrolments', 'Lesson')
+        insert = f'INSERT INTO {FTS_TABLE} (kind, object_id, course_id, title, body) VALUES (%s, %s, %s, %s, %s)'
+        with connection.cursor() as cursor:
+            for course in Course.objects.iterator():
+                cursor.execute(insert, ['course', course.pk, course.pk, course.title, course.description or ''])
+            for lesson in Lesson.objects.iterator():
+                cursor.execute(insert, ['lesson', lesson.pk, lesson.course_id, lesson.title, strip_tags(lesson.content or '')])
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'mysql':
+        for table, index, _ in MYSQL_INDEXES:
+            schema_editor.execute(f'DROP INDEX {index} ON {table}')
+    elif connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrolments', '0009_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_course_stats(apps, schema_editor):
+    # starting totals for existing enrolments, kept up to date from then on
+    Enrolment = apps.get_model('enrolments', 'Enrolment')
+    CourseStats = apps.get_model('enrolments', 'CourseStats')
+    CourseCompletionBucket = apps.get_model('enrolments', 'CourseCompletionBucket')
+
+    totals = (
+        Enrolment.objects.values('course_id')
+        .annotate(count=models.Count('pk'), completed_total=models.Sum('completed'))
+        .order_by()
+    )
+    CourseStats.objects.bulk_create([
+        CourseStats(
+            course_id=row['course_id'],
+            enrolment_count=row['count'],
+            completed_total=row['completed_total'] or 0,
+        )
+        for row in totals
+    ], batch_size=1000)
+
+    buckets = Enrolment.objects.values('course_id', 'completed').annotate(count=models.Count('pk')).order_by()
+    CourseCompletionBucket.objects.bulk_create([
+        CourseCompletionBucket(course_id=row['course_id'], completed=row['completed'], count=row['count'])
+        for row in buckets
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrolments', '0010_search_index'),
+        ('students', '0002_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseCompletionBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('completed', models.PositiveSmallIntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='enrolments.course')),
+                ('enrolment_count', models.PositiveIntegerField(default=0)),
+                ('completed_total', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='enrolment',
+            index=models.Index(fields=['course', 'date_joined'], name='enrolment_course_joined_idx'),
+        ),
+        migrations.AddField(
+            model_name='coursecompletionbucket',
+            name='course',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completion_buckets', to='enrolments.course'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='coursecompletionbucket',
+            unique_together={('course', 'completed')},
+        ),
+        migrations.RunPython(populate_course_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrolments', '0011_course_stats'),
+        ('instructors', '0002_updated_at'),
+        ('students', '0002_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['title'], name='course_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['status', 'title'], name='course_status_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lesson',
+            index=models.Index(fields=['course', 'order'], name='lesson_course_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='lessonvideo',
+            index=models.Index(fields=['lesson', 'order'], name='lessonvideo_lesson_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videosession',
+            index=models.Index(fields=['course', '-created_at'], name='session_course_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='videosession',
+            index=models.Index(fields=['scheduled_time'], name='session_scheduled_idx'),
+        ),
+    ]
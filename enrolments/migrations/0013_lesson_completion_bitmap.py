@@ -0,0 +1,97 @@
+# Generated by Django 5.2.4 on 2026-10-18 21:05
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def first_bits(count):
+    # bitmap of positions 0 .. count - 1, as enrolments.bitsets writes it
+    return ((1 << count) - 1).to_bytes((count + 7) // 8, 'little')
+
+def populate_lesson_bitmaps(apps, schema_editor):
+    # positions follow the reading order, and the first N lessons of a
+    # course are taken as the ones an enrolment with N completed finished
+    Course = apps.get_model('enrolments', 'Course')
+    Lesson = apps.get_model('enrolments', 'Lesson')
+    Enrolment = apps.get_model('enrolments', 'Enrolment')
+    CourseStats = apps.get_model('enrolments', 'CourseStats')
+    CourseCompletionBucket = apps.get_model('enrolments', 'CourseCompletionBucket')
+
+    lessons = defaultdict(list)
+    for lesson in Lesson.objects.only('course_id').order_by('course_id', 'order', 'pk').iterator(chunk_size=2000):
+        lesson.position = len(lessons[lesson.course_id])
+        lessons[lesson.course_id].append(lesson)
+    for course_lessons in lessons.values():
+        Lesson.objects.bulk_update(course_lessons, ['position'], batch_size=1000)
+
+    clipped = []
+    for course in Course.objects.only('pk').iterator(chunk_size=2000):
+        count = len(lessons.get(course.pk, ()))
+        Course.objects.filter(pk=course.pk).update(lesson_count=count, lesson_positions=count)
+
+        # one UPDATE per distinct counter value, the values the completion buckets hold
+        values = set(
+            Enrolment.objects.filter(course_id=course.pk, completed__gt=0, completed__lte=count)
+            .values_list('completed', flat=True).distinct()
+        )
+        for completed in values:
+            Enrolment.objects.filter(course_id=course.pk, completed=completed).update(lessons_done=first_bits(completed))
+
+        # more lessons counted than the course has: all of them are completed
+        if Enrolment.objects.filter(course_id=course.pk, completed__gt=count).update(
+            lessons_done=first_bits(count), completed=count
+        ):
+            clipped.append(course.pk)
+
+    # recount the stats of courses whose counters were clipped
+    for course_id in clipped:
+        rows = Enrolment.objects.filter(course_id=course_id).values('completed').annotate(count=models.Count('pk')).order_by()
+        CourseCompletionBucket.objects.filter(course_id=course_id).delete()
+        CourseCompletionBucket.objects.bulk_create([
+            CourseCompletionBucket(course_id=course_id, completed=row['completed'], count=row['count'])
+            for row in rows
+        ])
+        CourseStats.objects.filter(course_id=course_id).update(
+            completed_total=sum(row['completed'] * row['count'] for row in rows)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('enrolments', '0012_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='lesson_count',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='lesson_positions',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='lesson',
+            name='position',
+            field=models.PositiveSmallIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='enrolment',
+            name='lessons_done',
+            field=models.BinaryField(default=b'', editable=False),
+        ),
+        migrations.RunPython(populate_lesson_bitmaps, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='lesson',
+            name='position',
+            field=models.PositiveSmallIntegerField(editable=False),
+        ),
+        migrations.AlterUniqueTogether(
+            name='lesson',
+            unique_together={('course', 'position')},
+        ),
+    ]
@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+from LearningMgtSystem.signals import BulkSignalQuerySet
 from instructors.models import Instructor
 from students.models import Student
 
@@ -7,14 +10,7 @@ from students.models import Student
 from django_ckeditor_5.fields import CKEditor5Field
 
 # to allow specific html tags
-import bleach
-
-# a list of tags to be allowed in lesson contents
-ALLOWED_TAGS = [
-    'p', 'br', 'strong', 'em', 'ul', 'ol', 'li', 'h1', 'h2', 'h3', 'h4', 'blockquote', 'code', 'pre'
-]
-
-ALLOWED_ATTRIBUTES = {}
+from .sanitizers import POLICY_VERSION, sanitize_html
 
 class Course(models.Model):
     STATUS_CHOICE = [
@@ -27,49 +23,170 @@ class Course(models.Model):
     instructor = models.OneToOneField(Instructor, on_delete=models.CASCADE, related_name='course')
     student = models.ManyToManyField(Student, through='Enrolment', related_name='course')
     status = models.CharField(max_length=10, choices=STATUS_CHOICE)
+    # lessons in the course, and lesson positions handed out so far (see Lesson.position)
+    lesson_count = models.PositiveSmallIntegerField(default=0, editable=False)
+    lesson_positions = models.PositiveSmallIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # queryset writes notify listeners such as the catalog cache
+    objects = BulkSignalQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # the catalog, ordered by title, optionally filtered by status
+            models.Index(fields=['title'], name='course_title_idx'),
+            models.Index(fields=['status', 'title'], name='course_status_title_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title}'
-    
+
+def reserve_lesson_positions(course_id, count):
+    """
+    Hand out the course's next count lesson positions and count the lessons
+    in; returns the first position. Call inside a transaction: the course
+    row stays locked until it commits.
+    """
+    first = Course.objects.select_for_update().values_list('lesson_positions', flat=True).get(pk=course_id)
+    # the course's lessons changed: updated_at moves so enrolment ETags follow the progress percentage.
+    # The plain base manager: a counter bump mustn't send bulk_changed, which would drop the
+    # catalog and reindex the course while the row is locked; the lesson's own signals cover it
+    Course._base_manager.filter(pk=course_id).update(
+        lesson_positions=F('lesson_positions') + count,
+        lesson_count=F('lesson_count') + count,
+        updated_at=timezone.now(),
+    )
+    return first
+
+
+class LessonQuerySet(BulkSignalQuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # save() isn't called, give new lessons their positions here
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            by_course = {}
+            for obj in objs:
+                if obj.position is None:
+                    by_course.setdefault(obj.course_id, []).append(obj)
+            for course_id, lessons in by_course.items():
+                first = reserve_lesson_positions(course_id, len(lessons))
+                for offset, lesson in enumerate(lessons):
+                    lesson.position = first + offset
+            return super().bulk_create(objs, *args, **kwargs)
+
 class Lesson(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='lesson')
     title = models.CharField(max_length=255)
     content = CKEditor5Field('Text', config_name='extends') 
     order = models.PositiveSmallIntegerField(default=1)
+    # bit index in Enrolment.lessons_done, assigned on creation and never reused
+    position = models.PositiveSmallIntegerField(editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # sanitizer policy the stored content was cleaned with
+    content_policy = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    # queryset writes notify listeners such as the search index
+    objects = LessonQuerySet.as_manager()
+
+    class Meta:
+        unique_together = ('course', 'position')
+        indexes = [
+            # a course's lessons in reading order
+            models.Index(fields=['course', 'order'], name='lesson_course_order_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title}'
-    
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        # content stored under the current policy is already clean
+        # (checked only when both were loaded, so only() doesn't cost a query per row)
+        loaded = instance.__dict__
+        if 'content' in loaded and loaded.get('content_policy') == POLICY_VERSION:
+            instance._clean_content = instance.content
+        return instance
+
     # modifying the save method to screen for tags with bleach
     def save(self, *args, **kwargs):
-        # sanitize contents before saving
-        self.content = bleach.clean(
-            self.content,
-            tags=ALLOWED_TAGS,
-            attributes=ALLOWED_ATTRIBUTES,
-            strip=True
-        )
-        super().save(*args, **kwargs)
+        # sanitize contents before saving, unless unchanged since they were cleaned
+        if 'content' in self.__dict__:
+            if self.content_policy != POLICY_VERSION or self.content != getattr(self, '_clean_content', None):
+                self.content = sanitize_html(self.content)
+                self.content_policy = POLICY_VERSION
+            self._clean_content = self.content
+
+        if not self._state.adding or self.position is not None:
+            return super().save(*args, **kwargs)
+        # a new lesson: take the next position, in the same transaction as the row
+        with transaction.atomic(using=kwargs.get('using')):
+            self.position = reserve_lesson_positions(self.course_id, 1)
+            super().save(*args, **kwargs)
 
 class LessonVideo(models.Model):
     lesson = models.ForeignKey(Lesson, on_delete=models.CASCADE, related_name='videos')
     url = models.URLField()
     title = models.CharField(max_length=255, blank=True)
     order = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['lesson', 'order'], name='lessonvideo_lesson_order_idx'),
+        ]
 
     def __str__(self):
         return f'{self.title}'
-    
+
+def get_progress(completed, lesson_count):
+    # percentage of the course's lessons completed
+    if not lesson_count:
+        return 0.0
+    return round(100 * completed / lesson_count, 1)
+
 class Enrolment(models.Model):
     student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='enrolment')
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='enrolment')
+    # bitmap of the Lesson.position of each completed lesson (see bitsets.py)
+    lessons_done = models.BinaryField(default=b'', editable=False)
+    # number of bits set in lessons_done, kept with it so nothing counts bits on read
     completed = models.PositiveSmallIntegerField(default=0)
-    date_joined = models.DateTimeField(auto_now_add=True)
+    date_joined = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ('student', 'course')  # prevent duplicate enrollments
+        indexes = [
+            # a course's most recent sign-ups
+            models.Index(fields=['course', 'date_joined'], name='enrolment_course_joined_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # progress as stored, so course stats can tell how far it moved on save
+        instance._stored_completed = instance.__dict__.get('completed')
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._stored_completed = self.__dict__.get('completed')
+
+    @property
+    def progress(self):
+        return get_progress(self.completed, self.course.lesson_count)
+
+class ProgressEvent(models.Model):
+    # id generated by the client so a re-uploaded event is only counted once
+    event_id = models.UUIDField(unique=True)
+    enrolment = models.ForeignKey(Enrolment, on_delete=models.CASCADE, related_name='progress_events')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.event_id}'
 
 class VideoSession(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
@@ -77,8 +194,46 @@ class VideoSession(models.Model):
     session_title = models.CharField(max_length=255)
     scheduled_time = models.DateTimeField()
     session_link = models.URLField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # a course's sessions, newest first
+            models.Index(fields=['course', '-created_at'], name='session_course_created_idx'),
+            # upcoming / past sessions
+            models.Index(fields=['scheduled_time'], name='session_scheduled_idx'),
+        ]
 
     def __str__(self):
         return f'{self.session_title}'
-    
\ No newline at end of file
+    
+
+class CourseStats(models.Model):
+    # running totals kept in step with the course's enrolments (see stats.py)
+    course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    enrolment_count = models.PositiveIntegerField(default=0)
+    # sum of Enrolment.completed over the course
+    completed_total = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'{self.course_id} stats'
+
+    @property
+    def average_completed(self):
+        if not self.enrolment_count:
+            return 0
+        return self.completed_total / self.enrolment_count
+
+class CourseCompletionBucket(models.Model):
+    # number of the course's enrolments that have completed this many lessons
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='completion_buckets')
+    completed = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('course', 'completed')
+
+    def __str__(self):
+        return f'{self.course_id}: {self.completed} lessons x {self.count}'
@@ -0,0 +1,104 @@
+"""
+Per-lesson completion.
+
+A lesson gets a position in its course when it is created (Lesson.position,
+never reused) and an enrolment stores the lessons it completed as a bitmap
+of those positions (Enrolment.lessons_done, see bitsets.py). Completing a
+lesson is setting its bit: doing it twice changes nothing.
+
+Enrolment.completed is the number of bits set, written with the bitmap, so
+lists, course stats and the progress percentage (completed over
+Course.lesson_count) read two columns and never count Lesson rows.
+
+The bitmap is rewritten whole, so writers lock the enrolment rows first.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .bitsets import clear_bit, count_bits, has_bit, set_bit
+from .models import Course, Enrolment, Lesson
+from .stats import record_progress
+
+
+def get_reading_order(course_ids):
+    # {course_id: [lesson positions in reading order]}
+    order = defaultdict(list)
+    for course_id, position in (
+        Lesson.objects.filter(course_id__in=course_ids).order_by('course_id', 'order', 'position')
+        .values_list('course_id', 'position')
+    ):
+        order[course_id].append(position)
+    return order
+
+def save_progress(rows, now=None):
+    # write the changed bitmaps and move the course stats by the new counts
+    now = now or timezone.now()
+    changed = []
+    moves = defaultdict(list)
+    for row in rows:
+        completed = count_bits(row.lessons_done)
+        if completed == row.completed and row.lessons_done == row._stored_lessons_done:
+            continue
+        moves[row.course_id].append((row.completed, completed))
+        row.completed, row.updated_at = completed, now
+        changed.append(row)
+
+    Enrolment.objects.bulk_update(changed, ['lessons_done', 'completed', 'updated_at'])
+    for course_id, course_moves in moves.items():
+        record_progress(course_id, course_moves)
+    return changed
+
+def complete_lessons(completions):
+    """
+    Mark lessons completed. completions maps enrolment ids to lesson
+    positions, None standing for the next lesson in reading order that is
+    not completed yet. Call inside a transaction; returns the enrolments,
+    by id, with lessons_done and completed as saved.
+    """
+    rows = list(
+        Enrolment.objects.select_for_update().filter(pk__in=completions)
+        .only('course_id', 'lessons_done', 'completed').order_by('pk')
+    )
+    order = {}
+    if any(None in positions for positions in completions.values()):
+        order = get_reading_order({row.course_id for row in rows})
+
+    for row in rows:
+        done = row._stored_lessons_done = bytes(row.lessons_done)
+        for position in completions[row.pk]:
+            if position is None:
+                position = next((p for p in order.get(row.course_id, ()) if not has_bit(done, p)), None)
+                if position is None:
+                    # every lesson is completed already
+                    continue
+            done = set_bit(done, position)
+        row.lessons_done = done
+
+    save_progress(rows)
+    return {row.pk: row for row in rows}
+
+def remove_lesson(course_id, position, chunk_size=2000):
+    """
+    A lesson was deleted: count it out of the course and clear its bit in
+    every enrolment, one primary key chunk per transaction.
+    """
+    # base manager, as in reserve_lesson_positions: no bulk_changed for a counter
+    Course._base_manager.filter(pk=course_id).update(lesson_count=F('lesson_count') - 1, updated_at=timezone.now())
+
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                Enrolment.objects.select_for_update().filter(course_id=course_id, pk__gt=last_pk)
+                .only('course_id', 'lessons_done', 'completed').order_by('pk')[:chunk_size]
+            )
+            if not rows:
+                return
+            for row in rows:
+                row._stored_lessons_done = bytes(row.lessons_done)
+                row.lessons_done = clear_bit(row._stored_lessons_done, position)
+            save_progress(rows)
+        last_pk = rows[-1].pk
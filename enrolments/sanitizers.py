@@ -0,0 +1,62 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# to allow specific html tags
+from bleach.sanitizer import Cleaner
+
+
+# bump whenever the tags/attributes below change, so stored lessons
+# cleaned under an older policy get cleaned again on their next save
+POLICY_VERSION = 1
+
+# a list of tags to be allowed in lesson contents
+ALLOWED_TAGS = [
+    'p', 'br', 'strong', 'em', 'ul', 'ol', 'li', 'h1', 'h2', 'h3', 'h4', 'blockquote', 'code', 'pre'
+]
+
+ALLOWED_ATTRIBUTES = {}
+
+# digests of recent sanitizer output, newest last
+MEMO_SIZE = 256
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+# Cleaner instances are not thread-safe, keep one per thread
+_local = threading.local()
+
+
+def _get_cleaner():
+    if not hasattr(_local, 'cleaner'):
+        _local.cleaner = Cleaner(tags=ALLOWED_TAGS, attributes=ALLOWED_ATTRIBUTES, strip=True)
+    return _local.cleaner
+
+def _digest(value):
+    return hashlib.sha1(f'{POLICY_VERSION}:{value}'.encode()).digest()
+
+def is_sanitized(value):
+    # True when value was produced by sanitize_html under the current policy
+    digest = _digest(value)
+    with _memo_lock:
+        if digest in _memo:
+            _memo.move_to_end(digest)
+            return True
+    return False
+
+def sanitize_html(value):
+    """
+    Clean lesson HTML with the current policy. Content this process has
+    already produced is returned as is instead of being parsed again.
+    """
+    if not value or is_sanitized(value):
+        return value
+
+    cleaned = _get_cleaner().clean(value)
+
+    with _memo_lock:
+        _memo[_digest(cleaned)] = True
+        if len(_memo) > MEMO_SIZE:
+            _memo.popitem(last=False)
+
+    return cleaned
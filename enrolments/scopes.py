@@ -0,0 +1,47 @@
+"""
+Which enrolments a user may read: students their own, instructors their
+course's roster, admins all of them. Scoping filters on student_id or
+course_id, the leading columns of the (student, course) and
+(course, date_joined) indexes, so a user's page is an index lookup.
+"""
+from rest_framework.exceptions import NotFound, PermissionDenied
+
+from .models import Course
+
+
+def get_instructor_course_id(user):
+    # authenticated principals come with instructor__course loaded (accounts.authentication)
+    instructor = getattr(user, 'instructor', None)
+    course = getattr(instructor, 'course', None) if instructor is not None else None
+    return course.pk if course is not None else None
+
+def scope_enrolments(queryset, user):
+    if user.is_staff:
+        return queryset
+
+    profile = getattr(user, 'profile', None)
+    role = profile.role if profile is not None else None
+    if role == 'student':
+        student = getattr(user, 'student', None)
+        if student is not None:
+            return queryset.filter(student_id=student.pk)
+    elif role == 'instructor':
+        course_id = get_instructor_course_id(user)
+        if course_id is not None:
+            return queryset.filter(course_id=course_id)
+    return queryset.none()
+
+def check_roster_access(user, course_id):
+    """Admins read any course's roster, instructors only their own."""
+    if user.is_staff:
+        if not Course.objects.filter(pk=course_id).exists():
+            raise NotFound('No Course matches the given query.')
+    elif get_instructor_course_id(user) != course_id:
+        raise PermissionDenied('You are not the instructor of this course.')
+
+
+class EnrolmentScopeMixin:
+    """Enrolment views: limit the queryset to what the user may read, see scope_enrolments()."""
+
+    def get_queryset(self):
+        return scope_enrolments(super().get_queryset(), self.request.user)
@@ -0,0 +1,224 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape, strip_tags
+from rest_framework.filters import SearchFilter
+
+
+# FTS5 table used on SQLite (local development and tests)
+FTS_TABLE = 'enrolments_search_index'
+
+# InnoDB FULLTEXT indexes used on MySQL
+MYSQL_INDEXES = {
+    'course': ('enrolments_course', 'enrolments_course_fulltext', ('title', 'description')),
+    'lesson': ('enrolments_lesson', 'enrolments_lesson_fulltext', ('title', 'content')),
+}
+
+SNIPPET_WORDS = 16
+
+# FTS5 marks matches with these, swapped for <mark> once the text is escaped
+MARK_START, MARK_END = '\x02', '\x03'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def get_tokens(query):
+    # search terms without any query syntax the user may have typed
+    return TOKEN_RE.findall(query)
+
+def get_document(obj):
+    # (kind, course id, title, plain text body) for a course or a lesson
+    if obj._meta.model_name == 'course':
+        return 'course', obj.pk, obj.title, strip_tags(obj.description or '')
+    return 'lesson', obj.course_id, obj.title, strip_tags(obj.content or '')
+
+def mark_snippet(text):
+    # snippets are rendered as HTML: escape the indexed text, then add the marks
+    return escape(text).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+class SQLiteSearchBackend:
+    """FTS5 index kept up to date row by row on save and delete."""
+
+    def index(self, obj):
+        kind, course_id, title, body = get_document(obj)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE kind = %s AND object_id = %s', [kind, obj.pk])
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (kind, object_id, course_id, title, body) VALUES (%s, %s, %s, %s, %s)',
+                [kind, obj.pk, course_id, title, body]
+            )
+
+    def remove(self, kind, pks):
+        with connection.cursor() as cursor:
+            for pk in pks:
+                cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE kind = %s AND object_id = %s', [kind, pk])
+
+    def rebuild(self, chunk_size=500):
+        from .models import Course, Lesson
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+        count = 0
+        for queryset in (Course.objects.all(), Lesson.objects.all()):
+            for obj in queryset.iterator(chunk_size=chunk_size):
+                self.index(obj)
+                count += 1
+
+        # merge the index b-trees left behind by row-by-row inserts
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+        return count
+
+    def get_match(self, tokens):
+        # every term must match, the last one as a prefix for search-as-you-type
+        return ' '.join(f'"{token}"' for token in tokens) + '*'
+
+    def match_sql(self, tokens, kind):
+        # (sql, params) selecting the ids of the matching rows, for a subquery
+        return (
+            f'SELECT object_id FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND kind = %s',
+            (self.get_match(tokens), kind),
+        )
+
+    def search(self, query, kind=None, limit=20):
+        tokens = get_tokens(query)
+        if not tokens:
+            return []
+
+        match = self.get_match(tokens)
+        # columns: kind, object_id, course_id, title, body; titles weigh double
+        sql = (
+            f"SELECT kind, object_id, course_id, title, "
+            f"snippet({FTS_TABLE}, 4, %s, %s, '...', {SNIPPET_WORDS}), "
+            f"bm25({FTS_TABLE}, 0, 0, 0, 2.0, 1.0) AS rank "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        )
+        params = [MARK_START, MARK_END, match]
+        if kind:
+            sql += ' AND kind = %s'
+            params.append(kind)
+        sql += ' ORDER BY rank LIMIT %s'
+        params.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+
+        # bm25 is lower-is-better, flip it so higher scores rank first
+        return [
+            {'type': row[0], 'id': row[1], 'course': row[2], 'title': row[3], 'snippet': mark_snippet(row[4]), 'score': -row[5]}
+            for row in rows
+        ]
+
+
+class MySQLSearchBackend:
+    """InnoDB FULLTEXT indexes, which MySQL maintains on every write."""
+
+    def index(self, obj):
+        pass
+
+    def remove(self, kind, pks):
+        pass
+
+    def rebuild(self, chunk_size=500):
+        from .models import Course, Lesson
+
+        # OPTIMIZE TABLE rebuilds the InnoDB FULLTEXT index
+        with connection.cursor() as cursor:
+            for table, _, _ in MYSQL_INDEXES.values():
+                cursor.execute(f'OPTIMIZE TABLE {table}')
+        return Course.objects.count() + Lesson.objects.count()
+
+    def make_snippet(self, text, tokens):
+        words = strip_tags(text or '').split()
+        lowered = [token.lower() for token in tokens]
+
+        start = next(
+            (i for i, word in enumerate(words) if any(word.lower().startswith(token) for token in lowered)),
+            0
+        )
+        start = max(start - SNIPPET_WORDS // 4, 0)
+        window = words[start:start + SNIPPET_WORDS]
+
+        marked = [
+            f'{MARK_START}{word}{MARK_END}' if any(word.lower().startswith(token) for token in lowered) else word
+            for word in window
+        ]
+        prefix = '...' if start else ''
+        suffix = '...' if start + SNIPPET_WORDS < len(words) else ''
+        return mark_snippet(prefix + ' '.join(marked) + suffix)
+
+    def get_against(self, tokens):
+        # every term required, the last one as a prefix
+        return ' '.join(f'+{token}' for token in tokens) + '*'
+
+    def match_sql(self, tokens, kind):
+        # (sql, params) selecting the ids of the matching rows, for a subquery
+        table, _, columns = MYSQL_INDEXES[kind]
+        return (
+            f"SELECT id FROM {table} WHERE MATCH ({', '.join(columns)}) AGAINST (%s IN BOOLEAN MODE)",
+            (self.get_against(tokens),),
+        )
+
+    def search(self, query, kind=None, limit=20):
+        tokens = get_tokens(query)
+        if not tokens:
+            return []
+
+        against = self.get_against(tokens)
+        results = []
+        for index_kind, (table, _, columns) in MYSQL_INDEXES.items():
+            if kind and kind != index_kind:
+                continue
+
+            course_column = 'id' if index_kind == 'course' else 'course_id'
+            match = f"MATCH ({', '.join(columns)}) AGAINST (%s IN BOOLEAN MODE)"
+            sql = (
+                f'SELECT id, {course_column}, {columns[0]}, {columns[1]}, {match} AS score '
+                f'FROM {table} WHERE {match} ORDER BY score DESC LIMIT %s'
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [against, against, limit])
+                for pk, course_id, title, body, score in cursor.fetchall():
+                    results.append({
+                        'type': index_kind,
+                        'id': pk,
+                        'course': course_id,
+                        'title': title,
+                        'snippet': self.make_snippet(body, tokens),
+                        'score': float(score),
+                    })
+
+        results.sort(key=lambda result: result['score'], reverse=True)
+        return results[:limit]
+
+
+def get_search_backend():
+    if connection.vendor == 'mysql':
+        return MySQLSearchBackend()
+    return SQLiteSearchBackend()
+
+def search(query, kind=None, limit=20):
+    return get_search_backend().search(query, kind=kind, limit=limit)
+
+def rebuild_index(chunk_size=500):
+    # returns the number of indexed courses and lessons
+    return get_search_backend().rebuild(chunk_size=chunk_size)
+
+
+class FullTextSearchFilter(SearchFilter):
+    """
+    `?search=` answered from the full-text index instead of LIKE '%term%'
+    scans. The view sets `search_kind` to 'course' or 'lesson'.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        tokens = get_tokens(request.query_params.get(self.search_param, ''))
+        if not tokens:
+            return queryset
+        # matched in the same query, so broad terms don't ship every id through Python
+        sql, params = get_search_backend().match_sql(tokens, view.search_kind)
+        return queryset.filter(pk__in=RawSQL(sql, params))
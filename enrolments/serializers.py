@@ -1,23 +1,21 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
+from accounts.serializers import EagerLoadingMixin
+from LearningMgtSystem.fieldsets import SparseFieldsMixin
 from instructors.serializers import InstructorSerializer
 from students.serializers import StudentSerializer
 from instructors.models import Instructor
 from students.models import Student
 
+from .models import Course, CourseCompletionBucket, CourseStats, Lesson, LessonVideo, Enrolment, ProgressEvent, VideoSession, get_progress
+from .progress import complete_lessons
 # to escape html tags
-import bleach
-
-from .models import Course, Lesson, LessonVideo, Enrolment, VideoSession
-
-
-# a list of tags to be allowed in lesson contents
-ALLOWED_TAGS = [
-    'p', 'br', 'strong', 'em', 'ul', 'ol', 'li', 'h1', 'h2', 'h3', 'h4', 'blockquote', 'code', 'pre'
-]
+from .sanitizers import sanitize_html
+from .stats import record_enrolled
 
-ALLOWED_ATTRIBUTES = {}
-
-class CourseSerializer(serializers.ModelSerializer):
+class CourseSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     instructor = serializers.PrimaryKeyRelatedField(queryset=Instructor.objects.all(), required=False)
 
     # set status as read only
@@ -44,7 +42,7 @@ class CourseSerializer(serializers.ModelSerializer):
             validated_data.pop('instructor', None)
         return super().update(instance, validated_data)
 
-class LessonSerializer(serializers.ModelSerializer):
+class LessonSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     course = serializers.PrimaryKeyRelatedField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
@@ -55,12 +53,8 @@ class LessonSerializer(serializers.ModelSerializer):
 
     # validate content to screen for html tags
     def validate_content(self, value):
-        return bleach.clean(
-            value,
-            tags=ALLOWED_TAGS,
-            attributes=ALLOWED_ATTRIBUTES,
-            strip=True
-        )
+        # Lesson.save recognises the cleaned output and won't parse it again
+        return sanitize_html(value)
 
     def validate(self, attrs):
         request = self.context.get('request')
@@ -83,7 +77,7 @@ class LessonSerializer(serializers.ModelSerializer):
             return lesson
         raise serializers.ValidationError('Only intructor can create lessons')
 
-class LessonVideoSerializer(serializers.ModelSerializer):
+class LessonVideoSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     lesson = serializers.PrimaryKeyRelatedField(queryset=Lesson.objects.all(), required=False)
 
     class Meta:
@@ -119,25 +113,35 @@ class LessonVideoSerializer(serializers.ModelSerializer):
             lesson_video = LessonVideo.objects.create(lesson=lesson, **validated_data)
             return lesson_video
 
-class EnrolmentSerializer(serializers.ModelSerializer):
+class EnrolmentSerializer(SparseFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer):
     student = StudentSerializer(read_only=True)
     course = serializers.PrimaryKeyRelatedField(queryset=Course.objects.all(), required=False)
 
+    # the lesson a PATCH completes, the next one in reading order if left out
+    lesson = serializers.PrimaryKeyRelatedField(
+        queryset=Lesson.objects.only('course_id', 'position'), write_only=True, required=False
+    )
+
+    # load the nested student -> user -> profile chain, and the course's lesson count, in a single query
+    select_related_fields = ['student__user__profile', 'course']
+    expandable_fields = ['student']
+    # percentage of the course's lessons completed, see Enrolment.progress
+    projected_fields = {
+        'progress': (['completed', 'course__lesson_count'], get_progress),
+    }
+
     # set as read only
     completed = serializers.IntegerField(read_only=True)
+    progress = serializers.FloatField(read_only=True)
     date_joined = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = Enrolment
-        fields = ['student', 'course', 'completed', 'date_joined']
+        fields = ['student', 'course', 'lesson', 'completed', 'progress', 'date_joined']
 
     def validate_course(self, value):
-        # validate the user isn't already enrolled
-        user = self.context['request'].user
-        student = getattr(user, 'student', None)
-
-        course = Course.objects.get(pk=value.pk)
-        if course.status == 'inactive':
+        # value is the Course already fetched by the related field
+        if value.status == 'inactive':
             raise serializers.ValidationError("Course is not active for enrolment.")
         return value
     
@@ -149,20 +153,212 @@ class EnrolmentSerializer(serializers.ModelSerializer):
         if request and request.method == 'POST':
             if student and Enrolment.objects.filter(student=student, course=attrs['course']).exists():
                 raise serializers.ValidationError("Already enrolled in this course.")
+            # a new enrolment has completed nothing yet
+            attrs.pop('lesson', None)
+
+        lesson = attrs.get('lesson')
+        if lesson is not None and self.instance is not None and lesson.course_id != self.instance.course_id:
+            raise serializers.ValidationError({'lesson': "This lesson does not belong to the course."})
 
         return attrs
     
-    # Make increment completed by 1
+    # Mark a lesson completed
     def update(self, instance, validated_data):
-
-        instance.completed += 1
-        instance.save()
+        lesson = validated_data.get('lesson')
+        # under a row lock so concurrent PATCHes don't lose each other's lessons
+        with transaction.atomic():
+            complete_lessons({instance.pk: [lesson.position if lesson else None]})
+            instance.refresh_from_db(fields=['lessons_done', 'completed', 'updated_at'])
         return instance
 
-class VideoSessionSerializer(serializers.ModelSerializer):
+class EnrolmentBulkRowSerializer(serializers.Serializer):
+    student = serializers.IntegerField(min_value=1)
+    course = serializers.IntegerField(min_value=1)
+
+class EnrolmentBulkCreateSerializer(serializers.Serializer):
+    enrolments = EnrolmentBulkRowSerializer(many=True, allow_empty=False)
+
+    # rows per INSERT statement
+    batch_size = 500
+
+    def create(self, validated_data):
+        rows = validated_data['enrolments']
+        student_ids = {row['student'] for row in rows}
+        course_ids = {row['course'] for row in rows}
+
+        # validate the whole batch with one query per table instead of per row
+        course_status = dict(Course.objects.filter(pk__in=course_ids).values_list('pk', 'status'))
+        known_students = set(Student.objects.filter(pk__in=student_ids).values_list('pk', flat=True))
+        enrolled = set(
+            Enrolment.objects.filter(student_id__in=student_ids, course_id__in=course_ids)
+            .values_list('student_id', 'course_id')
+        )
+
+        results = []
+        new_enrolments = []
+        for row in rows:
+            pair = (row['student'], row['course'])
+            result = {'student': row['student'], 'course': row['course'], 'status': 'error'}
+
+            if row['course'] not in course_status:
+                result['detail'] = 'Course not found.'
+            elif course_status[row['course']] == 'inactive':
+                result['detail'] = 'Course is not active for enrolment.'
+            elif row['student'] not in known_students:
+                result['detail'] = 'Student not found.'
+            elif pair in enrolled:
+                result['detail'] = 'Already enrolled in this course.'
+            else:
+                result['status'] = 'created'
+                # also catches the same pair sent twice in one request
+                enrolled.add(pair)
+                new_enrolments.append(Enrolment(student_id=row['student'], course_id=row['course']))
+
+            results.append(result)
+
+        try:
+            with transaction.atomic():
+                Enrolment.objects.bulk_create(new_enrolments, batch_size=self.batch_size)
+                # bulk_create sends no post_save
+                record_enrolled(new_enrolments)
+        except IntegrityError:
+            # a concurrent request enrolled one of the pairs after our check
+            raise serializers.ValidationError('Enrolments changed during the request, please retry.')
+
+        return {'created': len(new_enrolments), 'results': results}
+
+class ProgressEventSerializer(serializers.Serializer):
+    # one completed lesson in a course, recorded by the client
+    id = serializers.UUIDField()
+    course = serializers.IntegerField(min_value=1)
+    # the lesson, the next one in reading order if left out
+    lesson = serializers.IntegerField(min_value=1, required=False)
+
+class ProgressSyncSerializer(serializers.Serializer):
+    events = ProgressEventSerializer(many=True, allow_empty=False)
+
+    # attempts before giving up on a batch that races another upload
+    max_attempts = 2
+
+    def create(self, validated_data):
+        student = self.context['student']
+        events = validated_data['events']
+
+        # one query maps every course in the batch to the student's enrolment
+        course_ids = {event['course'] for event in events}
+        enrolment_ids = dict(
+            Enrolment.objects.filter(student=student, course_id__in=course_ids)
+            .values_list('course_id', 'pk')
+        )
+
+        for attempt in range(self.max_attempts):
+            try:
+                with transaction.atomic():
+                    return self.merge(events, enrolment_ids)
+            except IntegrityError:
+                # the same events were stored by a concurrent upload, replay against them
+                if attempt == self.max_attempts - 1:
+                    raise serializers.ValidationError('Progress changed during the sync, please retry.')
+
+    def merge(self, events, enrolment_ids):
+        event_ids = [event['id'] for event in events]
+        synced = set(ProgressEvent.objects.filter(event_id__in=event_ids).values_list('event_id', flat=True))
+
+        # (course, position) of the lessons named, in one query
+        lesson_ids = {event['lesson'] for event in events if 'lesson' in event}
+        lessons = {
+            pk: (course_id, position)
+            for pk, course_id, position in Lesson.objects.filter(pk__in=lesson_ids).values_list('pk', 'course_id', 'position')
+        }
+
+        results = []
+        new_events = []
+        completions = defaultdict(list)
+        for event in events:
+            result = {'id': event['id'], 'course': event['course']}
+            enrolment_id = enrolment_ids.get(event['course'])
+            lesson = lessons.get(event['lesson']) if 'lesson' in event else (event['course'], None)
+
+            if enrolment_id is None:
+                result.update(status='error', detail='Not enrolled in this course.')
+            elif lesson is None or lesson[0] != event['course']:
+                result.update(status='error', detail='Lesson not found in this course.')
+            elif event['id'] in synced:
+                result['status'] = 'duplicate'
+            else:
+                result['status'] = 'applied'
+                synced.add(event['id'])
+                new_events.append(ProgressEvent(event_id=event['id'], enrolment_id=enrolment_id))
+                completions[enrolment_id].append(lesson[1])
+
+            results.append(result)
+
+        if completions:
+            ProgressEvent.objects.bulk_create(new_events)
+            # sets the bits and moves the course stats, a lesson completed twice counts once
+            complete_lessons(completions)
+
+        progress = list(Enrolment.objects.filter(pk__in=enrolment_ids.values()).values('course', 'completed'))
+
+        return {
+            'applied': len(new_events),
+            'results': results,
+            'enrolments': progress,
+        }
+
+class CourseStatsSerializer(serializers.ModelSerializer):
+    average_completed = serializers.FloatField(read_only=True)
+    distribution = serializers.SerializerMethodField()
+    recent_signups = serializers.SerializerMethodField()
+
+    # sign-ups listed on the dashboard
+    recent_limit = 10
+
+    class Meta:
+        model = CourseStats
+        fields = [
+            'course', 'enrolment_count', 'average_completed', 'distribution',
+            'recent_signups', 'updated_at'
+        ]
+
+    def get_distribution(self, obj):
+        # how many enrolments completed how many lessons
+        buckets = CourseCompletionBucket.objects.filter(course_id=obj.course_id, count__gt=0).order_by('completed')
+        return [{'completed': bucket.completed, 'count': bucket.count} for bucket in buckets]
+
+    def get_recent_signups(self, obj):
+        # newest first, read from the (course, date_joined) index
+        enrolments = (
+            Enrolment.objects.filter(course_id=obj.course_id)
+            .select_related('student__user')
+            .order_by('-date_joined', '-id')[:self.recent_limit]
+        )
+        return [
+            {
+                'student': enrolment.student_id,
+                'name': f'{enrolment.student.user.first_name} {enrolment.student.user.last_name}',
+                'date_joined': serializers.DateTimeField().to_representation(enrolment.date_joined),
+            }
+            for enrolment in enrolments
+        ]
+
+class VideoSessionSerializer(SparseFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer):
     course = serializers.StringRelatedField(read_only=True)
     instructor = serializers.StringRelatedField(read_only=True)
     session_link = serializers.CharField(read_only=True)
+
+    # course title and instructor name are rendered for every session
+    select_related_fields = ['course', 'instructor__user']
+    expandable_fields = ['course', 'instructor']
+
+    # the same __str__ read from values() rows, for the list views' projection
+    projected_fields = {
+        'course': (['course__title'], str),
+        'instructor': (
+            ['instructor__user__first_name', 'instructor__user__last_name'], '{} {} (Instructor)'.format
+        ),
+    }
+
     class Meta:
         model = VideoSession
         fields = ['course', 'instructor', 'session_title', 'scheduled_time', 'session_link']
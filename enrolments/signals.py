@@ -0,0 +1,70 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from LearningMgtSystem.background import run_in_background
+from LearningMgtSystem.signals import bulk_changed
+
+from .cache import invalidate_catalog
+from .progress import remove_lesson
+from .search import get_search_backend
+from .stats import record_enrolled, record_progress, record_unenrolled
+
+
+# the course catalog renders courses and references their instructors
+@receiver(post_save, sender='enrolments.Course')
+@receiver(post_delete, sender='enrolments.Course')
+@receiver(bulk_changed, sender='enrolments.Course')
+@receiver(post_save, sender='instructors.Instructor')
+@receiver(post_delete, sender='instructors.Instructor')
+@receiver(bulk_changed, sender='instructors.Instructor')
+def invalidate_catalog_on_change(sender, **kwargs):
+    invalidate_catalog()
+
+
+# keep the full-text index in step with courses and lessons
+@receiver(post_save, sender='enrolments.Course')
+@receiver(post_save, sender='enrolments.Lesson')
+def index_on_save(sender, instance, **kwargs):
+    get_search_backend().index(instance)
+
+@receiver(post_delete, sender='enrolments.Course')
+@receiver(post_delete, sender='enrolments.Lesson')
+def unindex_on_delete(sender, instance, **kwargs):
+    get_search_backend().remove(sender._meta.model_name, [instance.pk])
+
+@receiver(bulk_changed, sender='enrolments.Course')
+@receiver(bulk_changed, sender='enrolments.Lesson')
+def index_on_bulk_change(sender, pks=None, **kwargs):
+    # MySQL's bulk_create doesn't return pks, its FULLTEXT index needs no help
+    pks = [pk for pk in pks or [] if pk is not None]
+    if not pks:
+        return
+    backend = get_search_backend()
+    found = set()
+    for obj in sender.objects.filter(pk__in=pks).iterator(chunk_size=500):
+        backend.index(obj)
+        found.add(obj.pk)
+    backend.remove(sender._meta.model_name, [pk for pk in pks if pk not in found])
+
+
+# course stats follow single-row enrolment writes; bulk paths call stats.py directly
+@receiver(post_save, sender='enrolments.Enrolment')
+def update_stats_on_enrolment_save(sender, instance, created, **kwargs):
+    if created:
+        record_enrolled([instance])
+    elif getattr(instance, '_stored_completed', None) is not None:
+        record_progress(instance.course_id, [(instance._stored_completed, instance.completed)])
+    instance._stored_completed = instance.completed
+
+@receiver(post_delete, sender='enrolments.Enrolment')
+def update_stats_on_enrolment_delete(sender, instance, **kwargs):
+    record_unenrolled([instance])
+
+
+# a deleted lesson leaves every bitmap of its course; when the whole course
+# is being deleted (the lesson isn't the origin) its enrolments go with it.
+# The delete runs inside the collector's transaction, so the bits are cleared
+# after it commits, letting each chunk commit on its own
+@receiver(post_delete, sender='enrolments.Lesson')
+def remove_lesson_progress_on_delete(sender, instance, origin=None, **kwargs):
+    if isinstance(origin, sender) or getattr(origin, 'model', None) is sender:
+        run_in_background(remove_lesson, instance.course_id, instance.position)
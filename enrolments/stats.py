@@ -0,0 +1,155 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Sum
+from django.utils import timezone
+
+from .models import CourseCompletionBucket, CourseStats, Enrolment
+
+
+def update_course_stats(course_id, enrolments=0, completed=0, buckets=None):
+    """
+    Add deltas to a course's running totals and completion buckets, with
+    F() expressions so concurrent writers don't overwrite each other.
+    Rows are only created for positive deltas: a decrement can arrive while
+    the course itself is being deleted.
+    """
+    buckets = {value: delta for value, delta in (buckets or {}).items() if delta}
+    changes = {
+        'enrolment_count': F('enrolment_count') + enrolments,
+        'completed_total': F('completed_total') + completed,
+        'updated_at': timezone.now(),
+    }
+
+    updated = CourseStats.objects.filter(course_id=course_id).update(**changes)
+    if not updated and enrolments > 0:
+        # first enrolment of the course: create the row, then apply the deltas
+        CourseStats.objects.bulk_create([CourseStats(course_id=course_id)], ignore_conflicts=True)
+        CourseStats.objects.filter(course_id=course_id).update(**changes)
+
+    new_buckets = [value for value, delta in buckets.items() if delta > 0]
+    if new_buckets:
+        CourseCompletionBucket.objects.bulk_create(
+            [CourseCompletionBucket(course_id=course_id, completed=value) for value in new_buckets],
+            ignore_conflicts=True
+        )
+    for value, delta in buckets.items():
+        CourseCompletionBucket.objects.filter(course_id=course_id, completed=value).update(count=F('count') + delta)
+
+def record_enrolled(enrolments):
+    # new enrolments, grouped into one update per course
+    by_course = defaultdict(list)
+    for enrolment in enrolments:
+        by_course[enrolment.course_id].append(enrolment)
+
+    for course_id, rows in by_course.items():
+        update_course_stats(
+            course_id,
+            enrolments=len(rows),
+            completed=sum(row.completed for row in rows),
+            buckets=Counter(row.completed for row in rows),
+        )
+
+def record_unenrolled(enrolments):
+    by_course = defaultdict(list)
+    for enrolment in enrolments:
+        by_course[enrolment.course_id].append(enrolment)
+
+    for course_id, rows in by_course.items():
+        buckets = Counter()
+        for row in rows:
+            buckets[row.completed] -= 1
+        update_course_stats(
+            course_id,
+            enrolments=-len(rows),
+            completed=-sum(row.completed for row in rows),
+            buckets=buckets,
+        )
+
+def record_progress(course_id, moves):
+    # moves: (old completed, new completed) for enrolments of one course
+    buckets = Counter()
+    completed = 0
+    for old, new in moves:
+        if old == new:
+            continue
+        buckets[old] -= 1
+        buckets[new] += 1
+        completed += new - old
+
+    if buckets:
+        update_course_stats(course_id, completed=completed, buckets=buckets)
+
+def compute_course_stats(course_ids):
+    """
+    Recompute totals and buckets for the given courses from the enrolment
+    table: ({course_id: (count, completed_total)},
+    {course_id: {completed: count}}).
+    """
+    totals = {
+        row['course_id']: (row['count'], row['completed_total'] or 0)
+        for row in Enrolment.objects.filter(course_id__in=course_ids).values('course_id').annotate(
+            count=Count('pk'), completed_total=Sum('completed')
+        ).order_by()
+    }
+
+    buckets = defaultdict(dict)
+    for row in (
+        Enrolment.objects.filter(course_id__in=course_ids).values('course_id', 'completed')
+        .annotate(count=Count('pk')).order_by()
+    ):
+        buckets[row['course_id']][row['completed']] = row['count']
+
+    return totals, buckets
+
+def reconcile_courses(course_ids):
+    """
+    Rewrite the stats of the given courses from the enrolment table and
+    return how many of them had drifted.
+    """
+    with transaction.atomic():
+        # live updates for these courses wait on the locked rows until we commit
+        stored = {
+            stats.course_id: stats
+            for stats in CourseStats.objects.select_for_update().filter(course_id__in=course_ids)
+        }
+        stored_buckets = defaultdict(dict)
+        for course_id, completed, count in (
+            CourseCompletionBucket.objects.filter(course_id__in=course_ids, count__gt=0)
+            .values_list('course_id', 'completed', 'count')
+        ):
+            stored_buckets[course_id][completed] = count
+
+        totals, buckets = compute_course_stats(course_ids)
+
+        drifted = 0
+        now = timezone.now()
+        new_rows, changed_rows = [], []
+        for course_id in course_ids:
+            expected = totals.get(course_id, (0, 0))
+            stats = stored.get(course_id)
+            if stats is None:
+                stats = CourseStats(course_id=course_id)
+                new_rows.append(stats)
+            else:
+                changed_rows.append(stats)
+
+            current = (stats.enrolment_count, stats.completed_total)
+            if current != expected or stored_buckets[course_id] != buckets.get(course_id, {}):
+                drifted += 1
+            stats.enrolment_count, stats.completed_total = expected
+            stats.updated_at = now
+
+        CourseStats.objects.bulk_create(new_rows, ignore_conflicts=True)
+        CourseStats.objects.bulk_update(
+            changed_rows, ['enrolment_count', 'completed_total', 'updated_at']
+        )
+
+        CourseCompletionBucket.objects.filter(course_id__in=course_ids).delete()
+        CourseCompletionBucket.objects.bulk_create([
+            CourseCompletionBucket(course_id=course_id, completed=completed, count=count)
+            for course_id, values in buckets.items()
+            for completed, count in values.items()
+        ])
+
+    return drifted
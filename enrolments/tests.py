@@ -1,11 +1,42 @@
+import io
+import time
+import uuid
+from datetime import timedelta
+from unittest import skipUnless
+from unittest.mock import patch
+
+from asgiref.sync import iscoroutinefunction
+from bleach.sanitizer import Cleaner
 from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 from django.contrib.auth import get_user_model
-from django.urls import reverse
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
 from django.utils import timezone
+from django.utils.http import http_date
 from instructors.models import Instructor
 from students.models import Student
-
-from .models import Course, Lesson, LessonVideo, Enrolment, VideoSession
+from accounts.models import UserProfile
+from LearningMgtSystem.projections import get_projection
+from LearningMgtSystem.queryplans import find_full_scans
+from LearningMgtSystem.replicas import ReplicaRouter, read_from_replica
+from LearningMgtSystem.testutils import LARGE_TESTS, make_instructor, make_many, make_student
+
+from .bitsets import clear_bit, count_bits, first_bits, has_bit, set_bit
+from .cache import get_catalog_stats, get_catalog_version
+from .deletion import delete_course, delete_student
+from .models import (
+    Course, CourseCompletionBucket, CourseStats, Lesson, LessonVideo, Enrolment, ProgressEvent, VideoSession
+)
+from .sanitizers import POLICY_VERSION
+from .search import FTS_TABLE, MySQLSearchBackend, search
+from .serializers import CourseSerializer, EnrolmentSerializer, LessonSerializer
+from .stats import compute_course_stats
 
 
 User = get_user_model()
@@ -1094,3 +1125,1474 @@ class VideoSessionTest(APITestCase):
         self.assertEqual(response1.status_code, 201)
         self.assertEqual(response2.status_code, 204)
         self.assertEqual(bad_response.status_code, 401)
+
+class EnrolmentQueryCountTest(APITestCase):
+    def setUp(self):
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+
+        self.course = Course.objects.create(title='Sample Course', instructor=make_instructor(), status='active')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superadmin)
+        self.seeded = 0
+
+    def seed_enrolments(self, total):
+        # enrolled students up to the total count
+        start, self.seeded = self.seeded, total
+        Enrolment.objects.bulk_create([
+            Enrolment(student=student, course=self.course) for student in make_many('student', start, total)
+        ], batch_size=1000)
+
+    def check_query_counts(self, total):
+        self.seed_enrolments(total)
+        last_page = (total + 9) // 10
+
+        # one COUNT plus one joined SELECT, whatever the number of rows
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('enrolement_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], total)
+        self.assertEqual(len(response.data['results']), 10)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('enrolement_list'), {'page': last_page})
+        self.assertEqual(response.status_code, 200)
+
+        # keyset mode skips the COUNT and seeks from the cursor, page after page
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('enrolement_list'), {'pagination': 'keyset'})
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 10)
+
+        if total > 10:
+            first_page = response.data['results']
+            with self.assertNumQueries(1):
+                response = self.client.get(response.data['next'])
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.data['results'], first_page)
+
+        enrolment = Enrolment.objects.order_by('-id').first()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('enrolement_detail', args=(enrolment.id,)))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['student']['user']['profile']['role'], 'student')
+
+    def test_list_and_detail_query_count(self):
+        for total in (10, 1000):
+            self.check_query_counts(total)
+
+    @skipUnless(LARGE_TESTS, 'set LARGE_TESTS=1 to seed 100,000 rows')
+    def test_query_count_on_a_large_table(self):
+        self.check_query_counts(100000)
+
+
+class EnrolmentBulkCreateTest(APITestCase):
+    def setUp(self):
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+
+        # one active and one inactive course
+        courses = []
+        for i, course_status in enumerate(['active', 'inactive']):
+            instructor = make_instructor(f'instructor{i}')
+            courses.append(Course.objects.create(title=f'Course {i}', instructor=instructor, status=course_status))
+        self.course, self.inactive_course = courses
+
+        self.student_ids = [student.pk for student in make_many('student', 0, 5000)]
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superadmin)
+        self.url = reverse('enrolement_bulk_create')
+
+    def test_bulk_enrolment(self):
+        data = {
+            'enrolments': [{'student': student_id, 'course': self.course.id} for student_id in self.student_ids]
+        }
+
+        # a handful of set-based queries plus batched inserts, not a few per row
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, data=data, format='json')
+        self.assertLess(len(queries), 50)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 5000)
+        self.assertEqual(Enrolment.objects.filter(course=self.course).count(), 5000)
+        self.assertTrue(all(row['status'] == 'created' for row in response.data['results']))
+
+    def test_bulk_enrolment_row_errors(self):
+        first, second = self.student_ids[:2]
+        Enrolment.objects.create(student_id=first, course=self.course)
+
+        data = {
+            'enrolments': [
+                {'student': first, 'course': self.course.id},
+                {'student': second, 'course': self.course.id},
+                {'student': second, 'course': self.course.id},
+                {'student': second, 'course': self.inactive_course.id},
+                {'student': second, 'course': 999999},
+                {'student': 999999, 'course': self.course.id},
+            ]
+        }
+
+        response = self.client.post(self.url, data=data, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 1)
+        self.assertEqual(
+            [(row['status'], row.get('detail')) for row in response.data['results']],
+            [
+                ('error', 'Already enrolled in this course.'),
+                ('created', None),
+                ('error', 'Already enrolled in this course.'),
+                ('error', 'Course is not active for enrolment.'),
+                ('error', 'Course not found.'),
+                ('error', 'Student not found.'),
+            ]
+        )
+
+    def test_bulk_enrolment_admin_only(self):
+        self.client = APIClient()
+        response = self.client.post(self.url, data={'enrolments': []}, format='json')
+
+        self.assertEqual(response.status_code, 401)
+
+class EnrolmentProgressSyncTest(APITestCase):
+    def setUp(self):
+        courses = []
+        for i in range(3):
+            instructor = make_instructor(f'instructor{i}')
+            courses.append(Course.objects.create(title=f'Course {i}', instructor=instructor, status='active'))
+        self.course1, self.course2, self.other_course = courses
+        for course in courses:
+            for order in range(4):
+                Lesson.objects.create(course=course, title=f'Lesson {order}', content='<p>Intro</p>', order=order)
+
+        self.student = make_student()
+        Enrolment.objects.create(student=self.student, course=self.course1)
+        Enrolment.objects.create(student=self.student, course=self.course2)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student.user)
+        self.url = reverse('enrolement_sync')
+
+    def test_sync_merges_batch(self):
+        events = [{'id': str(uuid.uuid4()), 'course': self.course1.id} for _ in range(3)]
+        events += [{'id': str(uuid.uuid4()), 'course': self.course2.id}]
+        events += [{'id': str(uuid.uuid4()), 'course': self.other_course.id}]
+
+        response = self.client.post(self.url, data={'events': events}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['applied'], 4)
+        self.assertEqual(
+            [row['status'] for row in response.data['results']],
+            ['applied', 'applied', 'applied', 'applied', 'error']
+        )
+        self.assertEqual(Enrolment.objects.get(course=self.course1).completed, 3)
+        self.assertEqual(Enrolment.objects.get(course=self.course2).completed, 1)
+
+    def test_sync_is_idempotent(self):
+        events = [{'id': str(uuid.uuid4()), 'course': self.course1.id} for _ in range(2)]
+
+        self.client.post(self.url, data={'events': events}, format='json')
+
+        # the client reconnects and uploads the same events plus a new one
+        events.append({'id': str(uuid.uuid4()), 'course': self.course1.id})
+        events.append(events[-1])
+        response = self.client.post(self.url, data={'events': events}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['applied'], 1)
+        self.assertEqual(
+            [row['status'] for row in response.data['results']],
+            ['duplicate', 'duplicate', 'applied', 'duplicate']
+        )
+        self.assertEqual(Enrolment.objects.get(course=self.course1).completed, 3)
+        self.assertIn({'course': self.course1.id, 'completed': 3}, response.data['enrolments'])
+
+    def test_sync_requires_authentication(self):
+        self.client = APIClient()
+        response = self.client.post(self.url, data={'events': []}, format='json')
+
+        self.assertEqual(response.status_code, 401)
+
+class LessonSanitizationTest(APITestCase):
+    def setUp(self):
+        instructor = make_instructor()
+        self.course = Course.objects.create(title='Sample Course', instructor=instructor, status='active')
+
+        # unique content per test so earlier runs haven't memoized it
+        self.content = f'<h1>Lesson {uuid.uuid4()}</h1><script>alert(1)</script><p onclick="x()">text</p>'
+
+    def test_save_cleans_and_records_policy(self):
+        lesson = Lesson.objects.create(course=self.course, title='Sample Lesson', content=self.content)
+        lesson.refresh_from_db()
+
+        self.assertNotIn('<script>', lesson.content)
+        self.assertNotIn('onclick', lesson.content)
+        self.assertEqual(lesson.content_policy, POLICY_VERSION)
+
+    def test_serializer_and_save_clean_once(self):
+        with patch.object(Cleaner, 'clean', autospec=True, side_effect=Cleaner.clean) as clean:
+            content = LessonSerializer().validate_content(self.content)
+            Lesson.objects.create(course=self.course, title='Sample Lesson', content=content)
+
+        self.assertEqual(clean.call_count, 1)
+
+    def test_unchanged_content_is_not_cleaned_again(self):
+        Lesson.objects.create(course=self.course, title='Sample Lesson', content=self.content)
+        lesson = Lesson.objects.get(title='Sample Lesson')
+
+        with patch.object(Cleaner, 'clean', autospec=True, side_effect=Cleaner.clean) as clean:
+            lesson.title = 'Renamed Lesson'
+            lesson.save()
+
+        self.assertEqual(clean.call_count, 0)
+
+    def test_older_policy_is_cleaned_again(self):
+        lesson = Lesson.objects.create(course=self.course, title='Sample Lesson', content=self.content)
+        Lesson.objects.filter(pk=lesson.pk).update(content_policy=POLICY_VERSION - 1, content=f'{lesson.content}<b>x</b>')
+        lesson = Lesson.objects.get(pk=lesson.pk)
+
+        with patch.object(Cleaner, 'clean', autospec=True, side_effect=Cleaner.clean) as clean:
+            lesson.save()
+
+        self.assertEqual(clean.call_count, 1)
+        self.assertNotIn('<b>', lesson.content)
+        self.assertEqual(lesson.content_policy, POLICY_VERSION)
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+
+        instructor = make_instructor()
+        self.course = Course.objects.create(title='Sample Course', instructor=instructor, status='active')
+
+        student = make_student()
+        self.profile = student.user.profile
+        self.enrolment = Enrolment.objects.create(student=student, course=self.course)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superadmin)
+
+    def test_retrieve_etag(self):
+        url = reverse('course_detail', args=(self.course.id,))
+        response = self.client.get(url)
+        etag = response['ETag']
+
+        # a matching copy is answered without serializing
+        with patch.object(CourseSerializer, 'to_representation') as to_representation:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        to_representation.assert_not_called()
+
+        self.course.title = 'Updated Sample Course'
+        self.course.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_retrieve_last_modified(self):
+        url = reverse('course_detail', args=(self.course.id,))
+        response = self.client.get(url)
+
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+        Course.objects.filter(pk=self.course.pk).update(updated_at=timezone.now() + timedelta(seconds=5))
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time()))
+        self.assertEqual(response.status_code, 200)
+
+    def test_enrolment_etag_follows_student(self):
+        url = reverse('enrolement_detail', args=(self.enrolment.id,))
+        etag = self.client.get(url)['ETag']
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # the nested profile changed, so the enrolment representation did too
+        self.profile.bio = 'Updated bio'
+        self.profile.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Updated bio')
+
+    def test_login_keeps_versions_and_catalog(self):
+        instructor = self.course.instructor
+        before = Instructor.objects.get(pk=instructor.pk).updated_at
+        catalog = get_catalog_version()
+
+        # a login saves last_login only, which nothing renders
+        instructor.user.last_login = timezone.now()
+        instructor.user.save(update_fields=['last_login'])
+        self.assertEqual(Instructor.objects.get(pk=instructor.pk).updated_at, before)
+
+        # a rename moves the instructor's version, without dropping the catalog
+        instructor.user.first_name = 'Renamed'
+        instructor.user.save(update_fields=['first_name'])
+        self.assertGreater(Instructor.objects.get(pk=instructor.pk).updated_at, before)
+        self.assertEqual(get_catalog_version(), catalog)
+
+    def test_list_etag(self):
+        url = reverse('enrolement_list')
+        etag = self.client.get(url)['ETag']
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # other query parameters are a different representation
+        response = self.client.get(url, {'pagination': 'keyset'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        self.enrolment.delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+class CatalogCacheTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+
+        self.instructor = make_instructor()
+        self.course = Course.objects.create(title='Sample Course', instructor=self.instructor, status='active')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superadmin)
+        self.url = reverse('course_list')
+
+    def assertCached(self, params=None):
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, params)
+        self.assertEqual(response['X-Catalog-Cache'], 'hit')
+        return response
+
+    def assertNotCached(self, params=None):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response['X-Catalog-Cache'], 'miss')
+        return response
+
+    def test_hits_and_misses(self):
+        first = self.assertNotCached()
+        second = self.assertCached()
+        self.assertEqual(first.data, second.data)
+
+        # different search/page parameters are different pages
+        self.assertNotCached({'search': 'Sample'})
+        self.assertCached({'search': 'Sample'})
+
+        self.assertEqual(get_catalog_stats(), {'hits': 2, 'misses': 2})
+
+    def test_cached_page_answers_conditional_get(self):
+        etag = self.assertNotCached()['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_lesson_writes_keep_the_catalog(self):
+        # the lesson counters on the course row are not catalog changes
+        self.assertNotCached()
+        with self.captureOnCommitCallbacks(execute=True):
+            lesson = Lesson.objects.create(course=self.course, title='Intro', content='<p>Intro</p>')
+            Lesson.objects.bulk_create([Lesson(course=self.course, title='More', content='<p>More</p>')])
+            lesson.delete()
+        self.assertCached()
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.lesson_count, self.course.lesson_positions), (1, 2))
+
+    def test_api_write_invalidates(self):
+        self.assertNotCached()
+
+        self.client.patch(reverse('course_update', kwargs={'pk': self.course.pk}), data={'title': 'Renamed'}, format='json')
+
+        response = self.assertNotCached()
+        self.assertContains(response, 'Renamed')
+
+    def test_model_save_and_delete_invalidate(self):
+        # admin and shell writes go through save()/delete()
+        self.assertNotCached()
+        self.course.description = 'Updated'
+        self.course.save()
+        self.assertNotCached()
+
+        self.instructor.status = 'deactivated'
+        self.instructor.save()
+        self.assertNotCached()
+
+        self.course.delete()
+        response = self.assertNotCached()
+        self.assertEqual(response.data['count'], 0)
+
+    def test_bulk_writes_invalidate(self):
+        self.assertNotCached()
+        Course.objects.filter(pk=self.course.pk).update(title='Bulk Renamed')
+        self.assertContains(self.assertNotCached(), 'Bulk Renamed')
+
+        self.course.title = 'Bulk Updated'
+        Course.objects.bulk_update([self.course], ['title'])
+        self.assertContains(self.assertNotCached(), 'Bulk Updated')
+
+        instructor = make_instructor('other_instructor')
+        Course.objects.bulk_create([Course(title='Bulk Created', instructor=instructor, status='active')])
+        self.assertContains(self.assertNotCached(), 'Bulk Created')
+
+        Instructor.objects.filter(pk=self.instructor.pk).update(status='deactivated')
+        self.assertNotCached()
+
+
+class SearchTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+
+        courses = [
+            ('Python Basics', 'Variables, loops and functions for beginners'),
+            ('Web Development', 'Building APIs with Django and Python'),
+        ]
+        self.courses = []
+        for i, (title, description) in enumerate(courses):
+            instructor = make_instructor(f'instructor{i}')
+            self.courses.append(
+                Course.objects.create(title=title, description=description, instructor=instructor, status='active')
+            )
+
+        self.lesson = Lesson.objects.create(
+            course=self.courses[1],
+            title='Serializers',
+            content='<p>Django REST framework <strong>serializers</strong> turn models into JSON.</p>',
+            order=1
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superadmin)
+        self.url = reverse('search')
+
+    def test_ranked_results_with_snippets(self):
+        response = self.client.get(self.url, {'q': 'python'})
+        self.assertEqual(response.status_code, 200)
+
+        results = response.data['results']
+        # a title match outranks a description match
+        self.assertEqual([(r['type'], r['id']) for r in results], [('course', self.courses[0].id), ('course', self.courses[1].id)])
+        self.assertIn('<mark>Python</mark>', results[1]['snippet'])
+
+    def test_lesson_content_is_indexed_without_markup(self):
+        results = search('models json', kind='lesson')
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['course'], self.courses[1].id)
+        self.assertNotIn('<strong>', results[0]['snippet'])
+
+    def test_snippets_are_escaped(self):
+        course = self.courses[0]
+        course.description = '<img src=x onerror=alert(1)> Python for <b>everyone</b> &lt;script&gt;'
+        course.save()
+
+        results = search('everyone', kind='course')
+        self.assertEqual(len(results), 1)
+        snippet = results[0]['snippet']
+        self.assertIn('<mark>everyone</mark>', snippet)
+        self.assertNotIn('<img', snippet)
+        self.assertNotIn('<b>', snippet)
+        # descriptions are plain text: an entity typed into one stays as typed
+        self.assertIn('&amp;lt;script&amp;gt;', snippet)
+
+        # the MySQL backend builds its snippets in Python, the same way
+        snippet = MySQLSearchBackend().make_snippet('<i>x</i> 1 < 2 & everyone <script>alert(1)</script>', ['everyone'])
+        self.assertEqual(snippet, '...1 &lt; 2 &amp; <mark>everyone</mark> alert(1)')
+
+    def test_prefix_and_stemming(self):
+        self.assertEqual(len(search('serial', kind='lesson')), 1)
+        self.assertEqual(len(search('building', kind='course')), 1)
+        self.assertEqual(len(search('build', kind='course')), 1)
+
+    def test_query_syntax_is_ignored(self):
+        response = self.client.get(self.url, {'q': '"python (*'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+
+        response = self.client.get(self.url, {'q': '***'})
+        self.assertEqual(response.data['results'], [])
+
+    def test_type_and_limit(self):
+        response = self.client.get(self.url, {'q': 'django', 'type': 'lesson'})
+        self.assertEqual([r['type'] for r in response.data['results']], ['lesson'])
+
+        response = self.client.get(self.url, {'q': 'python', 'limit': 1})
+        self.assertEqual(len(response.data['results']), 1)
+
+        response = self.client.get(self.url, {'q': 'python', 'type': 'video'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_index_follows_writes(self):
+        course = self.courses[0]
+        course.title = 'Rust Basics'
+        course.save()
+        self.assertEqual([r['id'] for r in search('rust')], [course.id])
+
+        Course.objects.filter(pk=course.pk).update(description='Ownership and borrowing')
+        self.assertEqual([r['id'] for r in search('borrowing')], [course.id])
+
+        Lesson.objects.bulk_create([Lesson(course=course, title='Traits', content='<p>Generics</p>', order=1)])
+        self.assertEqual(len(search('generics')), 1)
+
+        # deleting the course cascades to its lessons
+        course.delete()
+        self.assertEqual(search('rust'), [])
+        self.assertEqual(search('generics'), [])
+
+        self.lesson.delete()
+        self.assertEqual(search('serializers'), [])
+
+    def test_course_list_search_uses_index(self):
+        url = reverse('course_list')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'search': 'python'})
+        self.assertEqual(response.data['count'], 2)
+        self.assertFalse(any('LIKE' in query['sql'] for query in queries))
+        # the index is matched in a subquery of the page's own queries
+        self.assertEqual(len(queries), 2)
+        self.assertTrue(all(FTS_TABLE in query['sql'] for query in queries))
+
+        response = self.client.get(url, {'search': 'beginners'})
+        self.assertEqual([c['title'] for c in response.data['results']], ['Python Basics'])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        self.assertEqual(search('python'), [])
+
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(len(search('python')), 2)
+        self.assertEqual(len(search('serializers')), 1)
+
+
+class AsyncReadViewTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+        self.token = str(AccessToken.for_user(self.superadmin))
+
+        for i in range(12):
+            instructor = make_instructor(f'instructor{i}')
+            course = Course.objects.create(title=f'Course {i:02}', instructor=instructor, status='active')
+            lesson = Lesson.objects.create(course=course, title=f'Lesson {i}', content='<p>Intro</p>', order=1)
+            LessonVideo.objects.create(lesson=lesson, url='https://example.com/video.mp4', title='Video', order=1)
+            VideoSession.objects.create(
+                course=course,
+                instructor=instructor,
+                session_title=f'Session {i}',
+                scheduled_time=timezone.now() + timedelta(days=i),
+                session_link='https://meet.jit.si/session'
+            )
+
+            student = make_student(f'student{i}')
+            Enrolment.objects.create(student=student, course=course)
+
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    async def get_async(self, url, params=None, token=True):
+        headers = {'Authorization': f'Bearer {self.token}'} if token else {}
+        return await self.async_client.get(url, params or {}, headers=headers)
+
+    async def test_views_are_async(self):
+        for name in ('async_course_list', 'async_enrolement_list', 'async_session_list'):
+            self.assertTrue(iscoroutinefunction(resolve(reverse(name)).func))
+
+    async def test_list_and_detail_match_sync_views(self):
+        endpoints = [
+            ('course_list', 'async_course_list', 'course_detail', 'async_course_detail', Course),
+            ('lesson_list', 'async_lesson_list', 'lesson_detail', 'async_lesson_detail', Lesson),
+            ('lesson_video_list', 'async_lesson_video_list', 'lesson_video_detail', 'async_lesson_video_detail', LessonVideo),
+            ('enrolement_list', 'async_enrolement_list', 'enrolement_detail', 'async_enrolement_detail', Enrolment),
+            ('session_list', 'async_session_list', 'session_detail', 'async_session_detail', VideoSession),
+        ]
+        for sync_list, async_list, sync_detail, async_detail, model in endpoints:
+            for page in (1, 2):
+                expected = (await self.async_client.get(reverse(sync_list), {'page': page}, headers={'Authorization': f'Bearer {self.token}'})).json()
+                response = await self.get_async(reverse(async_list), {'page': page})
+                self.assertEqual(response.status_code, 200)
+                data = response.json()
+
+                self.assertEqual(data['count'], expected['count'])
+                self.assertEqual(data['results'], expected['results'])
+                self.assertEqual(bool(data['next']), bool(expected['next']))
+                self.assertEqual(bool(data['previous']), bool(expected['previous']))
+
+            pk = (await model.objects.afirst()).pk
+            expected = (await self.async_client.get(reverse(sync_detail, args=[pk]), headers={'Authorization': f'Bearer {self.token}'})).json()
+            response = await self.get_async(reverse(async_detail, args=[pk]))
+            self.assertEqual(response.json(), expected)
+
+    async def test_page_links(self):
+        data = (await self.get_async(reverse('async_course_list'))).json()
+        self.assertIsNone(data['previous'])
+        self.assertTrue(data['next'].endswith('?page=2'))
+
+        data = (await self.get_async(reverse('async_course_list'), {'page': 2})).json()
+        self.assertIsNone(data['next'])
+        self.assertFalse('page=' in data['previous'])
+
+        response = await self.get_async(reverse('async_course_list'), {'page': 3})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'Invalid page.'})
+
+    async def test_authentication_and_not_found(self):
+        response = await self.get_async(reverse('async_course_list'), token=False)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('Bearer', response['WWW-Authenticate'])
+
+        response = await self.async_client.get(reverse('async_course_list'), headers={'Authorization': 'Bearer nope'})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()['code'], 'token_not_valid')
+
+        response = await self.get_async(reverse('async_course_detail', args=[999999]))
+        self.assertEqual(response.status_code, 404)
+
+    async def test_read_only(self):
+        response = await self.async_client.post(reverse('async_course_list'), {}, headers={'Authorization': f'Bearer {self.token}'})
+        self.assertEqual(response.status_code, 405)
+
+
+class CourseStatsTest(APITestCase):
+    def setUp(self):
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+
+        self.courses = []
+        for i in range(2):
+            instructor = make_instructor(f'instructor{i}')
+            self.courses.append(Course.objects.create(title=f'Course {i}', instructor=instructor, status='active'))
+        self.course = self.courses[0]
+        Lesson.objects.bulk_create([
+            Lesson(course=self.course, title=f'Lesson {order}', content='<p>Intro</p>', order=order) for order in range(6)
+        ])
+
+        self.students = []
+        for i in range(4):
+            self.students.append(make_student(f'student{i}'))
+
+        self.client = APIClient()
+
+    def assertStatsMatch(self, course):
+        # the running totals equal a full recount
+        totals, buckets = compute_course_stats([course.pk])
+
+        stats = CourseStats.objects.filter(course=course).first()
+        stored = (stats.enrolment_count, stats.completed_total) if stats else (0, 0)
+        self.assertEqual(stored, totals.get(course.pk, (0, 0)))
+
+        stored = dict(
+            CourseCompletionBucket.objects.filter(course=course, count__gt=0).values_list('completed', 'count')
+        )
+        self.assertEqual(stored, buckets.get(course.pk, {}))
+        return stats
+
+    def test_stats_follow_every_write_path(self):
+        # single enrolments through the API
+        for student in self.students[:2]:
+            self.client.force_authenticate(user=student.user)
+            response = self.client.post(reverse('enrolement_create'), {'course': self.course.pk}, format='json')
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.assertStatsMatch(self.course).enrolment_count, 2)
+
+        # PATCH progress
+        enrolment = Enrolment.objects.get(student=self.students[1], course=self.course)
+        for _ in range(2):
+            response = self.client.patch(reverse('enrolement_update', args=[enrolment.pk]), {'course': self.course.pk}, format='json')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.assertStatsMatch(self.course).completed_total, 2)
+
+        # offline progress sync
+        events = [{'id': str(uuid.uuid4()), 'course': self.course.pk} for _ in range(3)]
+        self.client.post(reverse('enrolement_sync'), {'events': events}, format='json')
+        self.assertEqual(self.assertStatsMatch(self.course).completed_total, 5)
+
+        # admin bulk enrolment
+        self.client.force_authenticate(user=self.superadmin)
+        rows = [{'student': student.pk, 'course': course.pk} for student in self.students[2:] for course in self.courses]
+        self.client.post(reverse('enrolement_bulk_create'), {'enrolments': rows}, format='json')
+        self.assertEqual(self.assertStatsMatch(self.course).enrolment_count, 4)
+        self.assertEqual(self.assertStatsMatch(self.courses[1]).enrolment_count, 2)
+
+        # model saves and deletes, including cascades
+        enrolment = Enrolment.objects.get(student=self.students[2], course=self.course)
+        enrolment.completed = 7
+        enrolment.save()
+        self.assertStatsMatch(self.course)
+
+        enrolment.delete()
+        self.students[1].delete()
+        stats = self.assertStatsMatch(self.course)
+        self.assertEqual((stats.enrolment_count, stats.completed_total), (2, 0))
+
+    def test_endpoint(self):
+        Enrolment.objects.create(student=self.students[0], course=self.course, completed=2)
+        Enrolment.objects.create(student=self.students[1], course=self.course, completed=2)
+        Enrolment.objects.create(student=self.students[2], course=self.course, completed=5)
+
+        self.client.force_authenticate(user=self.course.instructor.user)
+        url = reverse('course_stats', args=[self.course.pk])
+
+        # stats row, buckets and recent sign-ups, however many enrolments there are
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['enrolment_count'], 3)
+        self.assertEqual(response.data['average_completed'], 3)
+        self.assertEqual(response.data['distribution'], [{'completed': 2, 'count': 2}, {'completed': 5, 'count': 1}])
+        self.assertEqual([row['student'] for row in response.data['recent_signups']], [
+            self.students[2].pk, self.students[1].pk, self.students[0].pk
+        ])
+
+        # another instructor's course, and a course without enrolments
+        response = self.client.get(reverse('course_stats', args=[self.courses[1].pk]))
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_authenticate(user=self.superadmin)
+        response = self.client.get(reverse('course_stats', args=[self.courses[1].pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['enrolment_count'], response.data['distribution']), (0, []))
+        self.assertEqual(self.client.get(reverse('course_stats', args=[999999])).status_code, 404)
+
+        self.client.force_authenticate(user=self.students[0].user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+    def test_reconcile_command(self):
+        for student in self.students:
+            Enrolment.objects.create(student=student, course=self.course, completed=1)
+
+        # drift the stored totals as a missed update would
+        CourseStats.objects.filter(course=self.course).update(enrolment_count=1, completed_total=0)
+        CourseCompletionBucket.objects.filter(course=self.course).delete()
+
+        out = io.StringIO()
+        call_command('reconcile_course_stats', workers=1, chunk_size=1, stdout=out)
+        self.assertIn('2 courses, 1 had drifted', out.getvalue())
+        stats = self.assertStatsMatch(self.course)
+        self.assertEqual((stats.enrolment_count, stats.completed_total), (4, 4))
+
+
+class DeletionTest(APITestCase):
+    def setUp(self):
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+
+        self.courses = []
+        for i in range(2):
+            instructor = make_instructor(f'instructor{i}')
+            course = Course.objects.create(title=f'Course {i}', instructor=instructor, status='active')
+            self.courses.append(course)
+
+            for j in range(3):
+                lesson = Lesson.objects.create(course=course, title=f'Lesson {j} of course {i}', content='<p>Python</p>')
+                LessonVideo.objects.create(lesson=lesson, url='https://example.com/video.mp4')
+            VideoSession.objects.create(
+                course=course, instructor=instructor, session_title='Kick-off', scheduled_time=timezone.now()
+            )
+
+        # every student takes both courses
+        self.students = []
+        for i in range(5):
+            student = make_student(f'student{i}')
+            self.students.append(student)
+            for course in self.courses:
+                enrolment = Enrolment.objects.create(student=student, course=course, completed=i)
+                ProgressEvent.objects.create(event_id=uuid.uuid4(), enrolment=enrolment)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superadmin)
+
+    def test_delete_course(self):
+        course, other = self.courses
+        # the Collector would build an instance of every enrolment and lesson
+        with patch.object(Enrolment, 'from_db') as enrolment_from_db, patch.object(Lesson, 'from_db') as lesson_from_db:
+            delete_course(course.pk, chunk_size=2)
+        enrolment_from_db.assert_not_called()
+        lesson_from_db.assert_not_called()
+
+        self.assertFalse(Course.objects.filter(pk=course.pk).exists())
+        for model in (Enrolment, Lesson, VideoSession):
+            self.assertFalse(model.objects.filter(course=course).exists())
+        self.assertFalse(LessonVideo.objects.filter(lesson__course=course).exists())
+        self.assertFalse(ProgressEvent.objects.filter(enrolment__course=course).exists())
+        self.assertFalse(CourseStats.objects.filter(course_id=course.pk).exists())
+
+        # the other course is untouched, in the search index too
+        self.assertEqual(Enrolment.objects.filter(course=other).count(), 5)
+        self.assertEqual(ProgressEvent.objects.count(), 5)
+        self.assertEqual(LessonVideo.objects.count(), 3)
+        self.assertEqual(
+            {result['course'] for result in search('lesson', limit=10, kind='lesson')}, {other.pk}
+        )
+
+    def test_delete_course_endpoint(self):
+        # prime the catalog cache, the deleted course must drop out of it
+        self.client.get(reverse('course_list'))
+
+        response = self.client.delete(reverse('course_delete', args=[self.courses[0].pk]))
+        self.assertEqual(response.status_code, 204)
+        titles = [course['title'] for course in self.client.get(reverse('course_list')).data['results']]
+        self.assertEqual(titles, ['Course 1'])
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_async_delete(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            response = self.client.delete(reverse('course_delete', args=[self.courses[0].pk]) + '?async=1')
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(Course.objects.filter(pk=self.courses[0].pk).exists())
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(Course.objects.filter(pk=self.courses[0].pk).exists())
+
+    def test_delete_student_updates_stats(self):
+        student = self.students[4]
+        delete_student(student.pk, chunk_size=1)
+
+        self.assertFalse(User.objects.filter(pk=student.user_id).exists())
+        self.assertFalse(UserProfile.objects.filter(user_id=student.user_id).exists())
+        self.assertFalse(Enrolment.objects.filter(student_id=student.pk).exists())
+        self.assertEqual(ProgressEvent.objects.count(), 8)
+
+        totals, buckets = compute_course_stats([course.pk for course in self.courses])
+        for course in self.courses:
+            stats = CourseStats.objects.get(course=course)
+            self.assertEqual((stats.enrolment_count, stats.completed_total), totals[course.pk])
+            self.assertEqual((stats.enrolment_count, stats.completed_total), (4, 6))
+            self.assertEqual(
+                dict(CourseCompletionBucket.objects.filter(course=course, count__gt=0).values_list('completed', 'count')),
+                buckets[course.pk]
+            )
+
+    def test_delete_instructor_endpoint(self):
+        instructor = self.courses[0].instructor
+        response = self.client.delete(reverse('instructor_delete', args=[instructor.pk]))
+        self.assertEqual(response.status_code, 200)
+
+        self.assertFalse(User.objects.filter(pk=instructor.user_id).exists())
+        self.assertFalse(Course.objects.filter(pk=self.courses[0].pk).exists())
+        self.assertFalse(VideoSession.objects.filter(instructor_id=instructor.pk).exists())
+        self.assertEqual(Enrolment.objects.count(), 5)
+
+        response = self.client.delete(reverse('student_delete', args=[self.students[0].pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Enrolment.objects.count(), 4)
+
+
+
+class QueryPlanTest(APITestCase):
+    def setUp(self):
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+
+        self.courses = []
+        for i in range(4):
+            instructor = make_instructor(f'instructor{i}')
+            course = Course.objects.create(
+                title=f'Course {i}', instructor=instructor, status='active' if i % 2 else 'inactive'
+            )
+            self.courses.append(course)
+
+            for j in range(3):
+                lesson = Lesson.objects.create(course=course, title=f'Lesson {j}', content='<p>Python</p>', order=j)
+                LessonVideo.objects.create(lesson=lesson, url='https://example.com/video.mp4')
+            VideoSession.objects.create(
+                course=course, instructor=instructor, session_title='Kick-off', scheduled_time=timezone.now()
+            )
+
+            student = make_student(f'student{i}')
+            Enrolment.objects.create(student=student, course=course)
+
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superadmin)
+
+    def assertNoFullScans(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+
+        selects = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('SELECT')]
+        self.assertTrue(selects, url)
+        for sql in selects:
+            self.assertEqual(find_full_scans(sql), [], f'{url}: {sql}')
+
+    def test_list_endpoints_use_indexes(self):
+        course = self.courses[1]
+        lesson = course.lesson.first()
+        urls = [
+            reverse('course_list'),
+            reverse('course_list') + '?status=active',
+            reverse('course_list') + '?pagination=keyset',
+            reverse('lesson_list'),
+            reverse('lesson_list') + f'?course={course.pk}',
+            reverse('lesson_video_list'),
+            reverse('lesson_video_list') + f'?lesson={lesson.pk}',
+            reverse('enrolement_list'),
+            reverse('enrolement_list') + f'?course={course.pk}',
+            reverse('session_list'),
+            reverse('session_list') + f'?course={course.pk}',
+            reverse('session_list') + '?scheduled_time__gte=2026-01-01T00:00:00Z',
+            reverse('student_list'),
+            reverse('instructor_list'),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNoFullScans(url)
+
+    def test_scoped_enrolment_pages_use_indexes(self):
+        course = self.courses[1]
+        self.client.force_authenticate(user=Student.objects.get(user__email='student1@mail.com').user)
+        self.assertNoFullScans(reverse('enrolement_list'))
+
+        self.client.force_authenticate(user=course.instructor.user)
+        self.assertNoFullScans(reverse('enrolement_list'))
+        self.assertNoFullScans(reverse('course_roster', args=[course.pk]))
+
+    def test_unindexed_query_is_reported(self):
+        sql = str(Lesson.objects.filter(order=1).query)
+        self.assertEqual([table for table, _ in find_full_scans(sql)], ['enrolments_lesson'])
+
+
+class ReplicaRoutingTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+        instructor = make_instructor()
+        self.course = Course.objects.create(title='Python', instructor=instructor, status='active')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superadmin)
+
+    def test_router(self):
+        router = ReplicaRouter()
+        with override_settings(DATABASE_REPLICAS=['replica1', 'replica2']):
+            self.assertIsNone(router.db_for_read(Course))
+            with read_from_replica():
+                self.assertIn(router.db_for_read(Course), ['replica1', 'replica2'])
+                self.assertEqual(router.db_for_write(Course), DEFAULT_DB_ALIAS)
+            self.assertIsNone(router.db_for_read(Course))
+
+    # the "replica" is the primary here, the test follows which requests pick one
+    @patch('LearningMgtSystem.replicas.choose_replica', return_value=DEFAULT_DB_ALIAS)
+    def test_writes_pin_reads_of_their_group(self, choose_replica):
+        self.client.get(reverse('course_list'))
+        self.assertEqual(choose_replica.call_count, 1)
+
+        # a failed write doesn't pin
+        response = self.client.patch(reverse('course_update', args=[self.course.pk]), {'status': 'unknown'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.client.get(reverse('course_detail', args=[self.course.pk]))
+        self.assertEqual(choose_replica.call_count, 2)
+
+        response = self.client.patch(reverse('course_update', args=[self.course.pk]), {'title': 'Django'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        choose_replica.reset_mock()
+
+        for name in ('course_list', 'lesson_list', 'lesson_video_list'):
+            self.assertEqual(self.client.get(reverse(name)).status_code, 200)
+        choose_replica.assert_not_called()
+
+        # enrolments are read from the replicas still, and so are other users' catalog reads
+        self.client.get(reverse('enrolement_list'))
+        self.assertEqual(choose_replica.call_count, 1)
+        self.client.force_authenticate(user=self.course.instructor.user)
+        self.client.get(reverse('course_list'))
+        self.assertEqual(choose_replica.call_count, 2)
+
+
+@skipUnless(settings.DATABASE_REPLICAS, 'no replicas configured, see LearningMgtSystem/replica_settings.py')
+class ReplicaReadTest(APITestCase):
+    databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        cache.clear()
+
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+        Course.objects.create(title='Python', instructor=make_instructor(), status='active')
+        self.instructor = make_instructor('instructor2')
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superadmin)
+
+    def test_read_your_writes(self):
+        # the test's writes never reach the replicas (not replicated, or not committed)
+        self.assertEqual(self.client.get(reverse('course_list')).data['count'], 0)
+
+        response = self.client.post(reverse('course_create'), {
+            'title': 'Django', 'instructor': self.instructor.pk, 'status': 'active'
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+        # the writer reads the catalog from the primary, other groups stay on the replicas
+        self.assertEqual(self.client.get(reverse('course_list')).data['count'], 2)
+        self.assertEqual(self.client.get(reverse('enrolement_list')).data['count'], 0)
+
+    def test_stale_replica_does_not_fill_the_catalog(self):
+        self.client.post(reverse('course_create'), {
+            'title': 'Django', 'instructor': self.instructor.pk, 'status': 'active'
+        }, format='json')
+
+        # another user reads the catalog from the replica, which hasn't caught up
+        other = APIClient()
+        other.force_authenticate(user=self.instructor.user)
+        response = other.get(reverse('course_list'))
+        self.assertEqual((response.data['count'], response['X-Catalog-Cache']), (0, 'miss'))
+
+        # the stale page wasn't cached: the writer still sees their course
+        self.assertEqual(self.client.get(reverse('course_list')).data['count'], 2)
+
+    async def test_async_reads(self):
+        token = str(AccessToken.for_user(self.superadmin))
+        response = await self.async_client.get(reverse('async_course_list'), headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['count'], 0)
+
+class SparseFieldsTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+        self.token = str(AccessToken.for_user(self.superadmin))
+
+        for i in range(3):
+            instructor = make_instructor(f'instructor{i}')
+            course = Course.objects.create(title=f'Course {i}', instructor=instructor, status='active')
+            for order in range(3):
+                Lesson.objects.create(course=course, title=f'Lesson {order}', content='<p>Intro</p>', order=order)
+            VideoSession.objects.create(
+                course=course,
+                instructor=instructor,
+                session_title=f'Session {i}',
+                scheduled_time=timezone.now() + timedelta(days=i),
+                session_link='https://meet.jit.si/session'
+            )
+
+            student = make_student(f'student{i}')
+            self.enrolment = Enrolment.objects.create(student=student, course=course)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superadmin)
+
+    def test_fields(self):
+        response = self.client.get(reverse('enrolement_list'), {'fields': 'course,completed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data['results'][0]), {'course', 'completed'})
+
+        # dotted names reach into nested serializers
+        response = self.client.get(reverse('enrolement_list'), {'fields': 'completed,student.user.email'})
+        self.assertEqual(response.data['results'][0]['student'], {'user': {'email': 'student2@mail.com'}})
+
+        # a nested serializer named on its own keeps all of its fields
+        response = self.client.get(reverse('enrolement_detail', args=[self.enrolment.pk]), {'fields': 'student'})
+        self.assertEqual(response.data['student']['user']['profile']['role'], 'student')
+
+    def test_expand(self):
+        response = self.client.get(reverse('enrolement_detail', args=[self.enrolment.pk]), {'expand': ''})
+        self.assertEqual(response.data['student'], self.enrolment.student_id)
+
+        response = self.client.get(reverse('enrolement_detail', args=[self.enrolment.pk]), {'expand': 'student'})
+        self.assertEqual(response.data['student']['user'], self.enrolment.student.user_id)
+
+        response = self.client.get(reverse('session_list'), {'expand': 'course'})
+        session = response.data['results'][0]
+        self.assertIsInstance(session['course'], str)
+        self.assertIsInstance(session['instructor'], int)
+
+    def test_queries_are_narrowed(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('enrolement_list'), {'fields': 'course,completed'})
+        sql = queries.captured_queries[-1]['sql']
+        # the student is joined for the ETag only, the user not at all
+        self.assertNotIn('accounts_customuser', sql)
+        self.assertNotIn('"students_student"."status"', sql)
+
+        # unrequested columns stay deferred without a query per row
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('lesson_list'), {'fields': 'title,order'})
+        self.assertEqual(response.data['results'][0], {'title': 'Lesson 0', 'order': 0})
+        with self.assertNumQueries(2):
+            self.client.get(reverse('session_list'), {'expand': 'course'})
+
+    def test_smaller_payload(self):
+        full = self.client.get(reverse('enrolement_list'))
+        sparse = self.client.get(reverse('enrolement_list'), {'fields': 'course,completed'})
+        self.assertLess(len(sparse.content), len(full.content) / 3)
+
+    def test_writes_are_not_trimmed(self):
+        self.client.force_authenticate(user=self.enrolment.student.user)
+        response = self.client.patch(
+            f"{reverse('enrolement_update', args=[self.enrolment.pk])}?fields=completed",
+            {'course': self.enrolment.course_id}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('student', response.data)
+
+    async def test_async_views(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        response = await self.async_client.get(reverse('async_enrolement_list'), {'fields': 'course'}, headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['results'][0]), {'course'})
+
+class ProjectionTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+        self.token = str(AccessToken.for_user(self.superadmin))
+
+        for i in range(12):
+            instructor = make_instructor(f'instructor{i}')
+            course = Course.objects.create(
+                title=f'Course {i:02}', description=f'About {i}' if i % 2 else None,
+                instructor=instructor, status='active' if i % 3 else 'inactive'
+            )
+            lesson = Lesson.objects.create(course=course, title=f'Lesson {i}', content='<p>Intro &amp; <b>more</b></p>', order=i)
+            LessonVideo.objects.create(lesson=lesson, url='https://example.com/video.mp4', title='', order=1)
+            VideoSession.objects.create(
+                course=course,
+                instructor=instructor,
+                session_title=f'Session {i}',
+                scheduled_time=timezone.now() + timedelta(days=i),
+                session_link='https://meet.jit.si/session' if i % 2 else None
+            )
+
+            student = make_student(f'student{i}')
+            Enrolment.objects.create(student=student, course=course, completed=i)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.superadmin)
+
+    def get_both(self, name, params):
+        # the values() read path, then the serializers on model instances
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            projected = self.client.get(reverse(name), params)
+        # read before the next request resets the query log
+        projected_rows = any(' AS "pk"' in query['sql'] for query in queries.captured_queries)
+        cache.clear()
+        with patch('LearningMgtSystem.projections.get_projection', return_value=None):
+            serialized = self.client.get(reverse(name), params)
+        return projected, serialized, projected_rows
+
+    def test_same_json_as_serializers(self):
+        requests = [
+            ('course_list', {}), ('course_list', {'page': 2}), ('course_list', {'pagination': 'keyset'}),
+            ('course_list', {'status': 'active'}), ('course_list', {'fields': 'title,instructor'}),
+            ('lesson_list', {}), ('lesson_list', {'pagination': 'keyset'}),
+            ('lesson_video_list', {}), ('lesson_video_list', {'page': 2}),
+            ('session_list', {}), ('session_list', {'expand': 'course'}), ('session_list', {'pagination': 'keyset'}),
+            ('enrolement_list', {'expand': ''}), ('enrolement_list', {'fields': 'course,completed'}),
+        ]
+        for name, params in requests:
+            with self.subTest(name=name, params=params):
+                projected, serialized, projected_rows = self.get_both(name, params)
+                self.assertEqual(projected.status_code, 200)
+                self.assertTrue(projected_rows)
+
+                self.assertEqual(projected.content, serialized.content)
+                self.assertEqual(projected['ETag'], serialized['ETag'])
+
+        # keyset cursors point at the same rows
+        projected, serialized, _ = self.get_both('session_list', {'pagination': 'keyset'})
+        self.assertEqual(self.client.get(projected.data['next']).content, self.client.get(serialized.data['next']).content)
+
+    def test_golden_session(self):
+        session = VideoSession.objects.get(session_title='Session 11')
+        response = self.client.get(reverse('session_list'))
+        self.assertEqual(response.json()['results'][0], {
+            'course': 'Course 11',
+            'instructor': 'sample instructor11 (Instructor)',
+            'session_title': 'Session 11',
+            'scheduled_time': session.scheduled_time.isoformat().replace('+00:00', 'Z'),
+            'session_link': 'https://meet.jit.si/session',
+        })
+
+    async def test_async_views(self):
+        headers = {'Authorization': f'Bearer {self.token}'}
+        for name in ('async_course_list', 'async_lesson_list', 'async_lesson_video_list', 'async_session_list'):
+            projected = await self.async_client.get(reverse(name), {'page': 2}, headers=headers)
+            with patch('LearningMgtSystem.projections.get_projection', return_value=None):
+                serialized = await self.async_client.get(reverse(name), {'page': 2}, headers=headers)
+            self.assertEqual(projected.content, serialized.content)
+
+    def test_nested_serializers_are_not_projected(self):
+        serializer = EnrolmentSerializer(context={'request': None})
+        self.assertIsNone(get_projection(serializer))
+
+class EnrolmentScopeTest(APITestCase):
+    def setUp(self):
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+
+        self.instructors, self.courses, self.students = [], [], []
+        for i in range(2):
+            instructor = make_instructor(f'instructor{i}')
+            self.instructors.append(instructor)
+            self.courses.append(Course.objects.create(title=f'Course {i}', instructor=instructor, status='active'))
+
+        for i in range(3):
+            self.students.append(make_student(f'student{i}'))
+
+        # student 0 takes both courses, students 1 and 2 one each
+        self.enrolments = [
+            Enrolment.objects.create(student=self.students[0], course=self.courses[0]),
+            Enrolment.objects.create(student=self.students[0], course=self.courses[1]),
+            Enrolment.objects.create(student=self.students[1], course=self.courses[0]),
+            Enrolment.objects.create(student=self.students[2], course=self.courses[1]),
+        ]
+
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, user):
+        # a real token, so the principal is loaded the way it is in production
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+
+    def listed(self, name='enrolement_list', *args):
+        response = self.client.get(reverse(name, args=args))
+        self.assertEqual(response.status_code, 200)
+        return sorted((row['student']['id'], row['course']) for row in response.data['results'])
+
+    def test_students_see_their_own(self):
+        self.login(self.students[0].user)
+        self.assertEqual(self.listed(), [(self.students[0].pk, self.courses[0].pk), (self.students[0].pk, self.courses[1].pk)])
+
+        other = self.enrolments[2]
+        self.assertEqual(self.client.get(reverse('enrolement_detail', args=[other.pk])).status_code, 404)
+        self.assertEqual(self.client.delete(reverse('enrolement_delete', args=[other.pk])).status_code, 404)
+        self.assertTrue(Enrolment.objects.filter(pk=other.pk).exists())
+
+    def test_instructors_see_their_course(self):
+        course = self.courses[1]
+        self.login(self.instructors[1].user)
+        self.assertEqual(self.listed(), [(self.students[0].pk, course.pk), (self.students[2].pk, course.pk)])
+        self.assertEqual(self.client.get(reverse('enrolement_detail', args=[self.enrolments[0].pk])).status_code, 404)
+
+    def test_admins_see_everything(self):
+        self.login(self.superadmin)
+        self.assertEqual(len(self.listed()), 4)
+
+    def test_roster(self):
+        course = self.courses[0]
+        self.login(self.instructors[0].user)
+
+        # the principal, the COUNT, then the page with every student's user and profile in one query
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('course_roster', args=[course.pk]))
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            sorted(row['student']['user']['email'] for row in response.data['results']),
+            ['student0@mail.com', 'student1@mail.com']
+        )
+        self.assertEqual(response.data['results'][0]['student']['user']['profile']['role'], 'student')
+
+        self.assertEqual(self.client.get(reverse('course_roster', args=[self.courses[1].pk])).status_code, 403)
+
+        self.login(self.students[0].user)
+        self.assertEqual(self.client.get(reverse('course_roster', args=[course.pk])).status_code, 403)
+
+        self.login(self.superadmin)
+        self.assertEqual(self.listed('course_roster', self.courses[1].pk), [
+            (self.students[0].pk, self.courses[1].pk), (self.students[2].pk, self.courses[1].pk)
+        ])
+        self.assertEqual(self.client.get(reverse('course_roster', args=[999999])).status_code, 404)
+
+    async def test_async_views_are_scoped(self):
+        headers = {'Authorization': f'Bearer {AccessToken.for_user(self.students[1].user)}'}
+        response = await self.async_client.get(reverse('async_enrolement_list'), headers=headers)
+        self.assertEqual([row['student']['id'] for row in response.json()['results']], [self.students[1].pk])
+
+        response = await self.async_client.get(reverse('async_enrolement_detail', args=[self.enrolments[0].pk]), headers=headers)
+        self.assertEqual(response.status_code, 404)
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class LessonProgressTest(APITestCase):
+    def setUp(self):
+        courses = []
+        for i in range(2):
+            instructor = make_instructor(f'instructor{i}')
+            courses.append(Course.objects.create(title=f'Course {i}', instructor=instructor, status='active'))
+        self.course, self.other_course = courses
+
+        # reading order is the reverse of creation order
+        self.lessons = [
+            Lesson.objects.create(course=self.course, title=f'Lesson {i}', content='<p>Intro</p>', order=4 - i)
+            for i in range(4)
+        ]
+        self.other_lesson = Lesson.objects.create(course=self.other_course, title='Other', content='<p>Intro</p>')
+
+        self.student = make_student()
+        self.enrolment = Enrolment.objects.create(student=self.student, course=self.course)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.student.user)
+
+    def complete(self, lesson=None):
+        data = {'course': self.course.pk}
+        if lesson is not None:
+            data['lesson'] = lesson.pk
+        return self.client.patch(reverse('enrolement_update', args=[self.enrolment.pk]), data, format='json')
+
+    def assertStatsMatch(self):
+        totals, buckets = compute_course_stats([self.course.pk])
+        stats = CourseStats.objects.get(course=self.course)
+        self.assertEqual((stats.enrolment_count, stats.completed_total), totals[self.course.pk])
+
+    def test_bitsets(self):
+        data = set_bit(set_bit(b'', 3), 17)
+        self.assertEqual(data, b'\x08\x00\x02')
+        self.assertTrue(has_bit(data, 17))
+        self.assertFalse(has_bit(data, 4) or has_bit(data, 400))
+        self.assertEqual(count_bits(data), 2)
+        self.assertEqual(clear_bit(data, 17), b'\x08')
+        self.assertEqual(first_bits(10), b'\xff\x03')
+
+    def test_positions_are_never_reused(self):
+        self.assertEqual([lesson.position for lesson in self.lessons], [0, 1, 2, 3])
+        self.assertEqual(self.other_lesson.position, 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.lessons[3].delete()
+        lesson = Lesson.objects.create(course=self.course, title='New', content='<p>Intro</p>')
+        self.assertEqual(lesson.position, 4)
+        self.course.refresh_from_db()
+        self.assertEqual((self.course.lesson_count, self.course.lesson_positions), (4, 5))
+
+    def test_completing_a_lesson_twice_counts_once(self):
+        for _ in range(2):
+            response = self.complete(self.lessons[1])
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['completed'], response.data['progress']), (1, 25.0))
+
+        # without a lesson: the next one in reading order
+        self.complete()
+        self.enrolment.refresh_from_db()
+        self.assertEqual(bytes(self.enrolment.lessons_done), b'\x0a')
+
+        self.complete()
+        self.complete()
+        response = self.complete()
+        self.assertEqual((response.data['completed'], response.data['progress']), (4, 100.0))
+        self.assertStatsMatch()
+
+        response = self.complete(self.other_lesson)
+        self.assertEqual(response.status_code, 400)
+
+    def test_deleting_a_lesson_clears_its_bit(self):
+        self.complete(self.lessons[0])
+        self.complete(self.lessons[2])
+
+        # cleared once the delete commits, not inside its transaction
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.lessons[2].delete()
+        self.enrolment.refresh_from_db()
+        self.assertEqual((bytes(self.enrolment.lessons_done), self.enrolment.completed), (b'\x05', 2))
+        self.assertEqual(len(callbacks), 1)
+
+        callbacks[0]()
+        self.enrolment.refresh_from_db()
+        self.assertEqual((bytes(self.enrolment.lessons_done), self.enrolment.completed), (b'\x01', 1))
+        self.assertEqual(self.enrolment.progress, round(100 / 3, 1))
+        self.assertStatsMatch()
+
+    def test_sync_names_lessons(self):
+        events = [
+            {'id': str(uuid.uuid4()), 'course': self.course.pk, 'lesson': self.lessons[0].pk},
+            {'id': str(uuid.uuid4()), 'course': self.course.pk, 'lesson': self.lessons[0].pk},
+            {'id': str(uuid.uuid4()), 'course': self.course.pk},
+            {'id': str(uuid.uuid4()), 'course': self.course.pk, 'lesson': self.other_lesson.pk},
+        ]
+        response = self.client.post(reverse('enrolement_sync'), {'events': events}, format='json')
+
+        self.assertEqual([row['status'] for row in response.data['results']], ['applied', 'applied', 'applied', 'error'])
+        # lesson 0 once, then the first lesson in reading order
+        self.assertEqual(response.data['enrolments'], [{'course': self.course.pk, 'completed': 2}])
+        self.enrolment.refresh_from_db()
+        self.assertEqual(bytes(self.enrolment.lessons_done), b'\x09')
+        self.assertStatsMatch()
+
+    def test_list_progress_reads_no_lessons(self):
+        self.complete(self.lessons[0])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('enrolement_list'), {'fields': 'course,completed,progress'})
+            sql = [query['sql'] for query in queries.captured_queries]
+        self.assertEqual(response.data['results'], [{'course': self.course.pk, 'completed': 1, 'progress': 25.0}])
+        self.assertFalse(any('enrolments_lesson' in statement for statement in sql))
+
+        response = self.client.get(reverse('enrolement_detail', args=[self.enrolment.pk]), {'fields': 'progress'})
+        self.assertEqual(response.data, {'progress': 25.0})
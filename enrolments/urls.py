@@ -10,6 +10,11 @@ urlpatterns = [
     path('courses/<int:pk>/', views.CourseRetrieveAPIView.as_view(), name='course_detail'),
     path('courses/<int:pk>/edit/', views.CourseUpdateAPIView.as_view(), name='course_update'),
     path('courses/<int:pk>/delete/', views.CourseDestroyAPIView.as_view(), name='course_delete'),
+    path('courses/<int:pk>/stats/', views.CourseStatsAPIView.as_view(), name='course_stats'),
+    path('courses/<int:pk>/roster/', views.CourseRosterAPIView.as_view(), name='course_roster'),
+
+    # --- Search Route ---
+    path('search/', views.SearchAPIView.as_view(), name='search'),
 
     # --- Lesson Route ---
     path('lessons/', views.LessonListAPIView.as_view(), name='lesson_list'),
@@ -28,6 +33,8 @@ urlpatterns = [
     # --- Enrolment Route ---
     path('enrolments/', views.EnrolmentListAPIView.as_view(), name='enrolement_list'),
     path('enrolments/create/', views.EnrolmentCreateAPIView.as_view(), name='enrolement_create'),
+    path('enrolments/bulk-create/', views.EnrolmentBulkCreateAPIView.as_view(), name='enrolement_bulk_create'),
+    path('enrolments/sync/', views.EnrolmentProgressSyncAPIView.as_view(), name='enrolement_sync'),
     path('enrolments/<int:pk>/', views.EnrolmentRetrieveAPIView.as_view(), name='enrolement_detail'),
     path('enrolments/<int:pk>/edit/', views.EnrolmentUpdateAPIView.as_view(), name='enrolement_update'),
     path('enrolments/<int:pk>/delete/', views.EnrolmentDestroyAPIView.as_view(), name='enrolement_delete'),
@@ -38,4 +45,18 @@ urlpatterns = [
     path('sessions/<int:pk>/', views.VideoSessionRetrieveAPIView.as_view(), name='session_detail'),
     path('sessions/<int:pk>/edit/', views.VideoSessionUpdateAPIView.as_view(), name='session_update'),
     path('sessions/<int:pk>/delete/', views.VideoSessionDeleteAPIView.as_view(), name='session_delete'),
-]
\ No newline at end of file
+]
+
+# mounted under /api/async/ for the ASGI deployment
+async_urlpatterns = [
+    path('courses/', views.CourseListAsyncAPIView.as_view(), name='async_course_list'),
+    path('courses/<int:pk>/', views.CourseRetrieveAsyncAPIView.as_view(), name='async_course_detail'),
+    path('lessons/', views.LessonListAsyncAPIView.as_view(), name='async_lesson_list'),
+    path('lessons/<int:pk>/', views.LessonRetrieveAsyncAPIView.as_view(), name='async_lesson_detail'),
+    path('lesson-videos/', views.LessonVideoListAsyncAPIView.as_view(), name='async_lesson_video_list'),
+    path('lesson-videos/<int:pk>/', views.LessonVideoRetrieveAsyncAPIView.as_view(), name='async_lesson_video_detail'),
+    path('enrolments/', views.EnrolmentListAsyncAPIView.as_view(), name='async_enrolement_list'),
+    path('enrolments/<int:pk>/', views.EnrolmentRetrieveAsyncAPIView.as_view(), name='async_enrolement_detail'),
+    path('sessions/', views.VideoSessionListAsyncAPIView.as_view(), name='async_session_list'),
+    path('sessions/<int:pk>/', views.VideoSessionRetrieveAsyncAPIView.as_view(), name='async_session_detail'),
+]
@@ -1,96 +1,220 @@
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import CachedJWTAuthentication
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.exceptions import PermissionDenied
-from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveAPIView, UpdateAPIView, DestroyAPIView
-from rest_framework import serializers
+from rest_framework.generics import get_object_or_404, CreateAPIView, ListAPIView, RetrieveAPIView, UpdateAPIView, DestroyAPIView
+from rest_framework.views import APIView
+from rest_framework.filters import OrderingFilter
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import serializers, status
 from rest_framework.response import Response
+from LearningMgtSystem.asyncviews import AsyncListAPIView, AsyncRetrieveAPIView
+from LearningMgtSystem.background import run_in_background, wants_background
+from LearningMgtSystem.conditional import ConditionalGetMixin
+from LearningMgtSystem.fieldsets import SparseQuerysetMixin
+from LearningMgtSystem.projections import ProjectionListMixin
+from LearningMgtSystem.replicas import ReplicaReadMixin
 from instructors.permissions import IsInstructorOrAdmin
 from students.models import Student
 from students.permissions import IsStudentOrAdmin
 
+from .cache import CatalogCacheMixin
+from .deletion import delete_course
+from .scopes import EnrolmentScopeMixin, check_roster_access
+from .search import FullTextSearchFilter, search
 from .utils import generate_jitsi_link
-from .serializers import CourseSerializer, LessonSerializer, LessonVideoSerializer, EnrolmentSerializer, VideoSessionSerializer
-from .models import Course, Lesson, LessonVideo, Enrolment, VideoSession
+from .serializers import (
+    CourseSerializer,
+    CourseStatsSerializer,
+    LessonSerializer,
+    LessonVideoSerializer,
+    EnrolmentSerializer,
+    EnrolmentBulkCreateSerializer,
+    ProgressSyncSerializer,
+    VideoSessionSerializer
+)
+from .models import Course, CourseStats, Lesson, LessonVideo, Enrolment, VideoSession
 
 
 # ---- COURSE VIEW ----
 
-class CourseCreateAPIView(CreateAPIView):
-    authentication_classes = [JWTAuthentication]
+class CourseCreateAPIView(ReplicaReadMixin, CreateAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
 
-class CourseListAPIView(ListAPIView):
-    authentication_classes = [JWTAuthentication]
+class CourseListAPIView(ReplicaReadMixin, CatalogCacheMixin, ConditionalGetMixin, ProjectionListMixin, ListAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
 
-    filterset_fields = ['title']  # fields for exact filtering
+    # stable ordering for ?pagination=keyset
+    keyset_ordering = 'id'
+
+    # ?search= goes through the full-text index
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter]
+    search_kind = 'course'
+
+    filterset_fields = ['title', 'status']  # fields for exact filtering
 
     # Optional: specify search fields
-    search_fields = ['title']  # fields to search in
+    search_fields = ['title', 'description']  # fields to search in
 
     # Optional: specify ordering fields
     ordering_fields = ['title']  # fields to order by
     ordering = ['title']  # default ordering
 
-class CourseRetrieveAPIView(RetrieveAPIView):
-    authentication_classes = [JWTAuthentication]
+class CourseRetrieveAPIView(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, RetrieveAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     queryset = Course.objects.all()
     serializer_class = CourseSerializer 
 
-class CourseUpdateAPIView(UpdateAPIView):
-    authentication_classes = [JWTAuthentication]
+class CourseUpdateAPIView(ReplicaReadMixin, UpdateAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
 
-class CourseDestroyAPIView(DestroyAPIView):
-    authentication_classes = [JWTAuthentication]
+class CourseDestroyAPIView(ReplicaReadMixin, DestroyAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAdminUser]
 
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
 
+    def destroy(self, request, *args, **kwargs):
+        course = self.get_object()
+
+        # lessons, enrolments and sessions go in chunks, see deletion.py
+        if wants_background(request):
+            run_in_background(delete_course, course.pk)
+            return Response({'detail': 'Course deletion started.'}, status=status.HTTP_202_ACCEPTED)
+        delete_course(course.pk)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+class CourseStatsAPIView(RetrieveAPIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsInstructorOrAdmin]
+
+    serializer_class = CourseStatsSerializer
+
+    def get_object(self):
+        course = get_object_or_404(Course, pk=self.kwargs['pk'])
+
+        # instructors only see their own course
+        user = self.request.user
+        if not user.is_staff and getattr(getattr(user, 'instructor', None), 'pk', None) != course.instructor_id:
+            raise PermissionDenied("You are not the instructor of this course.")
+
+        # courses nobody has enrolled in yet have no stats row
+        try:
+            stats = CourseStats.objects.get(course=course)
+        except CourseStats.DoesNotExist:
+            stats = CourseStats(course=course)
+        stats.course = course
+        return stats
+
+class CourseRosterAPIView(ReplicaReadMixin, ConditionalGetMixin, ProjectionListMixin, ListAPIView):
+    replica_group = 'enrolments'
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsInstructorOrAdmin]
+
+    # each student's user and profile come with the page, in one joined query
+    queryset = EnrolmentSerializer.setup_eager_loading(Enrolment.objects.all())
+    serializer_class = EnrolmentSerializer
+
+    # newest first, from the (course, date_joined) index
+    ordering = ['-date_joined', '-id']
+    keyset_ordering = ('-date_joined', '-id')
+
+    version_fields = ('updated_at', 'student__updated_at', 'course__updated_at')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        check_roster_access(request.user, self.kwargs['pk'])
+
+    def get_queryset(self):
+        return super().get_queryset().filter(course_id=self.kwargs['pk'])
+
+# ---- SEARCH VIEW ----
+
+class SearchAPIView(ReplicaReadMixin, APIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    max_limit = 50
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        kind = request.query_params.get('type')
+        if kind not in (None, 'course', 'lesson'):
+            return Response({"detail": "type must be 'course' or 'lesson'."}, status=400)
+
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), self.max_limit)
+        except ValueError:
+            return Response({"detail": "limit must be a number."}, status=400)
+
+        # best matches first, with a highlighted snippet of the body
+        results = search(query, kind=kind, limit=max(limit, 1))
+        return Response({'query': query, 'results': results}, status=200)
+
 # ---- LESSON VIEW ----
 
-class LessonCreateAPIView(CreateAPIView):
-    authentication_classes = [JWTAuthentication]
+class LessonCreateAPIView(ReplicaReadMixin, CreateAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsInstructorOrAdmin]
 
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
 
-class LessonListAPIView(ListAPIView):
-    authentication_classes = [JWTAuthentication]
+class LessonListAPIView(ReplicaReadMixin, ConditionalGetMixin, ProjectionListMixin, ListAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
 
-class LessonRetrieveAPIView(RetrieveAPIView):
-    authentication_classes = [JWTAuthentication]
+    # reading order, served by the (course, order) index
+    ordering = ['course', 'order', 'id']
+    filterset_fields = ['course']
+
+    # stable ordering for ?pagination=keyset
+    keyset_ordering = 'id'
+
+class LessonRetrieveAPIView(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, RetrieveAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer 
 
-class LessonUpdateAPIView(UpdateAPIView):
-    authentication_classes = [JWTAuthentication]
+class LessonUpdateAPIView(ReplicaReadMixin, UpdateAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsInstructorOrAdmin]
 
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
 
-class LessonDestroyAPIView(DestroyAPIView):
-    authentication_classes = [JWTAuthentication]
+class LessonDestroyAPIView(ReplicaReadMixin, DestroyAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsInstructorOrAdmin]
 
     queryset = Lesson.objects.all()
@@ -98,36 +222,47 @@ class LessonDestroyAPIView(DestroyAPIView):
 
 # ---- LESSON VIDEO VIEW ----  
 
-class LessonVideoCreateAPIView(CreateAPIView):
-    authentication_classes = [JWTAuthentication]
+class LessonVideoCreateAPIView(ReplicaReadMixin, CreateAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsInstructorOrAdmin]
 
     queryset = LessonVideo.objects.all()
     serializer_class = LessonVideoSerializer
 
-class LessonVideoListAPIView(ListAPIView):
-    authentication_classes = [JWTAuthentication]
+class LessonVideoListAPIView(ReplicaReadMixin, ConditionalGetMixin, ProjectionListMixin, ListAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     queryset = LessonVideo.objects.all()
     serializer_class = LessonVideoSerializer
 
-class LessonVideoRetrieveAPIView(RetrieveAPIView):
-    authentication_classes = [JWTAuthentication]
+    ordering = ['lesson', 'order', 'id']
+    filterset_fields = ['lesson']
+
+    # stable ordering for ?pagination=keyset
+    keyset_ordering = 'id'
+
+class LessonVideoRetrieveAPIView(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, RetrieveAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     queryset = LessonVideo.objects.all()
     serializer_class = LessonVideoSerializer 
 
-class LessonVideoUpdateAPIView(UpdateAPIView):
-    authentication_classes = [JWTAuthentication]
+class LessonVideoUpdateAPIView(ReplicaReadMixin, UpdateAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsInstructorOrAdmin]
 
     queryset = LessonVideo.objects.all()
     serializer_class = LessonVideoSerializer
 
-class LessonVideoDestroyAPIView(DestroyAPIView):
-    authentication_classes = [JWTAuthentication]
+class LessonVideoDestroyAPIView(ReplicaReadMixin, DestroyAPIView):
+    replica_group = 'catalog'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsInstructorOrAdmin]
 
     queryset = LessonVideo.objects.all()
@@ -135,8 +270,9 @@ class LessonVideoDestroyAPIView(DestroyAPIView):
 
 # ---- ENROLMENT VIEW ----  
 
-class EnrolmentCreateAPIView(CreateAPIView):
-    authentication_classes = [JWTAuthentication]
+class EnrolmentCreateAPIView(ReplicaReadMixin, CreateAPIView):
+    replica_group = 'enrolments'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsStudentOrAdmin]
 
     queryset = Enrolment.objects.all()
@@ -155,22 +291,54 @@ class EnrolmentCreateAPIView(CreateAPIView):
         # Save the enrollment with student injected
         serializer.save(student=student)
 
-class EnrolmentListAPIView(ListAPIView):
-    authentication_classes = [JWTAuthentication]
+class EnrolmentBulkCreateAPIView(ReplicaReadMixin, CreateAPIView):
+    replica_group = 'enrolments'
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    serializer_class = EnrolmentBulkCreateSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # per-row results, in the order the rows were sent
+        summary = serializer.save()
+        response_status = status.HTTP_201_CREATED if summary['created'] else status.HTTP_200_OK
+        return Response(summary, status=response_status)
+
+class EnrolmentListAPIView(ReplicaReadMixin, ConditionalGetMixin, ProjectionListMixin, EnrolmentScopeMixin, ListAPIView):
+    replica_group = 'enrolments'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
-    queryset = Enrolment.objects.all()
+    queryset = EnrolmentSerializer.setup_eager_loading(Enrolment.objects.all())
     serializer_class = EnrolmentSerializer
 
-class EnrolmentRetrieveAPIView(RetrieveAPIView):
-    authentication_classes = [JWTAuthentication]
+    # newest first, from the date_joined or (course, date_joined) index
+    ordering = ['-date_joined', '-id']
+    filterset_fields = ['course', 'student']
+
+    # stable ordering for ?pagination=keyset
+    keyset_ordering = ('-date_joined', '-id')
+
+    # an enrolment renders its student and its progress through the course, so their versions count too
+    version_fields = ('updated_at', 'student__updated_at', 'course__updated_at')
+
+class EnrolmentRetrieveAPIView(ReplicaReadMixin, ConditionalGetMixin, SparseQuerysetMixin, EnrolmentScopeMixin, RetrieveAPIView):
+    replica_group = 'enrolments'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
-    queryset = Enrolment.objects.all()
+    queryset = EnrolmentSerializer.setup_eager_loading(Enrolment.objects.all())
     serializer_class = EnrolmentSerializer 
 
-class EnrolmentUpdateAPIView(UpdateAPIView):
-    authentication_classes = [JWTAuthentication]
+    # an enrolment renders its student and its progress through the course, so their versions count too
+    version_fields = ('updated_at', 'student__updated_at', 'course__updated_at')
+
+class EnrolmentUpdateAPIView(ReplicaReadMixin, UpdateAPIView):
+    replica_group = 'enrolments'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsStudentOrAdmin]
 
     queryset = Enrolment.objects.all()
@@ -203,8 +371,29 @@ class EnrolmentUpdateAPIView(UpdateAPIView):
 
         return Response(serializer.data, status=200)
 
-class EnrolmentDestroyAPIView(DestroyAPIView):
-    authentication_classes = [JWTAuthentication]
+class EnrolmentProgressSyncAPIView(ReplicaReadMixin, CreateAPIView):
+    replica_group = 'enrolments'
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsStudentOrAdmin]
+
+    serializer_class = ProgressSyncSerializer
+
+    def create(self, request, *args, **kwargs):
+        try:
+            student = request.user.student
+        except Student.DoesNotExist:
+            return Response({"detail": "Student not found."}, status=400)
+
+        serializer = self.get_serializer(data=request.data, context={'request': request, 'student': student})
+        serializer.is_valid(raise_exception=True)
+
+        # events already synced are reported as duplicates and not counted again
+        summary = serializer.save()
+        return Response(summary, status=200)
+
+class EnrolmentDestroyAPIView(ReplicaReadMixin, EnrolmentScopeMixin, DestroyAPIView):
+    replica_group = 'enrolments'
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsStudentOrAdmin]
 
     queryset = Enrolment.objects.all()
@@ -215,7 +404,7 @@ class VideoSessionCreateAPIView(CreateAPIView):
     queryset = VideoSession.objects.all()
     serializer_class = VideoSessionSerializer
     permission_classes = [IsInstructorOrAdmin]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     def perform_create(self, serializer):
         try:
@@ -231,23 +420,34 @@ class VideoSessionCreateAPIView(CreateAPIView):
             raise PermissionDenied("User is not an instructor.")
         serializer.save(course=course, instructor=instructor, session_link=session_link)
 
-class VideoSessionListAPIView(ListAPIView):
-    queryset = VideoSession.objects.all().order_by('-created_at')
+class VideoSessionListAPIView(ConditionalGetMixin, ProjectionListMixin, ListAPIView):
+    queryset = VideoSessionSerializer.setup_eager_loading(VideoSession.objects.all()).order_by('-created_at', '-id')
     serializer_class = VideoSessionSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
-class VideoSessionRetrieveAPIView(RetrieveAPIView):
-    queryset = VideoSession.objects.all()
+    filterset_fields = {'course': ['exact'], 'scheduled_time': ['gte', 'lt']}
+
+    # stable ordering for ?pagination=keyset
+    keyset_ordering = ('-created_at', '-id')
+
+    # sessions render the course title and instructor name
+    version_fields = ('updated_at', 'course__updated_at', 'instructor__updated_at')
+
+class VideoSessionRetrieveAPIView(ConditionalGetMixin, SparseQuerysetMixin, RetrieveAPIView):
+    queryset = VideoSessionSerializer.setup_eager_loading(VideoSession.objects.all())
     serializer_class = VideoSessionSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
+
+    # sessions render the course title and instructor name
+    version_fields = ('updated_at', 'course__updated_at', 'instructor__updated_at')
 
 class VideoSessionUpdateAPIView(UpdateAPIView):
     queryset = VideoSession.objects.all()
     serializer_class = VideoSessionSerializer
     permission_classes = [IsInstructorOrAdmin]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     def perform_update(self, serializer):
         try:
@@ -267,5 +467,81 @@ class VideoSessionDeleteAPIView(DestroyAPIView):
     queryset = VideoSession.objects.all()
     serializer_class = VideoSessionSerializer
     permission_classes = [IsInstructorOrAdmin]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
+
+
+# ---- ASYNC READ VIEWS (ASGI) ----
+
+class CourseListAsyncAPIView(ProjectionListMixin, AsyncListAPIView):
+    replica_group = 'catalog'
+    permission_classes = [IsAuthenticated]
+
+    queryset = Course.objects.all()
+    serializer_class = CourseSerializer
+    ordering = ('title', 'id')
+
+class CourseRetrieveAsyncAPIView(SparseQuerysetMixin, AsyncRetrieveAPIView):
+    replica_group = 'catalog'
+    permission_classes = [IsAuthenticated]
+
+    queryset = Course.objects.all()
+    serializer_class = CourseSerializer
+
+class LessonListAsyncAPIView(ProjectionListMixin, AsyncListAPIView):
+    replica_group = 'catalog'
+    permission_classes = [IsAuthenticated]
+
+    queryset = Lesson.objects.all()
+    serializer_class = LessonSerializer
+    ordering = ('course', 'order', 'id')
+
+class LessonRetrieveAsyncAPIView(SparseQuerysetMixin, AsyncRetrieveAPIView):
+    replica_group = 'catalog'
+    permission_classes = [IsAuthenticated]
+
+    queryset = Lesson.objects.all()
+    serializer_class = LessonSerializer
+
+class LessonVideoListAsyncAPIView(ProjectionListMixin, AsyncListAPIView):
+    replica_group = 'catalog'
+    permission_classes = [IsAuthenticated]
+
+    queryset = LessonVideo.objects.all()
+    serializer_class = LessonVideoSerializer
+    ordering = ('lesson', 'order', 'id')
+
+class LessonVideoRetrieveAsyncAPIView(SparseQuerysetMixin, AsyncRetrieveAPIView):
+    replica_group = 'catalog'
+    permission_classes = [IsAuthenticated]
+
+    queryset = LessonVideo.objects.all()
+    serializer_class = LessonVideoSerializer
+
+class EnrolmentListAsyncAPIView(ProjectionListMixin, EnrolmentScopeMixin, AsyncListAPIView):
+    replica_group = 'enrolments'
+    permission_classes = [IsAuthenticated]
 
+    # serializers can't lazy-load relations in async code, everything is joined up front
+    queryset = EnrolmentSerializer.setup_eager_loading(Enrolment.objects.all())
+    serializer_class = EnrolmentSerializer
+    ordering = ('-date_joined', '-id')
+
+class EnrolmentRetrieveAsyncAPIView(SparseQuerysetMixin, EnrolmentScopeMixin, AsyncRetrieveAPIView):
+    replica_group = 'enrolments'
+    permission_classes = [IsAuthenticated]
+
+    queryset = EnrolmentSerializer.setup_eager_loading(Enrolment.objects.all())
+    serializer_class = EnrolmentSerializer
+
+class VideoSessionListAsyncAPIView(ProjectionListMixin, AsyncListAPIView):
+    permission_classes = [IsAuthenticated]
+
+    queryset = VideoSessionSerializer.setup_eager_loading(VideoSession.objects.all())
+    serializer_class = VideoSessionSerializer
+    ordering = ('-created_at', '-id')
+
+class VideoSessionRetrieveAsyncAPIView(SparseQuerysetMixin, AsyncRetrieveAPIView):
+    permission_classes = [IsAuthenticated]
+
+    queryset = VideoSessionSerializer.setup_eager_loading(VideoSession.objects.all())
+    serializer_class = VideoSessionSerializer
@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
+from accounts.services import bulk_set_status
 
 from .models import Instructor
 
@@ -8,6 +9,8 @@ class CustomInstructorAdmin(admin.ModelAdmin):
 
     list_display = ['user__first_name', 'user__last_name', 'user__email',  'user__is_staff']
     ordering = ("user__last_name",)
+    list_filter = ['status', 'user__date_joined']
+    actions = ['activate', 'deactivate']
 
     # If you want to customize what fields show when adding a new User:
     add_fieldsets = (
@@ -21,6 +24,17 @@ class CustomInstructorAdmin(admin.ModelAdmin):
         if not obj:
             return []  # don’t show profile inline when creating a new user
         return super().get_inline_instances(request, obj)
+
+    # one UPDATE per chunk however many rows are selected
+    @admin.action(description='Activate selected %(verbose_name_plural)s')
+    def activate(self, request, queryset):
+        updated = bulk_set_status(queryset, 'activated')
+        self.message_user(request, f'{updated} {self.opts.verbose_name_plural} activated.')
+
+    @admin.action(description='Deactivate selected %(verbose_name_plural)s')
+    def deactivate(self, request, queryset):
+        updated = bulk_set_status(queryset, 'deactivated')
+        self.message_user(request, f'{updated} {self.opts.verbose_name_plural} deactivated.')
     
 
 
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from LearningMgtSystem.signals import BulkSignalQuerySet
 
 
 class Instructor(models.Model):
@@ -9,6 +10,10 @@ class Instructor(models.Model):
     ]
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='instructor')
     status = models.CharField(max_length=12, choices=STATUS_CHOICE)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # queryset writes notify listeners such as the catalog cache
+    objects = BulkSignalQuerySet.as_manager()
 
     def __str__(self):
         return f'{self.user.first_name} {self.user.last_name} (Instructor)'
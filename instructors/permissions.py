@@ -1,9 +1,17 @@
 from rest_framework.permissions import BasePermission
+from accounts.claims import get_trusted_claims
 
 class IsInstructorOrAdmin(BasePermission):
     def has_permission(self, request, view):
         user = request.user
 
+        # trust fresh role claims from the token instead of loading profile and instructor
+        claims = get_trusted_claims(request) if user and user.is_authenticated else None
+        if claims is not None:
+            if claims['role'] is None:
+                return claims['is_staff']
+            return claims['role'] == 'instructor' and claims['status'] == 'activated'
+
         if user and not hasattr(user, 'profile'):
             if user.is_authenticated and user.is_staff:
                 return True
@@ -1,37 +1,35 @@
 from rest_framework import serializers
-from accounts.serializers import UserSerializer
+from accounts.serializers import EMAIL_TAKEN_MESSAGE, EagerLoadingMixin, UserSerializer
+from accounts.services import EmailTakenError, register_user
+from LearningMgtSystem.fieldsets import SparseFieldsMixin
 from django.contrib.auth import get_user_model
-from accounts.models import UserProfile
 
 from .models import Instructor
 
 
 User = get_user_model()
 
-class InstructorSerializer(serializers.ModelSerializer):
+class InstructorSerializer(SparseFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer):
     user = UserSerializer()
     # set instructor status to read only
     status = serializers.CharField(read_only=True)
 
+    # load user and profile with the instructor in a single query
+    select_related_fields = ['user__profile']
+    expandable_fields = ['user']
+
     class Meta:
         model = Instructor
         fields = ['id', 'user', 'status']
 
-    # Custome create method
     def create(self, validated_data):
-        # Extract nested user data
         user_data = validated_data.pop('user')
-        user_profile_data = user_data.pop('profile')
-
-        # Creating user
-        user = User.objects.create_user(**user_data)
-        user.profile = UserProfile.objects.create(user=user, **user_profile_data)
-
-        user.profile.role = 'instructor'
-        user.profile.save()
-        user.save()
-
-        # Now create the instructor and link the user
-        instructor = Instructor.objects.create(user=user, **validated_data)
-
-        return instructor
\ No newline at end of file
+        try:
+            return register_user(
+                role='instructor',
+                status='deactivated',
+                profile=user_data.pop('profile'),
+                **user_data
+            )
+        except EmailTakenError:
+            raise serializers.ValidationError({'user': {'email': [EMAIL_TAKEN_MESSAGE]}})
@@ -1,7 +1,13 @@
+from datetime import datetime, timezone
+from unittest import skipUnless
+
 from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 
+from LearningMgtSystem.testutils import LARGE_TESTS, make_instructor, make_many
+
 from .models import Instructor
 
 
@@ -180,3 +186,126 @@ class IntsructorTest(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(bad_response.status_code, 401)
 
+
+class InstructorQueryCountTest(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='SuperAdmin',
+            email='superadmin@mail.com',
+            password='superadmin_Password'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+        self.seeded = 0
+
+    def seed_instructors(self, total):
+        # instructors up to the total count
+        start, self.seeded = self.seeded, total
+        make_many('instructor', start, total)
+
+    def check_query_counts(self, total):
+        self.seed_instructors(total)
+        last_page = (total + 9) // 10
+
+        # one COUNT plus one joined SELECT, whatever the number of rows
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('instructor_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], total)
+        self.assertEqual(len(response.data['results']), 10)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('instructor_list'), {'page': last_page})
+        self.assertEqual(response.status_code, 200)
+
+        # keyset mode skips the COUNT and seeks from the cursor, page after page
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('instructor_list'), {'pagination': 'keyset'})
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 10)
+
+        if total > 10:
+            first_page = response.data['results']
+            with self.assertNumQueries(1):
+                response = self.client.get(response.data['next'])
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.data['results'], first_page)
+
+        instructor = Instructor.objects.order_by('-id').first()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('instructor_detail', kwargs={'pk': instructor.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['profile']['role'], 'instructor')
+
+    def test_list_and_detail_query_count(self):
+        for total in (10, 1000):
+            self.check_query_counts(total)
+
+    @skipUnless(LARGE_TESTS, 'set LARGE_TESTS=1 to seed 100,000 rows')
+    def test_query_count_on_a_large_table(self):
+        self.check_query_counts(100000)
+
+
+class InstructorAsyncReadViewTest(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='SuperAdmin',
+            email='superadmin@mail.com',
+            password='superadmin_Password'
+        )
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.admin_user)}'}
+
+        for i in range(12):
+            make_instructor(f'instructor{i}')
+
+    async def test_async_views_match_sync_views(self):
+        for page in (1, 2):
+            expected = await self.async_client.get(reverse('instructor_list'), {'page': page}, headers=self.headers)
+            response = await self.async_client.get(reverse('async_instructor_list'), {'page': page}, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['results'], expected.json()['results'])
+            self.assertEqual(response.json()['count'], 12)
+
+        pk = (await Instructor.objects.afirst()).pk
+        expected = await self.async_client.get(reverse('instructor_detail', args=[pk]), headers=self.headers)
+        response = await self.async_client.get(reverse('async_instructor_detail', args=[pk]), headers=self.headers)
+        self.assertEqual(response.json(), expected.json())
+
+
+class InstructorBulkStatusTest(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='SuperAdmin',
+            email='superadmin@mail.com',
+            password='superadmin_Password'
+        )
+
+        for i, status in enumerate(['deactivated', 'deactivated', 'deactivated', 'activated']):
+            joined = datetime(2025, i + 1, 1, tzinfo=timezone.utc)
+            make_instructor(f'instructor{i}', status=status, date_joined=joined)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+
+    def test_activate_deactivated_instructors_registered_before(self):
+        response = self.client.put(reverse('instructor_bulk_activate'), data={
+            'filters': {'status': 'deactivated', 'registered_before': '2025-03-01T00:00:00Z'}
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['matched'], response.data['updated']), (2, 2))
+        self.assertEqual(response.data['detail'], '2 instructors activated.')
+        self.assertEqual(
+            list(Instructor.objects.filter(status='deactivated').values_list('user__email', flat=True)),
+            ['instructor2@mail.com']
+        )
+
+    def test_deactivate_by_ids(self):
+        ids = list(Instructor.objects.values_list('pk', flat=True))
+        response = self.client.put(reverse('instructor_bulk_deactivate'), data={'ids': ids}, format='json')
+        self.assertEqual((response.data['matched'], response.data['updated']), (4, 1))
+        self.assertFalse(Instructor.objects.filter(status='activated').exists())
+
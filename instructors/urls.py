@@ -4,9 +4,13 @@ from .views import (
     InstructorRegistrationAPIView, 
     activate_instructor, 
     deactivate_instructor, 
+    bulk_activate_instructors,
+    bulk_deactivate_instructors,
     InstructorListAPIView, 
     InstructorDetailAPIView, 
-    InstructorDeleteAPIView
+    InstructorDeleteAPIView,
+    InstructorListAsyncAPIView,
+    InstructorDetailAsyncAPIView
 )
 
 
@@ -14,7 +18,15 @@ urlpatterns = [
     path('', InstructorListAPIView.as_view(), name='instructor_list'),
     path('register/', InstructorRegistrationAPIView.as_view(), name='instructor_register'),
     path('<int:pk>/', InstructorDetailAPIView.as_view(), name='instructor_detail'),
+    path('bulk/activate/', bulk_activate_instructors, name='instructor_bulk_activate'),
+    path('bulk/deactivate/', bulk_deactivate_instructors, name='instructor_bulk_deactivate'),
     path('<int:pk>/activate/', activate_instructor, name='instructor_activate'),
     path('<int:pk>/deactivate/', deactivate_instructor, name='instructor_deactivate'),
     path('<int:pk>/delete/', InstructorDeleteAPIView.as_view(), name='instructor_delete'),
-]
\ No newline at end of file
+]
+
+# mounted under /api/async/instructors/ for the ASGI deployment
+async_urlpatterns = [
+    path('', InstructorListAsyncAPIView.as_view(), name='async_instructor_list'),
+    path('<int:pk>/', InstructorDetailAsyncAPIView.as_view(), name='async_instructor_detail'),
+]
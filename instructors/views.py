@@ -1,8 +1,14 @@
 from rest_framework import generics, views, status, serializers
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import CachedJWTAuthentication
+from accounts.views import bulk_status_response
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from LearningMgtSystem.asyncviews import AsyncListAPIView, AsyncRetrieveAPIView
+from LearningMgtSystem.background import run_in_background, wants_background
+from enrolments.deletion import delete_instructor
+from LearningMgtSystem.conditional import ConditionalGetMixin
+from LearningMgtSystem.fieldsets import SparseQuerysetMixin
 
 from .serializers import InstructorSerializer
 from .models import Instructor
@@ -16,38 +22,34 @@ class InstructorRegistrationAPIView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
 
-        # deactivate the instructor status
-        instructor = serializer.save()
-        instructor.status = 'deactivated'
-        instructor.save()
-
-        # ensure that role = instructor
-        if hasattr(instructor.user, 'profile'):
-            instructor.user.profile.role = 'instructor'
-            instructor.user.profile.save()
-
-        # create linked instructor model
-        # Instructor.objects.create(user=user, status='deactivated')
+        # user, profile and instructor row are written in one transaction
+        serializer.save()
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class InstructorListAPIView(generics.ListAPIView):
-    queryset = Instructor.objects.all()
+class InstructorListAPIView(ConditionalGetMixin, SparseQuerysetMixin, generics.ListAPIView):
+    queryset = InstructorSerializer.setup_eager_loading(Instructor.objects.all())
     serializer_class = InstructorSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
-class InstructorDetailAPIView(generics.RetrieveAPIView):
-    queryset = Instructor.objects.all()
+    # primary key order, so pages walk the table instead of sorting it
+    ordering = ['id']
+
+    # stable ordering for ?pagination=keyset
+    keyset_ordering = 'id'
+
+class InstructorDetailAPIView(ConditionalGetMixin, SparseQuerysetMixin, generics.RetrieveAPIView):
+    queryset = InstructorSerializer.setup_eager_loading(Instructor.objects.all())
     serializer_class = InstructorSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
 class InstructorDeleteAPIView(generics.DestroyAPIView):
     queryset = Instructor.objects.all()
     serializer_class = InstructorSerializer
     permission_classes = [IsAdminUser]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     def destroy(self, request, pk):
         try:
@@ -55,14 +57,15 @@ class InstructorDeleteAPIView(generics.DestroyAPIView):
         except Instructor.DoesNotExist:
             raise serializers.ValidationError('No instructor exist with that pk')
         
-        if hasattr(instructor, 'user'):
-            user = instructor.user
-        instructor.delete()
-        user.delete()
+        # enrolments go in chunks first, then the user with the instructor (see enrolments.deletion)
+        if wants_background(request):
+            run_in_background(delete_instructor, instructor.pk)
+            return Response({'detail': 'Instructor deletion started.'}, status=202)
+        delete_instructor(instructor.pk)
         return Response({'detail': 'Instructor has been deleted.'}, status=200)
 
 @api_view(['PUT'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAdminUser])
 def activate_instructor(request, pk):
     try:
@@ -78,7 +81,7 @@ def activate_instructor(request, pk):
     return Response({'detail': 'Instructor has been activated.'}, status=200)
 
 @api_view(['PUT'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAdminUser])
 def deactivate_instructor(request, pk):
     try:
@@ -96,3 +99,28 @@ def deactivate_instructor(request, pk):
 
     
 
+
+@api_view(['PUT'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAdminUser])
+def bulk_activate_instructors(request):
+    # {"ids": [...]} or {"filters": {"status": ..., "registered_before": ...}}
+    return bulk_status_response(request, Instructor.objects.all(), 'activated')
+
+@api_view(['PUT'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAdminUser])
+def bulk_deactivate_instructors(request):
+    return bulk_status_response(request, Instructor.objects.all(), 'deactivated')
+
+
+# async read views for the ASGI deployment
+class InstructorListAsyncAPIView(SparseQuerysetMixin, AsyncListAPIView):
+    queryset = InstructorSerializer.setup_eager_loading(Instructor.objects.all())
+    serializer_class = InstructorSerializer
+    permission_classes = [IsAuthenticated]
+
+class InstructorDetailAsyncAPIView(SparseQuerysetMixin, AsyncRetrieveAPIView):
+    queryset = InstructorSerializer.setup_eager_loading(Instructor.objects.all())
+    serializer_class = InstructorSerializer
+    permission_classes = [IsAuthenticated]
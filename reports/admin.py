@@ -0,0 +1,12 @@
+from django.contrib import admin
+
+from .models import ReportJob
+
+
+class ReportJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'format', 'status', 'requested_by', 'row_count', 'created_at', 'finished_at']
+    list_filter = ['kind', 'format', 'status']
+    readonly_fields = ['status', 'file', 'row_count', 'error', 'started_at', 'finished_at']
+
+
+admin.site.register(ReportJob, ReportJobAdmin)
@@ -0,0 +1,239 @@
+import csv
+import io
+import logging
+import re
+import tempfile
+import zipfile
+from datetime import date, datetime, timedelta
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.files import File
+from django.utils import timezone
+from enrolments.models import Enrolment
+
+from .models import ReportJob
+
+
+logger = logging.getLogger(__name__)
+
+# (header, field) pairs, read with values_list so no model instances are built
+ENROLMENT_COLUMNS = [
+    ('Enrolment ID', 'id'),
+    ('Course', 'course__title'),
+    ('First name', 'student__user__first_name'),
+    ('Last name', 'student__user__last_name'),
+    ('Email', 'student__user__email'),
+    ('Lessons completed', 'completed'),
+    ('Date joined', 'date_joined'),
+]
+
+STUDENT_COLUMNS = [
+    ('Enrolment ID', 'id'),
+    ('Course', 'course__title'),
+    ('Instructor first name', 'course__instructor__user__first_name'),
+    ('Instructor last name', 'course__instructor__user__last_name'),
+    ('Lessons completed', 'completed'),
+    ('Date joined', 'date_joined'),
+]
+
+
+def get_chunk_size():
+    return getattr(settings, 'REPORT_CHUNK_SIZE', 2000)
+
+def get_report_source(job):
+    # (columns, queryset) for the job's kind and scope
+    queryset = Enrolment.objects.all()
+    if job.kind == 'instructor':
+        return ENROLMENT_COLUMNS, queryset.filter(course_id=job.scope_id)
+    if job.kind == 'student':
+        return STUDENT_COLUMNS, queryset.filter(student_id=job.scope_id)
+    return ENROLMENT_COLUMNS, queryset
+
+def iter_rows(queryset, fields, chunk_size):
+    """
+    Yield value tuples in primary key batches. Memory stays at one batch
+    however large the table is; unlike iterator(), this also holds on MySQL,
+    whose client buffers a whole result set.
+    """
+    last_pk = None
+    while True:
+        batch = queryset.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        rows = list(batch.values_list('pk', *fields)[:chunk_size])
+
+        for row in rows:
+            yield row[1:]
+
+        if len(rows) < chunk_size:
+            return
+        last_pk = rows[-1][0]
+
+
+class CSVReportWriter:
+    # spreadsheets open text starting with these as a formula
+    FORMULA_START = ('=', '+', '-', '@', '\t', '\r')
+
+    def __init__(self, fileobj):
+        self.stream = io.TextIOWrapper(fileobj, encoding='utf-8', newline='')
+        self.writer = csv.writer(self.stream)
+
+    def cell(self, value):
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        # names, emails and titles are user input: a leading ' keeps them text
+        if isinstance(value, str) and value.startswith(self.FORMULA_START):
+            return f"'{value}"
+        return value
+
+    def writerow(self, row):
+        self.writer.writerow([self.cell(value) for value in row])
+
+    def close(self):
+        # leave the underlying file open for the caller
+        self.stream.flush()
+        self.stream.detach()
+
+
+class XLSXReportWriter:
+    """
+    Minimal single-sheet XLSX written row by row straight into the zip entry,
+    with inline strings so nothing (such as a shared strings table) has to
+    be held in memory until the end.
+    """
+    CONTENT_TYPES = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    )
+    ROOT_RELS = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    )
+    WORKBOOK = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Report" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+    WORKBOOK_RELS = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    )
+
+    # characters XML 1.0 can't carry
+    ILLEGAL_XML = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+    def __init__(self, fileobj):
+        self.zip = zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_DEFLATED)
+        self.zip.writestr('[Content_Types].xml', self.CONTENT_TYPES)
+        self.zip.writestr('_rels/.rels', self.ROOT_RELS)
+        self.zip.writestr('xl/workbook.xml', self.WORKBOOK)
+        self.zip.writestr('xl/_rels/workbook.xml.rels', self.WORKBOOK_RELS)
+
+        self.sheet = io.TextIOWrapper(self.zip.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True), encoding='utf-8')
+        self.sheet.write(
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+        )
+
+    def cell(self, value):
+        # inline string cells are never evaluated, formula-like text stays text
+        if value is None:
+            return '<c/>'
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return f'<c t="n"><v>{value}</v></c>'
+        if isinstance(value, (date, datetime)):
+            value = value.isoformat()
+        text = escape(self.ILLEGAL_XML.sub('', str(value)))
+        return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+    def writerow(self, row):
+        self.sheet.write('<row>' + ''.join(self.cell(value) for value in row) + '</row>')
+
+    def close(self):
+        self.sheet.write('</sheetData></worksheet>')
+        self.sheet.close()
+        self.zip.close()
+
+
+WRITERS = {
+    'csv': CSVReportWriter,
+    'xlsx': XLSXReportWriter,
+}
+
+
+def generate_report(job, chunk_size=None):
+    """Write the job's report to its file and return the number of rows."""
+    columns, queryset = get_report_source(job)
+    fields = [field for _, field in columns]
+
+    # spooled to a temporary file, then streamed into the report storage
+    with tempfile.TemporaryFile() as tmp:
+        writer = WRITERS[job.format](tmp)
+        writer.writerow([header for header, _ in columns])
+
+        count = 0
+        for row in iter_rows(queryset, fields, chunk_size or get_chunk_size()):
+            writer.writerow(row)
+            count += 1
+        writer.close()
+
+        tmp.seek(0)
+        job.file.save(f'{job.kind}-report-{job.pk}.{job.format}', File(tmp), save=False)
+
+    return count
+
+def run_report_job(job_id):
+    # only the worker that moves the job out of 'pending' runs it
+    claimed = ReportJob.objects.filter(pk=job_id, status='pending').update(status='running', started_at=timezone.now())
+    if not claimed:
+        return
+
+    job = ReportJob.objects.get(pk=job_id)
+    try:
+        job.row_count = generate_report(job)
+        job.status = 'completed'
+    except Exception as e:
+        logger.exception('Report job %s failed', job_id)
+        job.status = 'failed'
+        job.error = str(e)
+
+    job.finished_at = timezone.now()
+    job.save()
+
+def purge_reports(days=None):
+    """
+    Delete report jobs that finished more than `days` days ago
+    (REPORTS_RETENTION_DAYS by default), with their files. Returns how many
+    jobs went.
+    """
+    if days is None:
+        days = getattr(settings, 'REPORTS_RETENTION_DAYS', 7)
+    cutoff = timezone.now() - timedelta(days=days)
+    jobs = ReportJob.objects.filter(status__in=['completed', 'failed'], finished_at__lt=cutoff)
+
+    purged = 0
+    for job in jobs.only('pk', 'file').iterator(chunk_size=500):
+        # the file first: a job left behind is retried on the next run, an orphaned file never is
+        if job.file:
+            job.file.delete(save=False)
+        job.delete()
+        purged += 1
+    return purged
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from reports.generators import purge_reports
+
+
+class Command(BaseCommand):
+    help = 'Delete finished report jobs and their files after the retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Keep jobs finished in the last DAYS days (default: REPORTS_RETENTION_DAYS)'
+        )
+
+    def handle(self, *args, **options):
+        purged = purge_reports(options['days'])
+        self.stdout.write(f"Purged {purged} report jobs.")
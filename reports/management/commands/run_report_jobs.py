@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from reports.generators import run_report_job
+from reports.models import ReportJob
+
+
+class Command(BaseCommand):
+    help = 'Run pending report jobs, e.g. jobs queued before a restart'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requeue-after', type=int, default=None,
+            help='Also rerun jobs stuck in "running" for this many minutes'
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue_after'] is not None:
+            stale = timezone.now() - timedelta(minutes=options['requeue_after'])
+            requeued = ReportJob.objects.filter(status='running', started_at__lt=stale).update(status='pending')
+            self.stdout.write(f"Requeued {requeued} stale jobs.")
+
+        job_ids = list(ReportJob.objects.filter(status='pending').order_by('id').values_list('id', flat=True))
+        for job_id in job_ids:
+            run_report_job(job_id)
+        self.stdout.write(f"Ran {len(job_ids)} report jobs.")
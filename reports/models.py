@@ -0,0 +1,58 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+
+
+class ReportStorage(FileSystemStorage):
+    """
+    Report files, outside MEDIA_ROOT: they're only served through the
+    download view. The directory is read from REPORTS_ROOT on every access,
+    so a changed setting (tests override it) takes effect on the storage
+    the model field already holds.
+    """
+    @property
+    def base_location(self):
+        return getattr(settings, 'REPORTS_ROOT', os.path.join(settings.BASE_DIR, 'reports_files'))
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+def get_report_storage():
+    return ReportStorage()
+
+
+class ReportJob(models.Model):
+    KIND_CHOICES = [
+        ('all', 'All enrolments'),
+        ('instructor', 'Instructor course'),
+        ('student', 'Student enrolments')
+    ]
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'XLSX')
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed')
+    ]
+
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='report_jobs')
+    kind = models.CharField(max_length=12, choices=KIND_CHOICES)
+    format = models.CharField(max_length=4, choices=FORMAT_CHOICES, default='csv')
+    # course or student the report is scoped to, None for 'all'
+    scope_id = models.PositiveBigIntegerField(blank=True, null=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', db_index=True)
+    file = models.FileField(storage=get_report_storage, upload_to='%Y/%m/', blank=True)
+    row_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f'{self.get_kind_display()} report #{self.pk} ({self.status})'
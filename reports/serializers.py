@@ -0,0 +1,46 @@
+from django.urls import reverse
+from rest_framework import serializers
+
+from .models import ReportJob
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+    # course (instructor reports) or student (student reports), admins only
+    scope_id = serializers.IntegerField(required=False, allow_null=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = [
+            'id', 'kind', 'format', 'scope_id', 'status', 'row_count', 'error',
+            'created_at', 'started_at', 'finished_at', 'download_url'
+        ]
+        read_only_fields = ['status', 'row_count', 'error', 'created_at', 'started_at', 'finished_at']
+
+    def get_download_url(self, obj):
+        if obj.status != 'completed':
+            return None
+        url = reverse('report_download', args=[obj.pk])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def validate(self, attrs):
+        user = self.context['request'].user
+        kind = attrs['kind']
+
+        if user.is_staff:
+            # admins pick the course or student an instructor/student report covers
+            if kind != 'all' and attrs.get('scope_id') is None:
+                raise serializers.ValidationError({'scope_id': 'This field is required for this report.'})
+            if kind == 'all':
+                attrs['scope_id'] = None
+            return attrs
+
+        # everyone else reports on their own course or enrolments
+        if kind == 'instructor' and hasattr(user, 'instructor') and hasattr(user.instructor, 'course'):
+            attrs['scope_id'] = user.instructor.course.pk
+        elif kind == 'student' and hasattr(user, 'student'):
+            attrs['scope_id'] = user.student.pk
+        else:
+            raise serializers.ValidationError({'kind': 'You are not allowed to request this report.'})
+        return attrs
@@ -0,0 +1,190 @@
+import csv
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from datetime import timedelta
+from xml.etree import ElementTree
+
+from rest_framework.test import APIClient, APITestCase
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from enrolments.models import Course, Enrolment
+from LearningMgtSystem.testutils import make_instructor, make_student
+
+from .generators import iter_rows
+from .models import ReportJob
+
+
+User = get_user_model()
+
+SHEET_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+
+
+class ReportJobTest(APITestCase):
+    def setUp(self):
+        self.reports_root = tempfile.mkdtemp()
+        settings_override = override_settings(REPORTS_ROOT=self.reports_root, BACKGROUND_TASKS_EAGER=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(shutil.rmtree, self.reports_root, ignore_errors=True)
+
+        self.superadmin = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='Superuser',
+            email='superuser@mail.com',
+            password='superuser_Password'
+        )
+
+        self.courses = []
+        for i in range(2):
+            instructor = make_instructor(f'instructor{i}')
+            self.courses.append(Course.objects.create(title=f'Course {i}', instructor=instructor, status='active'))
+        self.instructor_user = self.courses[0].instructor.user
+
+        self.students = []
+        for i in range(5):
+            student = make_student(f'student{i}')
+            self.students.append(student)
+
+            # every student takes course 0, the first two take course 1 as well
+            Enrolment.objects.create(student=student, course=self.courses[0], completed=i)
+            if i < 2:
+                Enrolment.objects.create(student=student, course=self.courses[1])
+
+        self.client = APIClient()
+
+    def request_report(self, user, data):
+        self.client.force_authenticate(user=user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('report_create'), data=data, format='json')
+        return response
+
+    def download(self, job_id):
+        response = self.client.get(reverse('report_download', args=[job_id]))
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def read_csv(self, job_id):
+        return list(csv.reader(io.StringIO(self.download(job_id).decode())))
+
+    def test_all_enrolments_csv(self):
+        response = self.request_report(self.superadmin, {'kind': 'all', 'format': 'csv'})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['status'], 'pending')
+
+        detail = self.client.get(reverse('report_detail', args=[response.data['id']]))
+        self.assertEqual(detail.data['status'], 'completed')
+        self.assertEqual(detail.data['row_count'], 7)
+        self.assertTrue(detail.data['download_url'].endswith(f"/api/reports/{response.data['id']}/download/"))
+
+        rows = self.read_csv(response.data['id'])
+        self.assertEqual(rows[0][:2], ['Enrolment ID', 'Course'])
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(rows[1][4], 'student0@mail.com')
+
+    def test_xlsx(self):
+        response = self.request_report(self.superadmin, {'kind': 'all', 'format': 'xlsx'})
+        content = self.download(response.data['id'])
+
+        with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+            self.assertIn('xl/workbook.xml', workbook.namelist())
+            sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+
+        rows = sheet.find(f'{SHEET_NS}sheetData').findall(f'{SHEET_NS}row')
+        self.assertEqual(len(rows), 8)
+        header = [cell.find(f'{SHEET_NS}is/{SHEET_NS}t').text for cell in rows[0]]
+        self.assertEqual(header[-2:], ['Lessons completed', 'Date joined'])
+        # numbers are stored as numeric cells
+        self.assertEqual(rows[1][5].get('t'), 'n')
+
+    def test_formulas_are_written_as_text(self):
+        title = '=HYPERLINK("https://example.com","Open")'
+        Course.objects.filter(pk=self.courses[0].pk).update(title=title)
+        User.objects.filter(pk=self.students[0].user_id).update(last_name='-2+3')
+
+        rows = self.read_csv(self.request_report(self.superadmin, {'kind': 'all', 'format': 'csv'}).data['id'])
+        self.assertEqual(rows[1][1], f"'{title}")
+        self.assertEqual(rows[1][3], "'-2+3")
+        # numbers aren't text, a negative one would keep its sign
+        self.assertEqual(rows[1][0], str(self.students[0].enrolment.order_by('pk').first().pk))
+
+        content = self.download(self.request_report(self.superadmin, {'kind': 'all', 'format': 'xlsx'}).data['id'])
+        with zipfile.ZipFile(io.BytesIO(content)) as workbook:
+            sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+        cell = sheet.find(f'{SHEET_NS}sheetData').findall(f'{SHEET_NS}row')[1][1]
+        self.assertEqual(cell.get('t'), 'inlineStr')
+        self.assertIsNone(cell.find(f'{SHEET_NS}f'))
+        self.assertEqual(cell.find(f'{SHEET_NS}is/{SHEET_NS}t').text, title)
+
+    def test_instructor_and_student_reports_are_scoped(self):
+        response = self.request_report(self.instructor_user, {'kind': 'instructor'})
+        self.assertEqual(response.status_code, 202)
+        rows = self.read_csv(response.data['id'])
+        self.assertEqual({row[1] for row in rows[1:]}, {'Course 0'})
+        self.assertEqual(len(rows), 6)
+
+        response = self.request_report(self.students[0].user, {'kind': 'student', 'scope_id': self.students[4].pk})
+        self.assertEqual(response.data['scope_id'], self.students[0].pk)
+        rows = self.read_csv(response.data['id'])
+        self.assertEqual([row[1] for row in rows[1:]], ['Course 0', 'Course 1'])
+
+    def test_permissions(self):
+        response = self.request_report(self.students[0].user, {'kind': 'all'})
+        self.assertEqual(response.status_code, 400)
+        response = self.request_report(self.students[0].user, {'kind': 'instructor'})
+        self.assertEqual(response.status_code, 400)
+        response = self.request_report(self.superadmin, {'kind': 'instructor'})
+        self.assertEqual(response.status_code, 400)
+
+        response = self.request_report(self.superadmin, {'kind': 'all'})
+        job_id = response.data['id']
+
+        # other users can't see or download the job
+        self.client.force_authenticate(user=self.instructor_user)
+        self.assertEqual(self.client.get(reverse('report_detail', args=[job_id])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('report_download', args=[job_id])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('report_list')).data['count'], 0)
+
+    def test_download_before_completion(self):
+        self.client.force_authenticate(user=self.superadmin)
+        # no commit callbacks run, so the job stays pending
+        response = self.client.post(reverse('report_create'), data={'kind': 'all'}, format='json')
+
+        download = self.client.get(reverse('report_download', args=[response.data['id']]))
+        self.assertEqual(download.status_code, 409)
+
+        call_command('run_report_jobs', stdout=io.StringIO())
+        self.assertEqual(ReportJob.objects.get(pk=response.data['id']).status, 'completed')
+        self.assertEqual(len(self.read_csv(response.data['id'])), 8)
+
+    def test_rows_are_read_in_bounded_chunks(self):
+        queryset = Enrolment.objects.all()
+        with self.assertNumQueries(3):
+            rows = list(iter_rows(queryset, ['id', 'completed'], chunk_size=3))
+        self.assertEqual([row[0] for row in rows], list(queryset.order_by('pk').values_list('pk', flat=True)))
+
+        # 4 rows in chunks of 2: the last, empty chunk ends the scan
+        queryset = Enrolment.objects.filter(course=self.courses[0]).exclude(completed=4)
+        with self.assertNumQueries(3):
+            self.assertEqual(len(list(iter_rows(queryset, ['id'], chunk_size=2))), 4)
+
+    def test_files_follow_reports_root(self):
+        response = self.request_report(self.superadmin, {'kind': 'all'})
+        job = ReportJob.objects.get(pk=response.data['id'])
+        self.assertTrue(job.file.path.startswith(os.path.realpath(self.reports_root)))
+        self.assertTrue(os.path.exists(job.file.path))
+
+    def test_purge_reports(self):
+        old = ReportJob.objects.get(pk=self.request_report(self.superadmin, {'kind': 'all'}).data['id'])
+        recent = ReportJob.objects.get(pk=self.request_report(self.superadmin, {'kind': 'all'}).data['id'])
+        ReportJob.objects.filter(pk=old.pk).update(finished_at=timezone.now() - timedelta(days=8))
+
+        call_command('purge_reports', stdout=io.StringIO())
+        self.assertEqual(list(ReportJob.objects.values_list('pk', flat=True)), [recent.pk])
+        self.assertFalse(os.path.exists(old.file.path))
+        self.assertTrue(os.path.exists(recent.file.path))
@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import views
+
+
+urlpatterns = [
+    path('', views.ReportJobListAPIView.as_view(), name='report_list'),
+    path('create/', views.ReportJobCreateAPIView.as_view(), name='report_create'),
+    path('<int:pk>/', views.ReportJobRetrieveAPIView.as_view(), name='report_detail'),
+    path('<int:pk>/download/', views.ReportJobDownloadAPIView.as_view(), name='report_download'),
+]
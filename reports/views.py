@@ -0,0 +1,62 @@
+from accounts.authentication import CachedJWTAuthentication
+from django.http import FileResponse
+from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from LearningMgtSystem.background import run_in_background
+
+from .generators import run_report_job
+from .models import ReportJob
+from .serializers import ReportJobSerializer
+
+
+class ReportJobQuerysetMixin:
+    # admins see every job, everyone else only their own
+    def get_queryset(self):
+        queryset = ReportJob.objects.all().order_by('-created_at', '-id')
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(requested_by=self.request.user)
+
+class ReportJobCreateAPIView(CreateAPIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    serializer_class = ReportJobSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        job = serializer.save(requested_by=request.user)
+
+        # the file is written off the request; poll the job until it completes
+        run_in_background(run_report_job, job.pk)
+        return Response(serializer.data, status=202)
+
+class ReportJobListAPIView(ReportJobQuerysetMixin, ListAPIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    serializer_class = ReportJobSerializer
+    filterset_fields = ['kind', 'status']
+
+class ReportJobRetrieveAPIView(ReportJobQuerysetMixin, RetrieveAPIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    serializer_class = ReportJobSerializer
+
+class ReportJobDownloadAPIView(ReportJobQuerysetMixin, RetrieveAPIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    serializer_class = ReportJobSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        job = self.get_object()
+        if job.status != 'completed':
+            return Response({"detail": f"Report is {job.status}."}, status=409)
+
+        # streamed from disk in blocks
+        filename = f'{job.kind}-report-{job.pk}.{job.format}'
+        return FileResponse(job.file.open('rb'), as_attachment=True, filename=filename)
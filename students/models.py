@@ -9,6 +9,7 @@ class Student(models.Model):
     ]
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='student')
     status = models.CharField(max_length=12, choices=STATUS_CHOICE)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f'{self.user.first_name} {self.user.last_name} (Student)'
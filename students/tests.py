@@ -1,6 +1,18 @@
+from datetime import datetime, timezone
+from unittest import skipUnless
+
 from rest_framework.test import APIClient, APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from accounts.authentication import USER_CACHE_KEY
+from accounts.claims import REVOKED_KEY
+from accounts.services import bulk_set_status
+from LearningMgtSystem.testutils import LARGE_TESTS, make_many, make_student
 
 from .models import Student
 
@@ -180,3 +192,168 @@ class StudentTest(APITestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(bad_response.status_code, 401)
 
+
+class StudentQueryCountTest(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='SuperAdmin',
+            email='superadmin@mail.com',
+            password='superadmin_Password'
+        )
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+        self.seeded = 0
+
+    def seed_students(self, total):
+        # students up to the total count
+        start, self.seeded = self.seeded, total
+        make_many('student', start, total)
+
+    def check_query_counts(self, total):
+        self.seed_students(total)
+        last_page = (total + 9) // 10
+
+        # one COUNT plus one joined SELECT, whatever the number of rows
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('student_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], total)
+        self.assertEqual(len(response.data['results']), 10)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('student_list'), {'page': last_page})
+        self.assertEqual(response.status_code, 200)
+
+        # keyset mode skips the COUNT and seeks from the cursor, page after page
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('student_list'), {'pagination': 'keyset'})
+        self.assertNotIn('count', response.data)
+        self.assertEqual(len(response.data['results']), 10)
+
+        if total > 10:
+            first_page = response.data['results']
+            with self.assertNumQueries(1):
+                response = self.client.get(response.data['next'])
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.data['results'], first_page)
+
+        student = Student.objects.order_by('-id').first()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('student_detail', kwargs={'pk': student.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['user']['profile']['role'], 'student')
+
+    def test_list_and_detail_query_count(self):
+        for total in (10, 1000):
+            self.check_query_counts(total)
+
+    @skipUnless(LARGE_TESTS, 'set LARGE_TESTS=1 to seed 100,000 rows')
+    def test_query_count_on_a_large_table(self):
+        self.check_query_counts(100000)
+
+
+class StudentAsyncReadViewTest(APITestCase):
+    def setUp(self):
+        self.admin_user = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='SuperAdmin',
+            email='superadmin@mail.com',
+            password='superadmin_Password'
+        )
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.admin_user)}'}
+
+        for i in range(12):
+            make_student(f'student{i}')
+
+    async def test_async_views_match_sync_views(self):
+        for page in (1, 2):
+            expected = await self.async_client.get(reverse('student_list'), {'page': page}, headers=self.headers)
+            response = await self.async_client.get(reverse('async_student_list'), {'page': page}, headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['results'], expected.json()['results'])
+            self.assertEqual(response.json()['count'], 12)
+
+        pk = (await Student.objects.afirst()).pk
+        expected = await self.async_client.get(reverse('student_detail', args=[pk]), headers=self.headers)
+        response = await self.async_client.get(reverse('async_student_detail', args=[pk]), headers=self.headers)
+        self.assertEqual(response.json(), expected.json())
+
+
+class StudentBulkStatusTest(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin_user = User.objects.create_superuser(
+            first_name='Sample',
+            last_name='SuperAdmin',
+            email='superadmin@mail.com',
+            password='superadmin_Password'
+        )
+
+        # students registered on the 1st to 5th of January
+        self.students = []
+        for i in range(5):
+            joined = datetime(2025, 1, i + 1, tzinfo=timezone.utc)
+            self.students.append(make_student(f'student{i}', date_joined=joined))
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin_user)
+
+    def put(self, url_name, data):
+        return self.client.put(reverse(url_name), data=data, format='json')
+
+    def test_by_ids(self):
+        ids = [self.students[0].pk, self.students[1].pk]
+        response = self.put('student_bulk_deactivate', {'ids': ids})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['matched'], response.data['updated']), (2, 2))
+        self.assertEqual(
+            set(Student.objects.filter(status='deactivated').values_list('pk', flat=True)), set(ids)
+        )
+
+        # already deactivated rows are matched but not written again
+        response = self.put('student_bulk_deactivate', {'ids': ids})
+        self.assertEqual((response.data['matched'], response.data['updated']), (2, 0))
+
+    def test_by_filters(self):
+        response = self.put('student_bulk_deactivate', {'filters': {'registered_before': '2025-01-03T00:00:00Z'}})
+        self.assertEqual(response.data['updated'], 2)
+
+        response = self.put('student_bulk_activate', {
+            'filters': {'status': 'deactivated', 'registered_after': '2025-01-02T00:00:00Z'}
+        })
+        self.assertEqual((response.data['matched'], response.data['updated']), (1, 1))
+        self.assertEqual(Student.objects.get(status='deactivated'), self.students[0])
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.put('student_bulk_activate', {}).status_code, 400)
+        self.assertEqual(self.put('student_bulk_activate', {'ids': [1], 'filters': {'status': 'activated'}}).status_code, 400)
+        self.assertEqual(self.put('student_bulk_activate', {'filters': {}}).status_code, 400)
+        self.assertEqual(self.put('student_bulk_deactivate', {'filters': {'status': ''}}).status_code, 400)
+        self.assertEqual(self.put('student_bulk_deactivate', {'filters': {'email_domain': ' ', 'status': None}}).status_code, 400)
+        self.assertEqual(self.put('student_bulk_activate', {'filters': {'user__is_staff': True}}).status_code, 400)
+        self.assertEqual(self.put('student_bulk_activate', {'filters': {'registered_before': 'yesterday'}}).status_code, 400)
+
+        self.client.force_authenticate(user=self.students[0].user)
+        self.assertEqual(self.put('student_bulk_activate', {'ids': [1]}).status_code, 403)
+
+    def test_caches_are_invalidated(self):
+        user_id = self.students[0].user_id
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.students[0].user)}')
+        client.get(reverse('student_list'))
+        self.assertIsNotNone(cache.get(USER_CACHE_KEY.format(user_id=user_id)))
+
+        self.put('student_bulk_deactivate', {'ids': [self.students[0].pk]})
+        self.assertIsNone(cache.get(USER_CACHE_KEY.format(user_id=user_id)))
+        self.assertIsNotNone(cache.get(REVOKED_KEY.format(user_id=user_id)))
+
+    def test_one_update_per_chunk(self):
+        before = Student.objects.get(pk=self.students[0].pk).updated_at
+        with CaptureQueriesContext(connection) as ctx:
+            updated = bulk_set_status(Student.objects.all(), 'deactivated', chunk_size=2)
+        self.assertEqual(updated, 5)
+        self.assertEqual(len([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]), 3)
+        self.assertGreater(Student.objects.get(pk=self.students[0].pk).updated_at, before)
+
@@ -4,8 +4,12 @@ from .views import (
     StudentRegistrationAPIView, 
     activate_student, 
     deactivate_student,
+    bulk_activate_students,
+    bulk_deactivate_students,
     StudentDeleteAPIView,
     StudentDetailAPIView,
+    StudentListAsyncAPIView,
+    StudentDetailAsyncAPIView,
     StudentListAPIView
     )
 
@@ -14,7 +18,15 @@ urlpatterns = [
     path('', StudentListAPIView.as_view(), name='student_list'),
     path('register/', StudentRegistrationAPIView.as_view(), name='student_register'),
     path('<int:pk>/', StudentDetailAPIView.as_view(), name='student_detail'),
+    path('bulk/activate/', bulk_activate_students, name='student_bulk_activate'),
+    path('bulk/deactivate/', bulk_deactivate_students, name='student_bulk_deactivate'),
     path('<int:pk>/activate/', activate_student, name='student_activate'),
     path('<int:pk>/deactivate/', deactivate_student, name='student_deactivate'),
     path('<int:pk>/delete/', StudentDeleteAPIView.as_view(), name='student_delete'),
-]
\ No newline at end of file
+]
+
+# mounted under /api/async/students/ for the ASGI deployment
+async_urlpatterns = [
+    path('', StudentListAsyncAPIView.as_view(), name='async_student_list'),
+    path('<int:pk>/', StudentDetailAsyncAPIView.as_view(), name='async_student_detail'),
+]
@@ -1,8 +1,14 @@
 from rest_framework import generics, status, serializers
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from accounts.authentication import CachedJWTAuthentication
+from accounts.views import bulk_status_response
 from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes, authentication_classes
+from LearningMgtSystem.asyncviews import AsyncListAPIView, AsyncRetrieveAPIView
+from LearningMgtSystem.background import run_in_background, wants_background
+from enrolments.deletion import delete_student
+from LearningMgtSystem.conditional import ConditionalGetMixin
+from LearningMgtSystem.fieldsets import SparseQuerysetMixin
 
 
 from .serializers import StudentSerializer
@@ -17,38 +23,34 @@ class StudentRegistrationAPIView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data, context={'request': request})
         serializer.is_valid(raise_exception=True)
 
-        # activate student status
-        student = serializer.save()
-        student.status = 'activated'
-        student.save()
-
-        # ensure that role = student
-        if hasattr(student.user, 'profile'):
-            student.user.profile.role = 'student'
-            student.user.profile.save()
-
-        # create linked student model
-        # Student.objects.create(user=user, status='activated')
+        # user, profile and student row are written in one transaction
+        serializer.save()
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class StudentListAPIView(generics.ListAPIView):
-    queryset = Student.objects.all()
+class StudentListAPIView(ConditionalGetMixin, SparseQuerysetMixin, generics.ListAPIView):
+    queryset = StudentSerializer.setup_eager_loading(Student.objects.all())
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
-class StudentDetailAPIView(generics.RetrieveAPIView):
-    queryset = Student.objects.all()
+    # primary key order, so pages walk the table instead of sorting it
+    ordering = ['id']
+
+    # stable ordering for ?pagination=keyset
+    keyset_ordering = 'id'
+
+class StudentDetailAPIView(ConditionalGetMixin, SparseQuerysetMixin, generics.RetrieveAPIView):
+    queryset = StudentSerializer.setup_eager_loading(Student.objects.all())
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
 class StudentDeleteAPIView(generics.DestroyAPIView):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     permission_classes = [IsAdminUser]
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     def destroy(self, request, pk):
         try:
@@ -56,14 +58,15 @@ class StudentDeleteAPIView(generics.DestroyAPIView):
         except Student.DoesNotExist:
             raise serializers.ValidationError('No student exist with that pk')
         
-        if hasattr(student, 'user'):
-            user = student.user
-        student.delete()
-        user.delete()
+        # enrolments go in chunks first, then the user with the student (see enrolments.deletion)
+        if wants_background(request):
+            run_in_background(delete_student, student.pk)
+            return Response({'detail': 'Student deletion started.'}, status=202)
+        delete_student(student.pk)
         return Response({'detail': 'Student has been deleted.'}, status=200)
 
 @api_view(['PUT'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAdminUser])
 def activate_student(request, pk):
     try:
@@ -79,7 +82,7 @@ def activate_student(request, pk):
     return Response({'detail': 'Student has been activated.'}, status=200)
 
 @api_view(['PUT'])
-@authentication_classes([JWTAuthentication])
+@authentication_classes([CachedJWTAuthentication])
 @permission_classes([IsAdminUser])
 def deactivate_student(request, pk):
     try:
@@ -93,3 +96,29 @@ def deactivate_student(request, pk):
     student.save()
 
     return Response({'detail': 'Student has been deactivated.'}, status=200)
+
+
+@api_view(['PUT'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAdminUser])
+def bulk_activate_students(request):
+    # {"ids": [...]} or {"filters": {"status": ..., "registered_before": ...}}
+    return bulk_status_response(request, Student.objects.all(), 'activated')
+
+@api_view(['PUT'])
+@authentication_classes([CachedJWTAuthentication])
+@permission_classes([IsAdminUser])
+def bulk_deactivate_students(request):
+    return bulk_status_response(request, Student.objects.all(), 'deactivated')
+
+
+# async read views for the ASGI deployment
+class StudentListAsyncAPIView(SparseQuerysetMixin, AsyncListAPIView):
+    queryset = StudentSerializer.setup_eager_loading(Student.objects.all())
+    serializer_class = StudentSerializer
+    permission_classes = [IsAuthenticated]
+
+class StudentDetailAsyncAPIView(SparseQuerysetMixin, AsyncRetrieveAPIView):
+    queryset = StudentSerializer.setup_eager_loading(Student.objects.all())
+    serializer_class = StudentSerializer
+    permission_classes = [IsAuthenticated]